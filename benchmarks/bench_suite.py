@@ -0,0 +1,190 @@
+"""
+Benchmark suite of glance's own costs, emitting one JSON record per measurement so runs of different versions can be
+compared.
+
+    python benchmarks/bench_suite.py [--max-looks N] [--dict-max-looks N] [--calls N] [--threads N] [-o FILE]
+
+Measures:
+    overhead     per-call overhead of Glance.watch over an undecorated function, per recording mode, and with
+                 recording switched off before or after decoration.
+    memory       bytes of memory per recorded look, per storage.
+    stats        time of the first stats read (fold) and of mean, std, find_outliers, longest_look and _plot_data
+                 from 10^3 looks up to --max-looks.
+    import       time of `import glance` in a fresh interpreter.
+    threads      looks recorded per second by decorated calls from several threads.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import timeit
+import platform
+import argparse
+import subprocess
+import threading
+import tracemalloc
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  #: Root of the checkout holding the glance package.
+sys.path.insert(0, ROOT)  # Benchmarks the checkout's glance, as the interpreters of bench_import do.
+
+import glance
+from glance import Glance, Watch
+from glance.clock import NS_PER_SECOND
+from bench_watch import func, decorated, per_call_ns
+
+
+def record(name, value, unit, **params):
+    return {"benchmark": name, "params": params, "value": value, "unit": unit}
+
+
+def bench_overhead(calls):
+    baseline = per_call_ns(func, calls)
+    yield record("overhead", baseline, "ns/call", mode="undecorated")
+    for mode, options, mode_calls in (
+        ("columnar", {}, calls),
+        ("columnar single thread", {"threadsafe": False}, calls),
+        ("dict", {"storage": "dict"}, calls // 20),
+    ):
+        yield record("overhead", per_call_ns(decorated(**options), mode_calls) - baseline, "ns/call", mode=mode)
+    glance.disable()
+    try:
+        yield record("overhead", per_call_ns(decorated(), calls) - baseline, "ns/call", mode="disabled at decoration")
+    finally:
+        glance.enable()
+    target = decorated()
+    glance.disable()
+    try:
+        yield record("overhead", per_call_ns(target, calls) - baseline, "ns/call", mode="disabled at runtime")
+    finally:
+        glance.enable()
+
+
+def bench_memory(looks, storage):
+    gc.collect()
+    tracemalloc.start()
+    gl = Glance(storage=storage)
+    target = gl.watch(func)
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(looks):
+        target(1)
+    gl.flush()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return record("memory", used / looks, "bytes/look", storage=storage, looks=looks)
+
+
+def filled_watch(looks, storage, seed=0):
+    """
+    Returns a watch holding looks closed looks with log-normal look times, bulk loaded without timing calls.
+    """
+    rng = np.random.default_rng(seed)
+    start_ns = np.arange(looks, dtype=np.int64) * 10_000
+    end_ns = start_ns + (rng.lognormal(-9, 1, looks) * NS_PER_SECOND).astype(np.int64) + 1
+    watch = Watch("bench", storage=storage)
+    if storage == "columnar":
+        watch.looks.look_ids.frombytes(np.arange(looks, dtype=np.int64).tobytes())
+        watch.looks.start_ns.frombytes(start_ns.tobytes())
+        watch.looks.end_ns.frombytes(end_ns.tobytes())
+    else:
+        from glance.glance import Look
+        for look_id, start, end in zip(range(looks), start_ns.tolist(), end_ns.tolist()):
+            watch.looks[look_id] = Look("bench", id=look_id, start_ns=start, end_ns=end)
+    return watch
+
+
+def timed(call, repeat=3):
+    return min(timeit.repeat(call, number=1, repeat=repeat))
+
+
+def bench_stats(looks, storage):
+    watch = filled_watch(looks, storage)
+    start = time.perf_counter()
+    watch.stats
+    yield record("stats", time.perf_counter() - start, "s", operation="first read", storage=storage, looks=looks)
+    for operation, call in (
+        ("mean", lambda: watch.mean),
+        ("std", lambda: watch.std),
+        ("longest_look", lambda: watch.longest_look()),
+        ("find_outliers", lambda: watch.find_outliers.ids()),
+        ("_plot_data", lambda: watch._plot_data()),
+    ):
+        yield record("stats", timed(call), "s", operation=operation, storage=storage, looks=looks)
+
+
+def bench_import(repeat=5):
+    path = os.pathsep.join(filter(None, (ROOT, os.environ.get("PYTHONPATH"))))
+
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, env=dict(os.environ, PYTHONPATH=path))
+        return time.perf_counter() - start
+    interpreter = min(run("pass") for _ in range(repeat))
+    return record("import", min(run("import glance") for _ in range(repeat)) - interpreter, "s")
+
+
+def bench_threads(threads, calls):
+    gl = Glance()
+    target = gl.watch(func)
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        barrier.wait()
+        for _ in range(calls):
+            target(1)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    gl.flush()
+    elapsed = time.perf_counter() - start
+    assert gl.watches["func"].stats.count == threads * calls
+    return record("threads", threads * calls / elapsed, "looks/s", threads=threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-looks", type=int, default=10 ** 7, help="largest columnar watch of the stats runs")
+    parser.add_argument("--dict-max-looks", type=int, default=10 ** 5, help="largest dict watch of the stats runs")
+    parser.add_argument("--calls", type=int, default=200_000, help="calls per overhead and thread measurement")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("-o", "--output", help="file to write the JSON lines to, stdout by default")
+    options = parser.parse_args()
+
+    def benchmarks():
+        yield from bench_overhead(options.calls)
+        for storage, looks in (("columnar", 100_000), ("dict", 10_000)):
+            yield bench_memory(looks, storage)
+        for storage, max_looks in (("columnar", options.max_looks), ("dict", options.dict_max_looks)):
+            looks = 1000
+            while looks <= max_looks:
+                yield from bench_stats(looks, storage)
+                looks *= 10
+        yield bench_import()
+        for threads in sorted({1, options.threads}):
+            yield bench_threads(threads, options.calls // threads)
+
+    meta = {
+        "benchmark": "meta",
+        "glance": glance.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.time(),
+    }
+    output = open(options.output, "w") if options.output else sys.stdout
+    try:
+        print(json.dumps(meta), file=output, flush=True)
+        for result in benchmarks():
+            print(json.dumps(result), file=output, flush=True)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
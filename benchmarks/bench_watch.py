@@ -0,0 +1,83 @@
+"""
+Per-call overhead of the Glance.watch decorator versus an undecorated function.
+
+    python benchmarks/bench_watch.py [-n CALLS]
+"""
+import os
+import sys
+import argparse
+import functools
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The checkout's glance package.
+
+import glance
+from glance import Glance
+from glance.retention import RingBuffer
+from glance.sampling import EveryNth
+
+# Forwarding *args and **kwargs through any wrapper already costs CPython about 200 ns per call, so the fast path is
+# measured against a bare pass-through wrapper. Recording a look on top of it reads the clock twice, counts the call,
+# looks up the thread's pending list, appends two readings and later converts them to int64 when draining, about
+# 350 ns on CPython 3.11.
+TARGET_NS = 400  #: Per-call overhead of the columnar fast path targeted above a pass-through wrapper.
+
+
+def func(a, b=1):
+    return a
+
+
+def pass_through(target):
+    @functools.wraps(target)
+    def wrapper(*args, **kwargs):
+        return target(*args, **kwargs)
+    return wrapper
+
+
+def decorated(**glance_options):
+    gl = Glance(**glance_options)
+    return gl.watch(func)
+
+
+def per_call_ns(target, calls, repeat=5):
+    return min(timeit.repeat(lambda: target(1, b=2), number=calls, repeat=repeat)) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--calls", type=int, default=200_000)
+    options = parser.parse_args()
+
+    baseline = per_call_ns(func, options.calls)
+    cases = [
+        ("columnar (fast path)", decorated(), options.calls),
+        ("columnar, single thread", decorated(threadsafe=False), options.calls),
+        ("columnar, 1 in 100", decorated(sampling=EveryNth(100)), options.calls),
+        ("columnar + ring buffer", decorated(retention=RingBuffer(10_000)), options.calls),
+        # Look objects are orders of magnitude slower, keep their run short.
+        ("dict", decorated(storage="dict"), options.calls // 20),
+        ("dict + capture_args", Glance().watch(capture_args=True)(func), options.calls // 20),
+    ]
+    forwarding = per_call_ns(pass_through(func), options.calls) - baseline
+    print(f"{'undecorated':<24}{baseline:>10.0f} ns/call")
+    print(f"{'pass-through wrapper':<24}{forwarding:>10.0f} ns/call overhead")
+    overheads = {}
+    for name, target, calls in cases:
+        overheads[name] = per_call_ns(target, calls) - baseline
+        print(f"{name:<24}{overheads[name]:>10.0f} ns/call overhead")
+    recording = overheads["columnar (fast path)"] - forwarding
+    verdict = "met" if recording < TARGET_NS else "missed"
+    print(f"fast path: {recording:.0f} ns/call above the pass-through wrapper, target < {TARGET_NS} ns, {verdict}")
+
+    runtime_disabled = decorated()
+    glance.disable()
+    try:
+        for name, target in (("disabled at decoration", decorated()), ("disabled at runtime", runtime_disabled)):
+            overhead = per_call_ns(target, options.calls) - baseline
+            print(f"{name:<24}{overhead:>10.0f} ns/call overhead")
+    finally:
+        glance.enable()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,5 +10,7 @@ from .__version__ import (
     __url__,
 )
 from .glance import Glance, Watch, Look
+from .active import current_look
+from .switch import enable, disable, is_enabled
 
 
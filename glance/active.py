@@ -0,0 +1,294 @@
+"""
+Open looks of watched calls that need more than the fast path, see Glance.watch().
+
+An ActiveLook times a coroutine, generator or async generator from its first resumption until it returns, raises or
+is closed, and a synchronous call that captures its arguments, measures channels or runs in a span. It is the current
+look, see current_look(), while the body runs, and it can also measure running time apart from time spent suspended.
+"""
+import contextvars
+import functools
+from glance.clock import NS_PER_SECOND
+from glance.outcomes import OK, outcome_of
+from glance.spans import current_span, nest, parent_of
+
+_current = contextvars.ContextVar("glance_current_look", default=None)  #: ActiveLook of the running watched call.
+
+
+class ActiveLook:
+    """
+    Open look of a watched coroutine, generator or capture_args call. It is the current look, see current_look(), while
+    the watched body runs, and optionally measures how long the body actually ran between suspensions. A look started
+    in a span records the span's look as its parent and is added to the call tree below it once closed.
+    """
+    __slots__ = ("watch", "look_id", "now", "split", "bucket", "span", "call_tree", "start_ns", "running_ns", "_token")
+
+    def __init__(self, watch, split: bool = False, given_args: dict = None, bucket=None, call_tree=None):
+        self.span = current_span()  #: SpanFrame the look was started in, if any.
+        self.call_tree = call_tree  #: Root of the call tree of the watch's Glance, if any.
+        self.watch = watch  #: Watch the look belongs to.
+        self.look_id = watch.start_look(parent_of(self.span))  #: Id of the look in watch.looks.
+        if given_args is not None:
+            self.look.given_args = given_args
+        self.now = watch.clock.now
+        self.split = split
+        self.bucket = bucket  #: Key of the call in watch.buckets, if the watch has buckets.
+        #: Clock reading at the start, only kept when splitting, bucketing or in a span.
+        self.start_ns = self.now() if split or watch.buckets is not None or self.span is not None else None
+        self.running_ns = 0  #: Time spent running the body, in nanoseconds.
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+
+    @property
+    def look(self):
+        """
+        Look object of this look.
+        :return: Look
+        """
+        return self.watch.looks[self.look_id]
+
+    def stop(self):
+        """
+        Stops the look and, when splitting, adds its running and suspended times to the watch. When bucketing, adds
+        its look time to its bucket.
+        :return:
+        """
+        end_ns = self.now() if self.start_ns is not None else None
+        self.watch.stop_look(self.look_id)
+        if end_ns is None:
+            return
+        if self.span is not None:
+            nest(self.span, self.call_tree, self.watch.target, end_ns - self.start_ns)
+        if self.watch.buckets is not None:
+            self.watch.buckets.add(self.bucket, end_ns - self.start_ns)
+        if self.split:
+            self.watch.add_split(
+                self.look_id,
+                self.running_ns / NS_PER_SECOND,
+                (end_ns - self.start_ns - self.running_ns) / NS_PER_SECOND,
+            )
+
+    def fail(self, error: BaseException):
+        """
+        Closes the look of a call that raised error, see Watch.fail_look(). A GeneratorExit just stops it.
+        :param error:
+        :return:
+        """
+        if outcome_of(error) == OK:
+            self.stop()
+            return
+        end_ns = self.now() if self.span is not None else None
+        self.watch.fail_look(self.look_id, error)
+        if end_ns is not None:
+            nest(self.span, self.call_tree, self.watch.target, end_ns - self.start_ns)
+
+    def step(self, iterator, value=None, error: BaseException = None):
+        """
+        Resumes iterator (a generator or an awaitable's iterator) once, as the current look, timing how long it runs.
+        :param iterator:
+        :param value: sent to the iterator.
+        :param error: thrown into the iterator instead of sending value.
+        :return: the value yielded by the iterator
+        """
+        with self:
+            start_ns = self.now()
+            try:
+                if error is None:
+                    return iterator.send(value)
+                return iterator.throw(error)
+            finally:
+                self.running_ns += self.now() - start_ns
+
+    def drive(self, iterator):
+        """
+        Generator running iterator to completion one step at a time, forwarding what it yields, what is sent back and
+        what is thrown in. Returns what the iterator returns.
+        :param iterator:
+        :return:
+        """
+        value, error = None, None
+        while True:
+            try:
+                item = self.step(iterator, value, error)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                value, error = (yield item), None
+            except GeneratorExit:
+                iterator.close()
+                raise
+            except BaseException as exc:
+                value, error = None, exc
+
+
+class _Awaitable:
+    """
+    Awaits an awaitable through ActiveLook.drive, so every resumption of it is timed.
+    """
+    __slots__ = ("active", "awaitable")
+
+    def __init__(self, active: ActiveLook, awaitable):
+        self.active = active
+        self.awaitable = awaitable
+
+    def __await__(self):
+        return (yield from self.active.drive(self.awaitable.__await__()))
+
+
+def _given_args(args, kwargs):
+    return {
+        "args": args,
+        "kwargs": kwargs,
+    }
+
+
+def bucket_of(watch, args, kwargs):
+    """
+    Returns the key of a call in the watch's buckets, or None if the watch has none.
+    """
+    return None if watch.buckets is None else watch.buckets.key_of(args, kwargs)
+
+
+def current_look():
+    """
+    Returns the open Look of the innermost watched coroutine, generator or capture_args call running in the current
+    context, or None. Tracked with contextvars, so concurrent tasks on one event loop each see their own look.
+    :return: Look
+    """
+    active = _current.get()
+    return None if active is None else active.look
+
+
+def watch_coroutine(watch, func, capture_args: bool = False, split: bool = False, sample=None, call_tree=None):
+    """
+    Wraps a coroutine function so one look spans the whole await of every call.
+    :param watch:
+    :param func:
+    :param capture_args: keep every call's arguments in Look.given_args.
+    :param split: also measure running versus suspended time.
+    :param sample: sampler of the watch's sampling policy, returning whether a call is recorded, if any.
+    :param call_tree: root of the call tree of the watch's Glance, calls run in a span are added to it.
+    :return: coroutine function
+    """
+    switch = watch.switch
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not switch.on or sample is not None and not sample():
+            return await func(*args, **kwargs)
+        active = ActiveLook(
+            watch,
+            split,
+            _given_args(args, kwargs) if capture_args else None,
+            bucket_of(watch, args, kwargs),
+            call_tree,
+        )
+        try:
+            if split:
+                result = await _Awaitable(active, func(*args, **kwargs))
+            else:
+                with active:
+                    result = await func(*args, **kwargs)
+        except BaseException as error:
+            active.fail(error)
+            raise
+        active.stop()
+        return result
+
+    return wrapper
+
+
+def watch_generator(watch, func, capture_args: bool = False, split: bool = False, sample=None, call_tree=None):
+    """
+    Wraps a generator function so one look spans every call's generator, from the first time it is resumed until it is
+    exhausted or closed. The look is only current while the generator body runs.
+    :param watch:
+    :param func:
+    :param capture_args: keep every call's arguments in Look.given_args.
+    :param split: also measure running versus suspended time, i.e. waiting on the consumer.
+    :param sample: sampler of the watch's sampling policy, returning whether a call is recorded, if any.
+    :param call_tree: root of the call tree of the watch's Glance, calls run in a span are added to it.
+    :return: generator function
+    """
+    switch = watch.switch
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not switch.on or sample is not None and not sample():
+            return (yield from func(*args, **kwargs))
+        active = ActiveLook(
+            watch,
+            split,
+            _given_args(args, kwargs) if capture_args else None,
+            bucket_of(watch, args, kwargs),
+            call_tree,
+        )
+        try:
+            result = yield from active.drive(func(*args, **kwargs))
+        except BaseException as error:
+            active.fail(error)
+            raise
+        active.stop()
+        return result
+
+    return wrapper
+
+
+def watch_async_generator(watch, func, capture_args: bool = False, split: bool = False, sample=None, call_tree=None):
+    """
+    Wraps an async generator function so one look spans every call's async generator, from the first time it is
+    resumed until it is exhausted or closed.
+    :param watch:
+    :param func:
+    :param capture_args: keep every call's arguments in Look.given_args.
+    :param split: also measure running versus suspended time, whether awaiting or waiting on the consumer.
+    :param sample: sampler of the watch's sampling policy, returning whether a call is recorded, if any.
+    :param call_tree: root of the call tree of the watch's Glance, calls run in a span are added to it.
+    :return: async generator function
+    """
+    switch = watch.switch
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        active = ActiveLook(
+            watch,
+            split,
+            _given_args(args, kwargs) if capture_args else None,
+            bucket_of(watch, args, kwargs),
+            call_tree,
+        ) if switch.on and (sample is None or sample()) else None
+        agen = func(*args, **kwargs)
+        value, error = None, None
+        try:
+            while True:
+                step = agen.asend(value) if error is None else agen.athrow(error)
+                try:
+                    if active is None:
+                        item = await step
+                    elif split:
+                        item = await _Awaitable(active, step)
+                    else:
+                        with active:
+                            item = await step
+                except StopAsyncIteration:
+                    break
+                try:
+                    value, error = (yield item), None
+                except GeneratorExit:
+                    await agen.aclose()
+                    raise
+                except BaseException as exc:
+                    value, error = None, exc
+        except BaseException as failure:
+            if active is not None:
+                active.fail(failure)
+            raise
+        if active is not None:
+            active.stop()
+
+    return wrapper
@@ -0,0 +1,359 @@
+"""
+Look times bucketed by a key of each call's arguments, see Glance.watch(key=...).
+
+The key function is called with the arguments of every recorded call, before the call, and only the key it returns is
+kept, so latency can be broken down by input size or type without keeping the arguments alive. Keys should be small
+hashable values, such as the helpers below return; a key returning an argument itself would keep it alive.
+
+Arguments are bound to the watched function's signature first, defaults applied, so a key sees every parameter
+whether it was passed by position, by keyword or not at all. A plain key function, such as len, is only passed the
+leading positional arguments and the keyword arguments its own signature accepts. A key function that raises never
+fails the call: the call runs as usual, its look time goes to Buckets.overflow, and the failure is counted in
+Buckets.key_errors, with a warning for the first one.
+"""
+import math
+import inspect
+import warnings
+import threading
+import attr
+from glance.clock import NS_PER_SECOND
+from glance.sketch import QuantileSketch
+from glance.stats import RunningStats
+
+
+UNKEYED = object()  #: Key of calls whose key function raised, see Buckets.key_of().
+_POSITIONAL = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+
+
+def _size_of(value):
+    return value if isinstance(value, (int, float)) else len(value)
+
+
+def _log2_size_of(value):
+    n = int(math.ceil(_size_of(value)))
+    return 1 << (n - 1).bit_length() if n > 0 else n
+
+
+def _type_name_of(value):
+    return type(value).__name__
+
+
+@attr.s(frozen=True)
+class _ArgumentKey:
+    """
+    Key function applying transform to one argument of the call, looked up by name in the keyword arguments first,
+    then by position.
+    """
+    transform = attr.ib()
+    position = attr.ib(type=int, default=0)
+    name = attr.ib(type=str, default=None)
+
+    def __call__(self, *args, **kwargs):
+        if self.name is not None and self.name in kwargs:
+            return self.transform(kwargs[self.name])
+        return self.transform(args[self.position])
+
+    def bind(self, signature: inspect.Signature):
+        """
+        Returns the key looking name up at its position among the positional parameters of signature, where
+        Signature.bind() puts it.
+        :param signature:
+        :return: _ArgumentKey
+        """
+        positional = [name for name, parameter in signature.parameters.items() if parameter.kind in _POSITIONAL]
+        if self.name in positional:
+            return attr.evolve(self, position=positional.index(self.name))
+        return self
+
+
+@attr.s(frozen=True)
+class _Accepting:
+    """
+    Key function calling key with only the arguments its signature accepts: the first positional ones, and keyword
+    ones by name. None stands for any number or any name.
+    """
+    key = attr.ib()
+    positional = attr.ib(type=int, default=None)  #: Number of positional arguments passed.
+    names = attr.ib(type=frozenset, default=None)  #: Names of the keyword arguments passed.
+
+    def __call__(self, *args, **kwargs):
+        if self.positional is not None:
+            args = args[:self.positional]
+        if self.names is not None:
+            kwargs = {name: value for name, value in kwargs.items() if name in self.names}
+        return self.key(*args, **kwargs)
+
+    @classmethod
+    def of(cls, key):
+        """
+        Returns key wrapped to only receive the arguments it accepts, or key itself if its signature is unknown.
+        :param key:
+        :return: function
+        """
+        try:
+            parameters = inspect.signature(key).parameters.values()
+        except (TypeError, ValueError):
+            return key
+        kinds = {parameter.kind for parameter in parameters}
+        positional = None if inspect.Parameter.VAR_POSITIONAL in kinds else sum(
+            parameter.kind in _POSITIONAL for parameter in parameters
+        )
+        names = None if inspect.Parameter.VAR_KEYWORD in kinds else frozenset(
+            parameter.name for parameter in parameters if parameter.kind == inspect.Parameter.KEYWORD_ONLY
+        )
+        return cls(key, positional, names)
+
+
+@attr.s(frozen=True)
+class _Fingerprint:
+    """
+    Key function combining several key functions into a tuple key.
+    """
+    keys = attr.ib(type=tuple, converter=tuple)
+
+    def __call__(self, *args, **kwargs):
+        return tuple(part(*args, **kwargs) for part in self.keys)
+
+    def bind(self, signature: inspect.Signature):
+        return _Fingerprint(
+            part.bind(signature) if hasattr(part, "bind") else _Accepting.of(part) for part in self.keys
+        )
+
+
+def size(position: int = 0, name: str = None):
+    """
+    Returns a key function giving the size of an argument: its len(), or the argument itself if it is a number.
+    :param position: index of the argument in the positional arguments.
+    :param name: name of the argument, looked up first in the keyword arguments.
+    :return: function
+    """
+    return _ArgumentKey(_size_of, position, name)
+
+
+def log2_size(position: int = 0, name: str = None):
+    """
+    Returns a key function giving the size of an argument rounded up to a power of two, which bounds the number of
+    buckets whatever the sizes seen.
+    :param position: index of the argument in the positional arguments.
+    :param name: name of the argument, looked up first in the keyword arguments.
+    :return: function
+    """
+    return _ArgumentKey(_log2_size_of, position, name)
+
+
+def type_name(position: int = 0, name: str = None):
+    """
+    Returns a key function giving the type name of an argument.
+    :param position: index of the argument in the positional arguments.
+    :param name: name of the argument, looked up first in the keyword arguments.
+    :return: function
+    """
+    return _ArgumentKey(_type_name_of, position, name)
+
+
+def fingerprint(*keys):
+    """
+    Returns a key function combining several key functions into a tuple key.
+    :param keys: key functions.
+    :return: function
+    """
+    return _Fingerprint(keys)
+
+
+def _log2(n):
+    import numpy as np
+    return np.log2(n)
+
+
+COMPLEXITIES = {
+    "O(1)": lambda n: n * 0.0,
+    "O(log n)": _log2,
+    "O(n)": lambda n: n,
+    "O(n log n)": lambda n: n * _log2(n),
+    "O(n^2)": lambda n: n ** 2,
+    "O(n^3)": lambda n: n ** 3,
+}  #: Growth functions fitted by Buckets.fit(), by name.
+
+
+@attr.s
+class ComplexityFit:
+    """
+    Least squares fit of look time = intercept + slope * growth(size), see Buckets.fit().
+    """
+    model = attr.ib(type=str)  #: Name of the growth function in COMPLEXITIES.
+    intercept = attr.ib(type=float)  #: Seconds.
+    slope = attr.ib(type=float)  #: Seconds per unit of growth.
+    residual = attr.ib(type=float)  #: Look count weighted sum of squared errors of the bucket means.
+    r2 = attr.ib(type=float)  #: Coefficient of determination of the fit.
+
+    def predict(self, n):
+        """
+        Returns the look time the fit predicts for size n.
+        :param n: number or np.ndarray
+        :return: float or np.ndarray
+        """
+        import numpy as np
+        return self.intercept + self.slope * COMPLEXITIES[self.model](np.asarray(n, dtype=float))
+
+
+@attr.s
+class Buckets:
+    """
+    RunningStats, and optionally a QuantileSketch, of look times per key of the watched calls' arguments. At most
+    max_buckets keys are tracked, the looks of further keys, and of calls whose key raised, are only added to
+    Buckets.overflow.
+    """
+    key = attr.ib()  #: Called with each recorded call's arguments, returns the bucket of the call.
+    key_errors = attr.ib(type=int, default=0, init=False)  #: Calls whose arguments could not be bound or keyed.
+    sketches = attr.ib(type=bool, default=True)  #: Whether buckets keep a QuantileSketch, for percentiles.
+    max_buckets = attr.ib(type=int, default=1024)  #: Number of distinct keys tracked.
+    overflow = attr.ib(type=RunningStats, factory=RunningStats, init=False)  #: Looks of no tracked key.
+    signature = attr.ib(type=inspect.Signature, default=None, init=False)  #: Signature the arguments are bound to.
+    _key = attr.ib(default=None, init=False, repr=False, eq=False)
+    _stats = attr.ib(type=dict, factory=dict, init=False, repr=False)
+    _sketches = attr.ib(type=dict, factory=dict, init=False, repr=False)
+    lock = attr.ib(factory=threading.Lock, init=False, repr=False, eq=False)
+
+    def __attrs_post_init__(self):
+        self._key = self.key
+
+    def bind(self, signature: inspect.Signature):
+        """
+        Binds the arguments of every call to signature, that of the watched function, before computing their key.
+        :param signature:
+        :return: self
+        """
+        self.signature = signature
+        self._key = self.key.bind(signature) if hasattr(self.key, "bind") else _Accepting.of(self.key)
+        return self
+
+    def key_of(self, args, kwargs):
+        """
+        Returns the key of a call, or UNKEYED if binding its arguments or the key function raised, which is counted in
+        key_errors and warned about the first time.
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        try:
+            if self.signature is not None:
+                bound = self.signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                args, kwargs = bound.args, bound.kwargs
+            return self._key(*args, **kwargs)
+        except Exception as error:
+            with self.lock:
+                self.key_errors += 1
+                first = self.key_errors == 1
+            if first:
+                warnings.warn(
+                    f"Bucket key {self.key!r} raised {error!r}, looks of the calls it cannot key go to the overflow.",
+                    RuntimeWarning,
+                    stacklevel=3,
+                )
+            return UNKEYED
+
+    def add(self, bucket, look_ns: int):
+        """
+        Adds a look time to a bucket.
+        :param bucket: key of the call, UNKEYED adds to the overflow.
+        :param look_ns: look time in nanoseconds.
+        :return:
+        """
+        value = look_ns / NS_PER_SECOND
+        with self.lock:
+            stats = None if bucket is UNKEYED else self._stats.get(bucket)
+            if stats is None:
+                if bucket is UNKEYED or len(self._stats) >= self.max_buckets:
+                    self.overflow.add(value)
+                    return
+                stats = self._stats[bucket] = RunningStats()
+                if self.sketches:
+                    self._sketches[bucket] = QuantileSketch()
+            stats.add(value)
+            if self.sketches:
+                self._sketches[bucket].add(value)
+
+    def keys(self):
+        """
+        Returns the keys of every bucket, sorted when they are comparable.
+        :return: list
+        """
+        with self.lock:
+            keys = list(self._stats)
+        try:
+            return sorted(keys)
+        except TypeError:
+            return keys
+
+    def stats(self, bucket):
+        """
+        Returns a copy of the aggregates of a bucket.
+        :param bucket:
+        :return: RunningStats
+        """
+        with self.lock:
+            return self._stats[bucket].copy()
+
+    def percentile(self, bucket, q: float):
+        """
+        Returns the q-th percentile of the look times of a bucket.
+        :param bucket:
+        :param q: percentile in [0, 100]
+        :return: float
+        """
+        if not self.sketches:
+            raise ValueError("Percentiles need Buckets with sketches=True.")
+        with self.lock:
+            return self._sketches[bucket].percentile(q)
+
+    def table(self, qs=(50, 99)):
+        """
+        Returns one row per bucket: key, look count, mean, then the qs-th percentiles when sketches are kept.
+        :param qs: percentiles in [0, 100]
+        :return: list(tuple)
+        """
+        rows = []
+        for bucket in self.keys():
+            with self.lock:
+                stats = self._stats[bucket]
+                percentiles = self._sketches[bucket].percentiles(qs) if self.sketches else []
+                rows.append((bucket, stats.count, stats.mean, *percentiles))
+        return rows
+
+    def fit(self, models=None):
+        """
+        Fits look time against bucket key, for numeric keys such as sizes, with each growth function of models and
+        returns the best fit. Bucket means are fitted, weighted by their look counts, and fits with a negative slope
+        are left out.
+        :param models: names of growth functions from COMPLEXITIES, all of them by default.
+        :return: ComplexityFit
+        """
+        import numpy as np
+        with self.lock:
+            points = [
+                (bucket, stats.mean, stats.count) for bucket, stats in self._stats.items()
+                if isinstance(bucket, (int, float)) and not isinstance(bucket, bool) and bucket > 0
+            ]
+        if len(points) < 2:
+            raise ValueError("A complexity fit needs at least two buckets with positive numeric keys.")
+        n, means, counts = (np.array(column, dtype=float) for column in zip(*points))
+        weights = np.sqrt(counts)
+        total = (counts * (means - np.average(means, weights=counts)) ** 2).sum()
+        best = None
+        for model in models or COMPLEXITIES:
+            growth = COMPLEXITIES[model](n)
+            if model == "O(1)":
+                intercept, slope = float(np.average(means, weights=counts)), 0.0
+            else:
+                design = np.column_stack((np.ones_like(n), growth)) * weights[:, None]
+                (intercept, slope), *_ = np.linalg.lstsq(design, means * weights, rcond=None)
+                if slope < 0:
+                    continue
+            residual = float((counts * (means - intercept - slope * growth) ** 2).sum())
+            if best is None or residual < best.residual:
+                r2 = 1 - residual / total if total else 1.0
+                best = ComplexityFit(model, float(intercept), float(slope), residual, float(r2))
+        if best is None:
+            raise ValueError(f"No growth function of {list(models)} fits with a non negative slope.")
+        return best
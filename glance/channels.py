@@ -0,0 +1,202 @@
+"""
+Extra measurements of every look of a watch, next to its wall clock look time, see Glance.watch(channels=...).
+
+A channel reads a counter before and after each call and keeps the difference: CpuTime the CPU time of the calling
+thread, telling CPU bound calls apart from ones waiting on I/O or locks, Allocations the peak bytes allocated according
+to tracemalloc, and GcCollections the garbage collections that ran. Each channel keeps its own values, aggregates,
+optional sketch and outliers. Watches without channels never touch this module on their hot path.
+"""
+import gc
+import time
+import threading
+import tracemalloc
+from array import array
+import attr
+from glance.clock import NS_PER_SECOND
+from glance.sketch import QuantileSketch
+from glance.stats import RunningStats
+from glance.errors import GlanceWatchEmptyError
+
+
+@attr.s
+class Channel:
+    """
+    Base of the channels: values measured around every look, aligned with the look ids.
+    """
+    name = "channel"  #: Key of the channel in Watch.channels.
+    unit = ""  #: Unit of the values.
+    sketch = attr.ib(default=None)  #: QuantileSketch of the values, True creates a default one.
+    stats = attr.ib(type=RunningStats, factory=RunningStats, init=False)  #: Aggregates of the values.
+    ids = attr.ib(default=None, init=False, repr=False)  #: Look ids, an array of int for columnar watches.
+    values = attr.ib(type=array, factory=lambda: array('d'), init=False, repr=False)  #: Values, aligned with ids.
+    lock = attr.ib(factory=threading.Lock, init=False, repr=False, eq=False)
+
+    def __attrs_post_init__(self):
+        if isinstance(self.sketch, bool):
+            self.sketch = QuantileSketch() if self.sketch else None
+
+    def attach(self):
+        """
+        Called when a watch starts measuring its calls with the channel.
+        """
+
+    def start(self):
+        """
+        Returns the reading of the channel before a call.
+        """
+        raise NotImplementedError
+
+    def stop(self, reading):
+        """
+        Returns the value of the channel for a call, from the reading start() returned before it.
+        """
+        raise NotImplementedError
+
+    def add(self, look_id, value: float):
+        """
+        Records the value of a look.
+        :param look_id:
+        :param value:
+        :return:
+        """
+        with self.lock:
+            if self.ids is None:
+                self.ids = array('q') if isinstance(look_id, int) else []
+            self.ids.append(look_id)
+            self.values.append(value)
+            self.stats.add(value, look_id)
+            if self.sketch is not None:
+                self.sketch.add(value)
+
+    def columns(self):
+        """
+        Returns a snapshot of the look ids and values.
+        :return: (list or array, np.ndarray)
+        """
+        import numpy as np
+        with self.lock:
+            ids = [] if self.ids is None else self.ids[:]
+            return ids, np.array(self.values, dtype=float)
+
+    @property
+    def mean(self):
+        """
+        Returns the mean value of the channel.
+        :return: float
+        """
+        with self.lock:
+            if not self.stats.count:
+                raise GlanceWatchEmptyError(self.name)
+            return self.stats.mean
+
+    def percentile(self, q: float):
+        """
+        Returns the q-th percentile, q in [0, 100], of the values, from the sketch if the channel keeps one.
+        :param q:
+        :return: float
+        """
+        import numpy as np
+        with self.lock:
+            if not self.stats.count:
+                raise GlanceWatchEmptyError(self.name)
+            if self.sketch is not None:
+                return self.sketch.percentile(q)
+        _, values = self.columns()
+        return float(np.percentile(values, q))
+
+    def find_outliers(self, n_std=2, method="zscore", **options):
+        """
+        Finds outliers among the values as a list of tuples [(look id, value)], like Watch.find_outliers().
+        :param n_std: threshold of the "zscore" method.
+        :param method: name of a method in glance.outliers.METHODS.
+        :param options: keyword arguments of the method.
+        :return: list(tuple)
+        """
+        import numpy as np
+        from glance.outliers import outlier_mask
+        with self.lock:
+            stats = self.stats.copy()
+            if stats.count < 2:
+                raise GlanceWatchEmptyError(self.name, 2)
+        ids, values = self.columns()
+        if method == "zscore":
+            options = dict(n_std=n_std, mean=stats.mean, std=stats.std, **options)
+        return [(ids[i], float(values[i])) for i in np.flatnonzero(outlier_mask(values, method, **options))]
+
+
+@attr.s
+class CpuTime(Channel):
+    """
+    CPU time, in seconds, the calling thread spent in each call, from time.thread_time_ns().
+    """
+    name = "cpu"
+    unit = "s"
+
+    def start(self):
+        return time.thread_time_ns()
+
+    def stop(self, reading):
+        return (time.thread_time_ns() - reading) / NS_PER_SECOND
+
+
+@attr.s
+class Allocations(Channel):
+    """
+    Peak bytes allocated during each call, above what was allocated when it started, traced by tracemalloc, which is
+    started once a watch uses the channel if it is not tracing yet. Temporary objects freed before the call returns
+    count, and so do other threads allocating during the call. The peak is process wide, so a call measured inside
+    another one resets the outer call's peak. Tracing slows every allocation down, so this channel is opt-in.
+    """
+    name = "allocations"
+    unit = "bytes"
+
+    def attach(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start(self):
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def stop(self, reading):
+        return float(tracemalloc.get_traced_memory()[1] - reading)
+
+
+def _collections():
+    return sum(generation["collections"] for generation in gc.get_stats())
+
+
+@attr.s
+class GcCollections(Channel):
+    """
+    Garbage collections, of any generation, that ran during each call.
+    """
+    name = "gc"
+    unit = "collections"
+
+    def start(self):
+        return _collections()
+
+    def stop(self, reading):
+        return float(_collections() - reading)
+
+
+CHANNELS = {
+    "cpu": CpuTime,
+    "allocations": Allocations,
+    "gc": GcCollections,
+}  #: Channel classes by name, usable as Glance.watch(channels=[...]).
+
+
+def channel_of(channel):
+    """
+    Returns a new channel for a name from CHANNELS, or channel itself if it is already a Channel.
+    :param channel: str or Channel
+    :return: Channel
+    """
+    if isinstance(channel, Channel):
+        return channel
+    try:
+        return CHANNELS[channel]()
+    except KeyError:
+        raise ValueError(f"Unknown channel: {channel}. Expected one of {sorted(CHANNELS)}")
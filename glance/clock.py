@@ -0,0 +1,96 @@
+"""
+Integer nanosecond clocks timing looks, see Glance(clock=...).
+
+A Clock reads one of CLOCK_SOURCES, time.perf_counter_ns by default, and converts its readings to wall-clock
+timestamps through an anchor taken once at creation, so looks store plain integer readings and never call
+time.time(). FakeClock is driven manually, for deterministic tests.
+"""
+import time
+import attr
+
+NS_PER_SECOND = 1_000_000_000
+
+CLOCK_SOURCES = {
+    "perf_counter": time.perf_counter_ns,
+    "monotonic": time.monotonic_ns,
+    "process_time": time.process_time_ns,
+    "thread_time": time.thread_time_ns,
+    "time": time.time_ns,
+}  #: Named clock sources usable as Clock(source=...).
+
+
+@attr.s
+class Clock:
+    """
+    Integer nanosecond clock used to time looks. Readings are turned into wall-clock timestamps by anchoring the
+    source to time.time_ns() once, when the clock is created.
+    """
+    source = attr.ib(default="perf_counter")  #: Name in CLOCK_SOURCES or a callable returning integer nanoseconds.
+    now = attr.ib(init=False, repr=False, eq=False)  #: Callable returning the current reading in nanoseconds.
+    anchor_ns = attr.ib(type=int, init=False)  #: Reading of the source when the clock was created.
+    epoch_ns = attr.ib(type=int, init=False)  #: Wall-clock time in nanoseconds when the clock was created.
+
+    def __attrs_post_init__(self):
+        if isinstance(self.source, str):
+            try:
+                self.now = CLOCK_SOURCES[self.source]
+            except KeyError:
+                raise ValueError(f"Unknown clock source: {self.source}. Expected one of {sorted(CLOCK_SOURCES)}")
+        else:
+            self.now = self.source
+        self.anchor_ns = self.now()
+        self.epoch_ns = time.time_ns()
+
+    def to_timestamp(self, ns: int):
+        """
+        Converts a reading of this clock to seconds since epoch.
+        :param ns:
+        :return: float
+        """
+        return (self.epoch_ns + ns - self.anchor_ns) / NS_PER_SECOND
+
+    def from_timestamp(self, timestamp: float):
+        """
+        Converts seconds since epoch to a reading of this clock.
+        :param timestamp:
+        :return: int
+        """
+        return round(timestamp * NS_PER_SECOND) - self.epoch_ns + self.anchor_ns
+
+    def timestamp(self):
+        """
+        Returns the current time of this clock in seconds since epoch.
+        :return: float
+        """
+        return self.to_timestamp(self.now())
+
+
+@attr.s
+class FakeClock(Clock):
+    """
+    Manually driven clock for tests. Every reading returns the current value then moves it forward by step_ns.
+    """
+    source = attr.ib(default=None, init=False)
+    value_ns = attr.ib(type=int, default=0)  #: Next reading of the clock.
+    step_ns = attr.ib(type=int, default=0)  #: Added to value_ns after every reading.
+
+    def __attrs_post_init__(self):
+        self.source = self.now = self._read
+        self.anchor_ns = self.value_ns
+        self.epoch_ns = time.time_ns()
+
+    def _read(self):
+        value = self.value_ns
+        self.value_ns += self.step_ns
+        return value
+
+    def advance(self, ns: int):
+        """
+        Moves the clock forward by ns nanoseconds.
+        :param ns:
+        :return:
+        """
+        self.value_ns += ns
+
+
+DEFAULT_CLOCK = Clock()  #: Clock shared by looks, watches and glances created without one.
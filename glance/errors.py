@@ -74,5 +74,29 @@ class GlanceWatchExistsError(GlanceBaseException):
         self.message = f"Given watch with target: {watch_target} already exists."
 
 
+class GlanceWatchEmptyError(GlanceBaseException):
+    """
+    Error for computing statistics on a watch without enough closed looks.
+    """
+    def __init__(self, watch_target: str, required: int = 1):
+        self.message = f"The watch with target: {watch_target} needs at least {required} closed look(s)."
+
+
+class GlanceReadOnlyError(GlanceBaseException):
+    """
+    Error for when looks are added to a watch loaded from a recording file.
+    """
+    def __init__(self, watch_target: str):
+        self.message = f"The watch with target: {watch_target} is loaded from a recording and is read only."
+
+
+class GlanceFileFormatError(GlanceBaseException):
+    """
+    Error for when a file is not a glance recording, or not one this version can read.
+    """
+    def __init__(self, path, reason: str):
+        self.message = f"Cannot read glance recording {path}: {reason}"
+
+
 
 # git remote set-url origin git@github.com:polkapolka/glance.git
\ No newline at end of file
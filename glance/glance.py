@@ -3,35 +3,77 @@ import attr
 import variants
 import uuid
 import functools
-import statistics
 import inspect
-import dateutil.relativedelta
+import threading
 from datetime import datetime
-import matplotlib.pyplot as plt
-import numpy as np
+from glance.clock import Clock, DEFAULT_CLOCK, NS_PER_SECOND
+from glance.storage import DictLooks, ColumnarLooks, MappedLooks
+from glance.sketch import QuantileSketch
+from glance.histogram import Histogram
+from glance.buckets import Buckets
+from glance.outcomes import OK, Outcome, outcome_of
+from glance.switch import is_enabled, switch_for
+from glance.stats import RunningStats
+from glance.snapshot import WatchSnapshot, GlanceSnapshot
+from glance.spans import Span, SpanNode, _current as _current_span
+from glance.active import ActiveLook, bucket_of, watch_coroutine, watch_generator, watch_async_generator
 from glance.errors import (
     GlanceLookOpenError,
     GlanceLookClosedError,
-    GlanceLookNotFoundError,
     GlanceWatchClosedError,
     GlanceWatchNotFoundError,
     GlanceWatchOpenError,
     GlanceClosedError,
-    GlanceWatchExistsError
+    GlanceWatchExistsError,
+    GlanceWatchEmptyError,
 )
 
 
-@attr.s
+def _figure(interactive: bool = False):
+    """
+    Returns a new (figure, axes). Matplotlib is only imported here, on first plot. Non-interactive figures are drawn
+    with the headless Agg canvas and never touch pyplot or the user's backend.
+    :param interactive:
+    :return: (Figure, Axes)
+    """
+    if interactive:
+        import matplotlib.pyplot as plt
+        return plt.subplots()
+    from matplotlib.figure import Figure
+    fig = Figure()
+    return fig, fig.subplots()
+
+
+def _is_sync(func):
+    return not (
+        inspect.iscoroutinefunction(func) or inspect.isasyncgenfunction(func) or inspect.isgeneratorfunction(func)
+    )
+
+
+@attr.s(init=False)
 class Look:
     """
     Look class is the base unit of the glance package. It is the actual timer of whatever is being watched.
+
+    Besides clock readings, start_ns and end_ns, a look can be created from start_time and end_time timestamps, in
+    seconds since epoch, which are converted through its clock.
     """
     target = attr.ib(type=str)  #: What is being timed.
     expected_args = attr.ib(type=inspect.Signature, default=None)  #: Expected arguments if any.
     given_args = attr.ib(type=dict, factory=dict)  #: Arguments in this looks instance of watch item, if any.
     id = attr.ib(type=str, default=None)
-    start_time = attr.ib(type=float, default=None)
-    end_time = attr.ib(type=float, default=None)
+    start_ns = attr.ib(type=int, default=None)  #: Clock reading at the start of the look, in nanoseconds.
+    end_ns = attr.ib(type=int, default=None)  #: Clock reading at the end of the look, in nanoseconds.
+    clock = attr.ib(type=Clock, default=DEFAULT_CLOCK, repr=False, eq=False)  #: Clock timing the look.
+    parent = attr.ib(type=tuple, default=None)  #: (target, look id) of the look of the span it ran in, if any.
+    _on_stop = attr.ib(default=None, init=False, repr=False, eq=False)  #: Called with the look once it is stopped.
+
+    def __init__(self, *args, start_time: float = None, end_time: float = None, **kwargs):
+        self.__attrs_init__(*args, **kwargs)
+        if start_time is not None:
+            self.start_time = start_time
+        if end_time is not None:
+            self.end_time = end_time
 
     @property
     def is_done(self):
@@ -39,23 +81,60 @@ class Look:
         property which indicates look has ended.
         :return: boolean
         """
-        if self.start_time and self.end_time:
+        if self.start_ns is not None and self.end_ns is not None:
             return True
         else:
             return False
 
+    @property
+    def start_time(self):
+        """
+        Start of the look in seconds since epoch.
+        :return: float
+        """
+        return None if self.start_ns is None else self.clock.to_timestamp(self.start_ns)
+
+    @start_time.setter
+    def start_time(self, timestamp):
+        self.start_ns = None if timestamp is None else self.clock.from_timestamp(timestamp)
+
+    @property
+    def end_time(self):
+        """
+        End of the look in seconds since epoch.
+        :return: float
+        """
+        return None if self.end_ns is None else self.clock.to_timestamp(self.end_ns)
+
+    @end_time.setter
+    def end_time(self, timestamp):
+        self.end_ns = None if timestamp is None else self.clock.from_timestamp(timestamp)
+
     def __attrs_post_init__(self):
-        self.start_time = time.time()
-        self.id = str(uuid.uuid4())
+        if self.start_ns is None:
+            self.start_ns = self.clock.now()
+        if self.id is None:
+            self.id = str(uuid.uuid4())
 
     @variants.primary
     def look_time(self):
         """
-        Returns length of look in seconds since epoch.
+        Returns length of look in seconds.
         :return: float
         """
         if self.is_done:
-            return self.end_time - self.start_time
+            return (self.end_ns - self.start_ns) / NS_PER_SECOND
+        else:
+            raise GlanceLookOpenError()
+
+    @look_time.variant("ns")
+    def look_time(self):
+        """
+        Returns length of look in integer nanoseconds.
+        :return: int
+        """
+        if self.is_done:
+            return self.end_ns - self.start_ns
         else:
             raise GlanceLookOpenError()
 
@@ -66,6 +145,7 @@ class Look:
         :return: dateutil.relativedelta
         """
         if self.is_done:
+            import dateutil.relativedelta
             dt_start = datetime.fromtimestamp(self.start_time)
             dt_end = datetime.fromtimestamp(self.end_time)
             time_delta = dateutil.relativedelta.relativedelta(dt_end, dt_start)
@@ -80,6 +160,7 @@ class Look:
         :return: str
         """
         if self.is_done:
+            import dateutil.relativedelta
             dt_start = datetime.fromtimestamp(self.start_time)
             dt_end = datetime.fromtimestamp(self.end_time)
             time_delta = dateutil.relativedelta.relativedelta(dt_end, dt_start)
@@ -98,10 +179,12 @@ class Look:
             raise ValueError("Look has not been ended, no value for end_time")
 
     def stop(self):
-        if self.end_time:
+        if self.end_ns is not None:
             raise GlanceLookClosedError(self)
         else:
-            self.end_time = time.time()
+            self.end_ns = self.clock.now()
+            if self._on_stop is not None:
+                self._on_stop(self)
 
 
 @attr.s
@@ -114,6 +197,19 @@ class Watch:
     start_time = attr.ib(type=float, default=None)
     end_time = attr.ib(type=float, default=None)
     looks = attr.ib(type=dict, factory=dict)  #: Dictionary of looks, for each instance of what is being watched.
+    storage = attr.ib(type=str, default="dict")  #: Storage backend for looks, "dict", "columnar" or "mapped".
+    retention = attr.ib(default=None)  #: Retention policy from glance.retention for closed looks, None keeps all.
+    sketch = attr.ib(default=None)  #: QuantileSketch of closed look times, True creates a default one.
+    histogram = attr.ib(default=None)  #: Histogram of closed look times, True creates a default one.
+    clock = attr.ib(type=Clock, default=DEFAULT_CLOCK, repr=False, eq=False)  #: Clock timing the watch's looks.
+    sampling = attr.ib(default=None)  #: Sampling policy from glance.sampling for decorated calls, None records all.
+    window = attr.ib(default=None)  #: RollingWindow of the recent closed looks, see Watch.rolling().
+    running = attr.ib(type=RunningStats, default=None)  #: Time looks spent running, see Glance.watch(loop_metrics=).
+    suspended = attr.ib(type=RunningStats, default=None)  #: Time looks spent suspended, awaiting or yielding.
+    buckets = attr.ib(type=Buckets, default=None)  #: Look times by a key of the call arguments, see Glance.watch(key=).
+    channels = attr.ib(type=dict, factory=dict)  #: Channels measured around every look by name, see glance.channels.
+    failures = attr.ib(type=dict, factory=dict)  #: Outcome of the looks of calls that raised, by exception type name.
+    switch = attr.ib(default=None, init=False, repr=False, eq=False)  #: Recording switch, see Watch.enabled.
 
     @property
     def is_done(self):
@@ -121,22 +217,68 @@ class Watch:
         property which indicates Watch has ended.
         :return: boolean
         """
-        if self.start_time and self.end_time:
+        if self.start_time is not None and self.end_time is not None:
             return True
         else:
             return False
 
     def __attrs_post_init__(self):
-        self.start_time = time.time()
+        if self.start_time is None:
+            self.start_time = self.clock.timestamp()
+        self.switch = switch_for(self.target)
+        if isinstance(self.sketch, bool):
+            self.sketch = QuantileSketch() if self.sketch else None
+        if isinstance(self.histogram, bool):
+            self.histogram = Histogram() if self.histogram else None
+        if self.storage == "columnar":
+            if not isinstance(self.looks, ColumnarLooks):
+                self.looks = ColumnarLooks(
+                    target=self.target,
+                    expected_args=self.expected_args,
+                    retention=self.retention,
+                    sketch=self.sketch,
+                    clock=self.clock,
+                    window=self.window,
+                    histogram=self.histogram,
+                )
+        elif self.storage == "dict":
+            if not isinstance(self.looks, DictLooks):
+                self.looks = DictLooks(
+                    self.looks,
+                    target=self.target,
+                    expected_args=self.expected_args,
+                    retention=self.retention,
+                    sketch=self.sketch,
+                    clock=self.clock,
+                    window=self.window,
+                    histogram=self.histogram,
+                )
+        elif self.storage == "mapped":
+            if not isinstance(self.looks, MappedLooks):
+                raise ValueError("Mapped storage is only created by loading a recording, see Glance.load().")
+        else:
+            raise ValueError(f"Unknown storage: {self.storage}")
+
+    @property
+    def enabled(self):
+        """
+        Whether decorated calls of the watch are recorded. Setting it switches the watch on or off at runtime, see
+        glance.switch for the global switch.
+        :return: bool
+        """
+        return self.switch.enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool):
+        self.switch.set(enabled)
 
-    def start_look(self):
+    def start_look(self, parent: tuple = None):
         """
-        Starts a new Look instance and adds it to Watch.looks dictionary.
-        :return: str of Look.id
+        Starts a new Look instance and adds it to Watch.looks.
+        :param parent: (target, look id) of the look of the span the look is started in, see Look.parent.
+        :return: Look.id
         """
-        look = Look(self.target, expected_args=self.expected_args)
-        self.looks[look.id] = look
-        return look.id
+        return self.looks.start(parent)
 
     def stop_look(self, look_id):
         """
@@ -144,11 +286,7 @@ class Watch:
         :param look_id:
         :return:
         """
-        if look_id in self.looks.keys():
-            look = self.looks[look_id]
-            look.stop()
-        else:
-            raise GlanceLookNotFoundError()
+        self.looks.stop(look_id)
 
     def stop(self):
         """
@@ -156,21 +294,225 @@ class Watch:
         :return:
         """
         if self.end_time is None:
-            for look in self.looks.values():
-                if not look.is_done:
-                    look.stop()
-            self.end_time = time.time()
+            self.looks.stop_all()
+            self.end_time = self.clock.timestamp()
         else:
             raise GlanceWatchClosedError()
 
+    def enable_histogram(self, histogram: Histogram = None):
+        """
+        Starts keeping a Histogram of the watch's look times. It counts the closed looks already stored in the watch
+        only if the store kept every one of them, otherwise, as under a retention policy, it starts empty and counts
+        the looks closed from then on.
+        :param histogram: defaults to a Histogram with the default bounds.
+        :return: Histogram
+        """
+        with self.looks.lock:
+            if self.looks.histogram is None:
+                histogram = Histogram() if histogram is None else histogram
+                times = self.looks.times()
+                if len(times) == self.looks.stats.count:
+                    histogram.add_many(times)
+                self.histogram = self.looks.histogram = histogram
+            return self.looks.histogram
+
+    def add_failure(self, error: BaseException, look_ns: int, look_id=None):
+        """
+        Adds the look time of a call that raised error to the Outcome of its exception type in Watch.failures, and not
+        to the watch's looks, so failed calls neither skew nor hide in the latency of the successful ones.
+        :param error:
+        :param look_ns: look time in nanoseconds.
+        :param look_id: id the look had while open, if any.
+        :return:
+        """
+        name = outcome_of(error)
+        with self.looks.lock:
+            outcome = self.failures.get(name)
+            if outcome is None:
+                outcome = self.failures[name] = Outcome(name)
+            outcome.add(look_ns / NS_PER_SECOND, look_id)
+
+    def fail_look(self, look_id, error: BaseException):
+        """
+        Closes an open look of a call that raised error, moving it out of the watch's looks into Watch.failures. A
+        GeneratorExit, from closing a generator early, just stops the look.
+        :param look_id:
+        :param error:
+        :return:
+        """
+        if outcome_of(error) == OK:
+            self.stop_look(look_id)
+            return
+        end_ns = self.clock.now()
+        start_ns = self.looks.discard(look_id)
+        self.add_failure(error, end_ns - start_ns, look_id)
+
+    def outcomes(self):
+        """
+        Returns the aggregates of the look times per outcome: "ok" for the calls that returned, i.e. the watch's
+        looks, and the name of the exception type for the calls that raised.
+        :return: dict of RunningStats
+        """
+        with self.looks.lock:
+            outcomes = {OK: self.looks.stats}
+            outcomes.update((name, outcome.stats.copy()) for name, outcome in self.failures.items())
+        return outcomes
+
+    def outcome_percentiles(self, qs=(50, 99)):
+        """
+        Returns the percentiles of the look times per outcome, see Watch.outcomes(). Outcomes without looks are left
+        out.
+        :param qs: percentiles in [0, 100]
+        :return: dict of list(float)
+        """
+        percentiles = {OK: self.percentiles(qs)} if self.looks.stats.count else {}
+        with self.looks.lock:
+            percentiles.update((name, outcome.sketch.percentiles(qs)) for name, outcome in self.failures.items())
+        return percentiles
+
+    def add_split(self, look_id, running: float, suspended: float):
+        """
+        Adds how long, in seconds, a closed look spent running and suspended to Watch.running and Watch.suspended.
+        :param look_id:
+        :param running:
+        :param suspended:
+        :return:
+        """
+        with self.looks.lock:
+            if self.running is None:
+                self.running, self.suspended = RunningStats(), RunningStats()
+            self.running.add(running, look_id)
+            self.suspended.add(suspended, look_id)
+
+    def snapshot(self, reset: bool = False):
+        """
+        Returns a compact, picklable copy of the watch's closed looks and aggregates, along with its failures.
+        :param reset: drop the closed looks, aggregates and failures once copied, so the next snapshot only holds newer
+            looks.
+        :return: WatchSnapshot
+        """
+        with self.looks.lock:
+            look_ids, start_ns, end_ns, stats, sketch = self.looks.export(reset)
+            running = None if self.running is None else self.running.copy()
+            suspended = None if self.suspended is None else self.suspended.copy()
+            failures = {name: outcome.copy() for name, outcome in self.failures.items()}
+            if reset:
+                self.running = self.suspended = None
+                self.failures = {}
+        return WatchSnapshot(
+            target=self.target,
+            look_ids=look_ids,
+            start_ns=start_ns,
+            end_ns=end_ns,
+            offset_ns=self.clock.epoch_ns - self.clock.anchor_ns,
+            stats=stats,
+            sketch=sketch,
+            running=running,
+            suspended=suspended,
+            failures=failures,
+        )
+
+    def merge(self, snapshot: WatchSnapshot):
+        """
+        Adds the closed looks, aggregates and failures of a snapshot, taken from a watch in this or another process, to
+        this watch. Merged looks get new ids and their clock readings are moved onto this watch's clock.
+        :param snapshot:
+        :return: self
+        """
+        import numpy as np
+        shift_ns = snapshot.offset_ns - (self.clock.epoch_ns - self.clock.anchor_ns)
+        start_ns = np.frombuffer(snapshot.start_ns, dtype=np.int64) + shift_ns
+        end_ns = np.frombuffer(snapshot.end_ns, dtype=np.int64) + shift_ns
+        with self.looks.lock:
+            self.looks.extend(snapshot.look_ids, start_ns, end_ns, snapshot.stats, snapshot.sketch)
+            if snapshot.running is not None:
+                if self.running is None:
+                    self.running, self.suspended = RunningStats(), RunningStats()
+                self.running.merge(snapshot.running)
+                self.suspended.merge(snapshot.suspended)
+            for name, outcome in snapshot.failures.items():
+                if name in self.failures:
+                    self.failures[name].merge(outcome)
+                else:
+                    self.failures[name] = outcome.copy()
+        return self
+
+    @property
+    def stats(self):
+        """
+        Running aggregates over the closed looks in the watch, updated as looks are stopped.
+        :return: RunningStats
+        """
+        return self.looks.stats
+
+    @property
+    def sampled(self):
+        """
+        property which indicates only a sample of the calls to the watched function is recorded as looks. Aggregates,
+        percentiles and outliers then describe the sample, while calls and throughput stay exact.
+        :return: boolean
+        """
+        return self.sampling is not None
+
+    @property
+    def calls(self):
+        """
+        Exact number of calls to the watched function, recorded or not, whether they returned or raised. Without
+        sampling, the number of closed looks plus the number of failures.
+        :return: int
+        """
+        if self.sampling is None:
+            return self.recorded
+        return self.sampling.counter.value
+
+    @property
+    def recorded(self):
+        """
+        Number of calls recorded, as closed looks or as failures.
+        :return: int
+        """
+        with self.looks.lock:
+            return self.looks.stats.count + sum(outcome.stats.count for outcome in self.failures.values())
+
+    @property
+    def sample_rate(self):
+        """
+        Fraction of the calls recorded, as looks or failures.
+        :return: float
+        """
+        calls = self.calls
+        return self.recorded / calls if calls else 1.0
+
+    @property
+    def estimated_total(self):
+        """
+        Total look time, in seconds, of every call, estimated by weighting the recorded looks by the sample rate.
+        :return: float
+        """
+        stats = self._closed_stats()
+        return stats.total / stats.count * self.calls
+
+    def throughput(self):
+        """
+        Calls per second since the watch started, until it stopped if it did.
+        :return: float
+        """
+        end_time = self.clock.timestamp() if self.end_time is None else self.end_time
+        return self.calls / (end_time - self.start_time)
+
+    def _closed_stats(self, required=1):
+        stats = self.looks.stats
+        if stats.count < required:
+            raise GlanceWatchEmptyError(self.target, required)
+        return stats
+
     @variants.primary
     def longest_look(self):
         """
         Returns the longest look time in the given watch instance.
         :return:
         """
-        _, look = max(self.looks.items(), key=lambda x: x[1].look_time())
-        return look.look_time()
+        return self._closed_stats().max
 
     @longest_look.variant("key")
     def longest_look(self):
@@ -178,8 +520,7 @@ class Watch:
         Returns the key of the longest look in the watch.
         :return: str Look.id
         """
-        key, _ = max(self.looks.items(), key=lambda x: x[1].look_time())
-        return key
+        return self._closed_stats().max_id
 
     @longest_look.variant("tuple")
     def longest_look(self):
@@ -187,8 +528,8 @@ class Watch:
         Returns both the key, and the look_time of the longest look in the watch as a tuple.
         :return: (key, look_time)
         """
-        key, look = max(self.looks.items(), key=lambda x: x[1].look_time())
-        return key, look.look_time()
+        stats = self._closed_stats()
+        return stats.max_id, stats.max
 
     @variants.primary
     def shortest_look(self):
@@ -196,8 +537,7 @@ class Watch:
         Returns shortest look time in the watch.
         :return:
         """
-        _, look = min(self.looks.items(), key=lambda x: x[1].look_time())
-        return look.look_time()
+        return self._closed_stats().min
 
     @shortest_look.variant("key")
     def shortest_look(self):
@@ -205,8 +545,7 @@ class Watch:
         Returns shortest look time's key in the watch.
         :return:
         """
-        key, _ = min(self.looks.items(), key=lambda x: x[1].look_time())
-        return key
+        return self._closed_stats().min_id
 
     @shortest_look.variant("tuple")
     def shortest_look(self):
@@ -214,102 +553,235 @@ class Watch:
         Returns both the key, and the look_time of the shortest look in the watch as a tuple.
         :return: (key, look_time)
         """
-        key, look = min(self.looks.items(), key=lambda x: x[1].look_time())
-        return key, look.look_time()
+        stats = self._closed_stats()
+        return stats.min_id, stats.min
 
     @property
-    def mean(self):  # TODO might need to convert to method and handle open looks.
+    def mean(self):
         """
-        Returns mean of the Looks in the watch.
+        Returns mean of the closed Looks in the watch.
         :return: float
         """
-        times = [look.look_time() for look in self.looks.values()]
-        return statistics.mean(times)
+        return self._closed_stats().mean
 
     @property
-    def std(self):  # TODO might need to convert to method and handle open looks.
+    def std(self):
+        """
+        Returns the standard deviation of the watch's closed Looks
+        :return: float
+        """
+        return self._closed_stats(2).std
+
+    def _window(self):
+        if self.window is None:
+            raise ValueError(f"The watch with target: {self.target} has no rolling window.")
+        self.looks.fold()
+        return self.window
+
+    def rolling(self, last: float = None):
+        """
+        Returns the aggregates of the looks that ended in the last seconds, from the watch's RollingWindow.
+        :param last: seconds covered, rounded up to whole buckets, defaults to the window's span.
+        :return: RunningStats
+        """
+        with self.looks.lock:
+            return self._window().stats(self.clock.now(), last)
+
+    def rolling_percentiles(self, qs, last: float = None):
+        """
+        Returns the estimated percentiles, each in [0, 100], of the looks that ended in the last seconds.
+        :param qs:
+        :param last: seconds covered, rounded up to whole buckets, defaults to the window's span.
+        :return: list(float)
+        """
+        with self.looks.lock:
+            sketch = self._window().sketch(self.clock.now(), last)
+        if not sketch.count:
+            raise GlanceWatchEmptyError(self.target)
+        return sketch.percentiles(qs)
+
+    def time_series(self, qs=(50, 99)):
+        """
+        Returns the rollup of every bucket of the watch's RollingWindow holding looks, oldest first, as records with
+        the bucket's start time in seconds since epoch, the count, mean and max look time, and the given percentiles.
+        :param qs: percentiles of every bucket, keyed "p<q>", needs a window with sketches.
+        :return: list(dict)
+        """
+        with self.looks.lock:
+            window = self._window()
+            series = window.series(self.clock.now())
+        records = []
+        for start_ns, stats, sketch in series:
+            record = {
+                "time": self.clock.to_timestamp(start_ns),
+                "count": stats.count,
+                "mean": stats.mean,
+                "max": stats.max,
+            }
+            if sketch is not None:
+                record.update((f"p{q:g}", value) for q, value in zip(qs, sketch.percentiles(qs)))
+            records.append(record)
+        return records
+
+    def plot_time_series(self, filename: str = None, interactive: bool = False, qs=(50, 99)):
+        """
+        Plots the mean, max and percentiles of the look times of every bucket of the rolling window over time.
+        :param filename:
+        :param interactive:
+        :param qs:
+        :return:
         """
-        Returns the standard deviation of the watch's Looks
+        if not filename:
+            filename = f"{self.target}-time-series.png"
+
+        records = self.time_series(qs)
+        times = [record["time"] - records[0]["time"] for record in records] if records else []
+        fig, ax = _figure(interactive)
+        fig.suptitle(f'{self.target} Look times over time', fontsize=20)
+        for key in ["mean", "max"] + [f"p{q:g}" for q in qs]:
+            if records and key in records[0]:
+                ax.plot(times, [record[key] for record in records], label=key)
+        ax.set_xlabel("seconds")
+        ax.legend()
+        fig.tight_layout()
+        fig.savefig(filename)
+
+    def percentile(self, q: float):
+        """
+        Returns the q-th percentile, q in [0, 100], of the closed look times. Estimated from the watch's sketch if it
+        has one, otherwise computed exactly from the stored looks.
+        :param q:
         :return: float
         """
-        times = [look.look_time() for look in self.looks.values()]
-        return statistics.stdev(times)
+        return self.percentiles([q])[0]
+
+    def percentiles(self, qs):
+        """
+        Returns the percentiles of the closed look times for every q in qs, each in [0, 100].
+        :param qs:
+        :return: list(float)
+        """
+        with self.looks.lock:
+            self._closed_stats()
+            if self.sketch is not None:
+                return self.sketch.percentiles(qs)
+        times = self.looks.times()
+        if not len(times):
+            raise GlanceWatchEmptyError(self.target)
+        import numpy as np
+        return np.percentile(times, qs).tolist()
+
+    def _outlier_indices(self, n_std=2, method="zscore", **options):
+        """
+        Returns the ids of the outliers among the closed looks of the watch, as plain Python values whatever the
+        storage, with the look times of the watch and the indices of the outliers among them.
+        :param n_std: threshold of the "zscore" method.
+        :param method: name of a method in glance.outliers.METHODS.
+        :param options: keyword arguments of the method.
+        :return: (list, times, indices)
+        """
+        if method == "zscore":
+            stats = self._closed_stats(2)
+            options = dict(n_std=n_std, mean=stats.mean, std=stats.std, **options)
+        import numpy as np
+        from glance.outliers import outlier_mask
+        ids, times = self.looks.columns()
+        indices = np.flatnonzero(outlier_mask(times, method, **options))
+        if isinstance(ids, np.ndarray):  # Memory mapped ids of a recording.
+            return ids[indices].tolist(), times, indices
+        return [ids[i] for i in indices], times, indices
 
     @variants.primary
-    def find_outliers(self, n_std=2):  # TODO might need to convert to method and handle open looks.
+    def find_outliers(self, n_std=2, method="zscore", **options):
         """
-        Finds outliers in the given watch's Looks as a list of tuples [(id, time)]
-        Outlier = 2 * standard deviation
+        Finds outliers in the given watch's closed Looks as a list of tuples [(id, time)]
+        Outlier = further than n_std standard deviations from the mean, unless another method from
+        glance.outliers.METHODS ("mad", "iqr", "percentile") is given along with its options.
         :return: list(tuple)
         """
-        outliers = list()
-        for look in self.looks.values():
-            if look.look_time() > n_std * self.std:
-                outliers.append((look.id, look.look_time()))
-        return outliers
+        ids, times, indices = self._outlier_indices(n_std, method, **options)
+        return list(zip(ids, times[indices].tolist()))
+
+    @find_outliers.variant("ids")
+    def find_outliers(self, n_std=2, method="zscore", **options):
+        """
+        Finds outliers in the given watch's closed Looks as a list of look ids.
+        :return: list()
+        """
+        ids, _, _ = self._outlier_indices(n_std, method, **options)
+        return ids
+
+    @find_outliers.variant("times")
+    def find_outliers(self, n_std=2, method="zscore", **options):
+        """
+        Finds outliers in the given watch's closed Looks as an array of look times.
+        :return: np.ndarray
+        """
+        _, times, indices = self._outlier_indices(n_std, method, **options)
+        return times[indices]
 
     @find_outliers.variant("looks")
-    def find_outliers(self, n_std=2):  # TODO might need to convert to method and handle open looks.
+    def find_outliers(self, n_std=2, method="zscore", **options):
         """
-        Finds outliers in the given watch's Looks as a list of looks [Look]
-        Outlier = 2 * standard deviation
+        Finds outliers in the given watch's closed Looks as a list of looks [Look]
         :return: list()
         """
-        outliers = list()
-        for look in self.looks.values():
-            if look.look_time() > n_std * self.std:
-                outliers.append(look)
-        return outliers
+        ids, _, _ = self._outlier_indices(n_std, method, **options)
+        return [self.looks[look_id] for look_id in ids]
 
     @variants.primary
-    def find_weak_outliers(self):  # TODO might need to convert to method and handle open looks.
+    def find_weak_outliers(self):
         """
         Finds "weak" outliers in the given watch's Looks as a list of tuples [(id, time)]
-        Weak_Outlier > standard deviation
+        Weak_Outlier = further than one standard deviation from the mean.
         :return: list(tuple)
         """
-        outliers = list()
-        for look in self.looks.values():
-            if look.look_time() > self.std:
-                outliers.append((look.id, look.look_time()))
-        return outliers
+        return self.find_outliers(n_std=1)
+
+    @find_weak_outliers.variant("ids")
+    def find_weak_outliers(self):
+        """
+        Finds "weak" outliers in the given watch's Looks as a list of look ids.
+        :return: list()
+        """
+        return self.find_outliers.ids(n_std=1)
+
+    @find_weak_outliers.variant("times")
+    def find_weak_outliers(self):
+        """
+        Finds "weak" outliers in the given watch's Looks as an array of look times.
+        :return: np.ndarray
+        """
+        return self.find_outliers.times(n_std=1)
 
     @find_weak_outliers.variant("looks")
-    def find_weak_outliers(self):  # TODO might need to convert to method and handle open looks.
+    def find_weak_outliers(self):
         """
         Finds "weak" outliers in the given watch's Looks as a list of looks [Look]
-        Weak_Outlier > standard deviation
+        Weak_Outlier = further than one standard deviation from the mean.
         :return: list()
         """
-        outliers = list()
-        for look in self.looks.values():
-            if look.look_time() > self.std:
-                outliers.append(look)
-        return outliers
+        return self.find_outliers.looks(n_std=1)
 
     def _plot_data(self):
-        data = np.array([look.look_time() for look in self.looks.values()])
-        return data
+        return self.looks.times()
 
-    def plot(self, filename: str = None, interactive: bool = False):
+    def plot(self, filename: str = None, interactive: bool = False, views=("histogram",), background: str = None,
+             **options):
         """
-        Plots a histogram of Look data for given Watch
+        Plots a histogram of Look data for given Watch, in log spaced bins read from the watch's Histogram if it keeps
+        one, or computed in one pass over the look times. See glance.plotting for the other views and options.
         :param filename:
         :param interactive:
-        :return:
+        :param views: names from glance.plotting.VIEWS, one subplot each.
+        :param background: "thread" or "process" to render without blocking, see glance.plotting.plot().
+        :return: filename, or a Future of it when rendering in the background.
         """
-        if not interactive:
-            plt.ioff()  # Turn off interactive mode
-
+        from glance.plotting import plot
         if not filename:
             filename = f"{self.target}.png"
 
-        data = self._plot_data()
-        fig, ax = plt.subplots()
-        fig.suptitle(f'{self.target} Look times', fontsize=20)
-        ax.hist(data)
-        plt.tight_layout()
-        plt.savefig(filename)
+        return plot([self], filename, views, f'{self.target} Look times', interactive, background, **options)
 
 
 @attr.s
@@ -317,9 +789,25 @@ class Glance:
     """
     Class that contains everything being watched, and all of their looks.
     """
-    start_time = attr.ib(type=float, default=time.time())
+    start_time = attr.ib(type=float, default=None)
     end_time = attr.ib(type=float, default=None)
     watches = attr.ib(type={}, factory=dict)  #: Dictionary of watches in this glance.
+    storage = attr.ib(type=str, default="columnar")  #: Storage backend used for new watches, "columnar" or "dict".
+    retention = attr.ib(default=None)  #: Retention policy used for new watches, None keeps all looks.
+    sketches = attr.ib(type=bool, default=False)  #: Whether new watches keep a QuantileSketch of their look times.
+    histograms = attr.ib(type=bool, default=False)  #: Whether new watches keep a Histogram of their look times.
+    clock = attr.ib(type=Clock, default=DEFAULT_CLOCK, repr=False, eq=False)  #: Clock timing every watch.
+    sampling = attr.ib(default=None)  #: Sampling policy copied into every new watch, see glance.sampling.
+    window = attr.ib(default=None)  #: RollingWindow copied into every new watch, see glance.window.
+    threadsafe = attr.ib(type=bool, default=True)  #: Whether decorated functions may be called from several threads.
+    exporters = attr.ib(type=list, factory=list, init=False, repr=False, eq=False)  #: See Glance.add_sink().
+    #: Root of the spans' call tree, see Glance.span().
+    call_tree = attr.ib(factory=lambda: SpanNode(""), init=False, repr=False, eq=False)
+    _lock = attr.ib(factory=threading.RLock, init=False, repr=False, eq=False)  #: Held while watches are added.
+
+    def __attrs_post_init__(self):
+        if self.start_time is None:
+            self.start_time = self.clock.timestamp()
 
     def end(self):
         """
@@ -332,7 +820,10 @@ class Glance:
             for watch in self.watches.values():
                 if not watch.is_done:
                     watch.stop()
-            self.end_time = time.time()
+            self.end_time = self.clock.timestamp()
+            self.flush()
+            for exporter in self.exporters:
+                exporter.close()
 
     def start_watch(self, target_name: str):
         """
@@ -340,9 +831,48 @@ class Glance:
         :param target_name:
         :return:
         """
-        if target_name in self.watches.keys():
-            raise GlanceWatchExistsError()
-        self.watches[target_name] = Watch(target=target_name)
+        with self._lock:
+            if target_name in self.watches.keys():
+                raise GlanceWatchExistsError(target_name)
+            self.watches[target_name] = self._new_watch(target_name)
+
+    def _new_watch(self, target_name: str, expected_args=None, storage: str = None):
+        """
+        Creates a Watch configured with this glance's storage, retention, sketch and clock settings.
+        :param target_name:
+        :param expected_args:
+        :param storage: overrides Glance.storage.
+        :return: Watch
+        """
+        watch = Watch(
+            target=target_name,
+            expected_args=expected_args,
+            storage=storage or self.storage,
+            retention=self.retention,
+            sketch=self.sketches,
+            histogram=self.histograms,
+            clock=self.clock,
+            sampling=None if self.sampling is None else attr.evolve(self.sampling),
+            window=None if self.window is None else attr.evolve(self.window),
+        )
+        watch.looks.sinks.extend(exporter.submit for exporter in self.exporters)
+        return watch
+
+    def _get_watch(self, target_name: str, expected_args=None, storage: str = None):
+        """
+        Returns the watch with the given target, creating it if needed.
+        :param target_name:
+        :param expected_args: used if the watch is created.
+        :param storage: used if the watch is created.
+        :return: Watch
+        """
+        watch = self.watches.get(target_name)
+        if watch is None:
+            with self._lock:
+                watch = self.watches.get(target_name)
+                if watch is None:
+                    watch = self.watches[target_name] = self._new_watch(target_name, expected_args, storage)
+        return watch
 
     def stop_watch(self, target_name: str):
         """
@@ -359,53 +889,400 @@ class Glance:
         else:
             raise GlanceWatchNotFoundError(target_name)
 
-    def watch(self, func):
+    def watch(self, func=None, *, capture_args: bool = False, loop_metrics: bool = False, sampling=None, key=None,
+              channels=None):
         """
-        Decorator to place a watch on a given function. Starts a new watch on that object in glance. and creates a new
-        look at every call.
+        Decorator to place a watch on a given function. The watch is looked up, or created, by function name once at
+        decoration time, and a new look is recorded at every call. Use as @gl.watch or @gl.watch(capture_args=True).
+
+        Coroutine functions are timed until the coroutine returns, async generator and generator functions until the
+        generator they return is exhausted or closed. Their open look, like the one of a capture_args call, is the
+        current look, see glance.active.current_look(), while their body runs. With loop_metrics, the time each of
+        these looks spent running its body and suspended, awaiting or waiting on a consumer, is added to Watch.running
+        and Watch.suspended, telling slow I/O apart from CPU bound work.
+
+        With a sampling policy, from the watch or the Glance, only the calls it picks are recorded, the others just
+        count the call and go straight to the function.
+
+        On columnar watches the wrapper only reads the clock twice and appends both readings to a pending list, which
+        gets sequential look ids when it is drained into the watch. With Glance.threadsafe, the default, every thread
+        appends to its own pending list, so concurrent calls never contend on a lock outside of the periodic drains;
+        otherwise a single list shared by all callers is used, which is slightly faster but only safe from one thread.
+        Arguments are only kept when capture_args is set, in which case the watch stores Look objects and each
+        call's arguments go to Look.given_args. A watch that already exists with another storage raises ValueError.
+
+        With a key function, such as glance.buckets.size(), it is called with the arguments of every recorded call,
+        bound to func's signature with defaults applied, and the look time is also added to the bucket of the key it
+        returns in Watch.buckets, telling how latency depends on the input without keeping the arguments. A key
+        function that raises never fails the call, its look time goes to Buckets.overflow.
+
+        Channels, such as "cpu" or "allocations" from glance.channels.CHANNELS, measure more than the wall clock look
+        time of every call of a synchronous function, each into its own Watch.channels entry. Such calls take the
+        slower path through ActiveLook, the other watches are not affected.
+
+        Calls run in a span, see Glance.span(), record the span's look as their parent, see Look.parent, and are added
+        to the call tree below it. On columnar watches they also take the path through ActiveLook, calls outside spans
+        only pay for checking the current span.
+
+        When recording is switched off, globally or for the watch, see glance.switch, func is returned as is. Switched
+        off later, wrappers only check Watch.switch before calling func.
         :param func:
+        :param capture_args: keep the arguments of every call, which needs a watch with "dict" storage.
+        :param loop_metrics: split the look times of coroutines and generators into running and suspended time.
+        :param sampling: sampling policy of the watch, overrides the Glance's one.
+        :param key: function of the call's arguments returning its bucket, or a glance.buckets.Buckets.
+        :param channels: names or glance.channels.Channel instances to measure every call with.
         :return:
         """
+        if func is None:
+            return functools.partial(
+                self.watch, capture_args=capture_args, loop_metrics=loop_metrics, sampling=sampling, key=key,
+                channels=channels,
+            )
 
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            if func.__name__ not in self.watches.keys():
-                self.watches[func.__name__] = Watch(target=func.__name__)
-                self.watches[func.__name__].expected_args = inspect.signature(func)
-
-            look = self.watches[func.__name__].start_look()
+        if not is_enabled():
+            return func
+        watch = self._get_watch(
+            func.__name__,
+            expected_args=inspect.signature(func),
+            storage="dict" if capture_args else self.storage,
+        )
+        if not watch.switch.on:
+            return func
+        if capture_args and not isinstance(watch.looks, DictLooks):
+            raise ValueError(f"Watch {watch.target} does not store Look objects, its arguments could not be captured.")
+        if sampling is not None:
+            watch.sampling = sampling
+        if key is not None:
+            watch.buckets = (key if isinstance(key, Buckets) else Buckets(key)).bind(inspect.signature(func))
+        if channels:
+            if not _is_sync(func):
+                raise ValueError("Channels only measure synchronous functions.")
+            from glance.channels import channel_of
+            for channel in map(channel_of, channels):
+                watch.channels.setdefault(channel.name, channel).attach()
+        looks = watch.looks
+        now = watch.clock.now
+        add_failure = watch.add_failure
+        switch = watch.switch
+        sample = None if watch.sampling is None else watch.sampling.sampler()
+        call_tree = self.call_tree
+        span_of = _current_span.get
 
-            func_output = func(*args, **kwargs)
-            watch = self.watches[func.__name__]
-            watch.stop_look(look)
-            current_look = watch.looks[look]
-            current_look.given_args = {
+        def looked(args, kwargs):
+            given_args = {
                 "args": args,
                 "kwargs": kwargs,
-            }
-
+            } if capture_args else None
+            active = ActiveLook(
+                watch, given_args=given_args, bucket=bucket_of(watch, args, kwargs), call_tree=call_tree,
+            )
+            try:
+                with active:
+                    func_output = func(*args, **kwargs)
+            except BaseException as error:
+                active.fail(error)
+                raise
+            active.stop()
             return func_output
 
+        if inspect.iscoroutinefunction(func):
+            wrapper = watch_coroutine(watch, func, capture_args, loop_metrics, sample, call_tree)
+
+        elif inspect.isasyncgenfunction(func):
+            wrapper = watch_async_generator(watch, func, capture_args, loop_metrics, sample, call_tree)
+
+        elif inspect.isgeneratorfunction(func):
+            wrapper = watch_generator(watch, func, capture_args, loop_metrics, sample, call_tree)
+
+        elif watch.channels:
+            measured = list(watch.channels.values())
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not switch.on or sample is not None and not sample():
+                    return func(*args, **kwargs)
+                given_args = {
+                    "args": args,
+                    "kwargs": kwargs,
+                } if capture_args else None
+                active = ActiveLook(
+                    watch, given_args=given_args, bucket=bucket_of(watch, args, kwargs), call_tree=call_tree,
+                )
+                readings = [channel.start() for channel in measured]
+                try:
+                    with active:
+                        func_output = func(*args, **kwargs)
+                except BaseException as error:
+                    active.fail(error)
+                    raise
+                values = [channel.stop(reading) for channel, reading in zip(measured, readings)]
+                active.stop()
+                for channel, value in zip(measured, values):
+                    channel.add(active.look_id, value)
+                return func_output
+
+        elif capture_args or not isinstance(looks, ColumnarLooks):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not switch.on or sample is not None and not sample():
+                    return func(*args, **kwargs)
+                return looked(args, kwargs)
+
+        elif watch.buckets is not None:
+            buffer, drain_at, drain = looks.thread_fast_path()
+            key_of, add = watch.buckets.key_of, watch.buckets.add
+            enter, fail = looks.entered.tick, looks.failed.tick
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not switch.on or sample is not None and not sample():
+                    return func(*args, **kwargs)
+                if span_of() is not None:
+                    return looked(args, kwargs)
+                bucket = key_of(args, kwargs)
+                enter()
+                start_ns = now()
+                try:
+                    func_output = func(*args, **kwargs)
+                except BaseException as error:
+                    fail()
+                    add_failure(error, now() - start_ns)
+                    raise
+                end_ns = now()
+                pending = buffer.pending
+                pending.append(start_ns)
+                pending.append(end_ns)
+                if len(pending) >= drain_at:
+                    drain(pending)
+                add(bucket, end_ns - start_ns)
+                return func_output
+
+        elif self.threadsafe:
+            buffer, drain_at, drain = looks.thread_fast_path()
+            enter, fail = looks.entered.tick, looks.failed.tick
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not switch.on or sample is not None and not sample():
+                    return func(*args, **kwargs)
+                if span_of() is not None:
+                    return looked(args, kwargs)
+                enter()
+                start_ns = now()
+                try:
+                    func_output = func(*args, **kwargs)
+                except BaseException as error:
+                    fail()
+                    add_failure(error, now() - start_ns)
+                    raise
+                end_ns = now()
+                pending = buffer.pending
+                pending.append(start_ns)
+                pending.append(end_ns)
+                if len(pending) >= drain_at:
+                    drain(pending)
+                return func_output
+
+        else:
+            pending, drain_at, drain = looks.fast_path()
+            pending_append = pending.append
+            enter, fail = looks.entered.tick, looks.failed.tick
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not switch.on or sample is not None and not sample():
+                    return func(*args, **kwargs)
+                if span_of() is not None:
+                    return looked(args, kwargs)
+                enter()
+                start_ns = now()
+                try:
+                    func_output = func(*args, **kwargs)
+                except BaseException as error:
+                    fail()
+                    add_failure(error, now() - start_ns)
+                    raise
+                pending_append(start_ns)
+                pending_append(now())
+                if len(pending) >= drain_at:
+                    drain(pending)
+                return func_output
+
         return wrapper
 
-    def plot(self, filename: str = None, interactive: bool = False):
+    def snapshot(self, reset: bool = False):
+        """
+        Returns a compact, picklable copy of the closed looks and aggregates of every watch, to send to another
+        process and merge there with Glance.merge().
+        :param reset: drop the copied looks and aggregates from the watches, so the next snapshot only has newer looks.
+        :return: GlanceSnapshot
         """
+        with self._lock:
+            watches = list(self.watches.values())
+        return GlanceSnapshot(
+            start_time=self.start_time,
+            end_time=self.end_time,
+            watches={watch.target: watch.snapshot(reset) for watch in watches},
+        )
 
-        :param filename:
+    def merge(self, *others):
+        """
+        Adds the looks and aggregates of other glances, or of their snapshots, to this glance, watch by watch. Watches
+        missing from this glance are created. Stats, outliers, percentiles and plots then cover the combined looks.
+        :param others: Glance or GlanceSnapshot instances.
+        :return: self
+        """
+        for other in others:
+            if isinstance(other, Glance):
+                other = other.snapshot()
+            for target, snapshot in other.watches.items():
+                with self._lock:
+                    watch = self.watches.get(target)
+                    if watch is None:
+                        watch = self.watches[target] = self._new_watch(target)
+                watch.merge(snapshot)
+            if other.start_time is not None:
+                self.start_time = min(self.start_time, other.start_time)
+        return self
+
+    def save(self, path):
+        """
+        Writes the closed looks and aggregates of every watch to a columnar binary recording, see glance.recording.
+        :param path:
+        :return:
+        """
+        from glance.recording import save
+        save(self, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a recording written by Glance.save(). The file is memory mapped and its watches are read only, their
+        stats, percentiles, outliers and plots running over the mapped columns.
+        :param path:
+        :return: Glance
+        """
+        from glance.recording import load
+        return load(path)
+
+    def compare(self, baseline, threshold: float = 0.1, alpha: float = 0.05, **options):
+        """
+        Compares this Glance's watches with those of baseline, flagging the ones that got significantly slower, see
+        glance.compare.compare().
+        :param baseline: Glance, or path of a recording written by Glance.save().
+        :param threshold: relative slowdown tolerated, 0.1 being 10%.
+        :param alpha: significance level of the Mann-Whitney U test.
+        :return: glance.compare.Comparison
+        """
+        from glance.compare import compare
+        return compare(baseline, self, threshold, alpha, **options)
+
+    def summary(self, qs=(50, 90, 99), sort: str = "total"):
+        """
+        Returns a table of every watch's count, total, share of the total, mean, percentiles, max and throughput, read
+        from running aggregates. format() renders it as text, records() as dicts.
+        :param qs: percentiles in [0, 100], one column each.
+        :param sort: column to sort by, largest first, or None to keep the watches' order.
+        :return: glance.summary.Summary
+        """
+        from glance.summary import summary
+        with self._lock:
+            watches = list(self.watches.values())
+        table = summary(watches, qs)
+        return table.sort(sort) if sort is not None else table
+
+    def top_k(self, metric: str = "total", k: int = 10, largest: bool = True):
+        """
+        Returns the summary of the k watches with the largest, or smallest, metric, such as "total", "mean" or "p99".
+        :param metric: a column of glance.summary.BASE_COLUMNS, or "p<q>".
+        :param k:
+        :param largest:
+        :return: glance.summary.Summary
+        """
+        from glance.summary import top_k
+        with self._lock:
+            watches = list(self.watches.values())
+        return top_k(watches, metric, k, largest)
+
+    def serve(self, port: int = 0, host: str = "127.0.0.1"):
+        """
+        Serves live metrics of every watch over HTTP from a background thread: look counts, sums, histogram buckets,
+        calls and in-flight looks, in Prometheus text format at /metrics and as JSON at /metrics.json. Turns on
+        histograms for every current and future watch. Scrapes only read running aggregates.
+        :param port: 0 picks a free port, see MetricsServer.port.
+        :param host: interface to bind, localhost by default.
+        :return: MetricsServer, close() it to stop serving.
+        """
+        from glance.server import MetricsServer
+        with self._lock:
+            self.histograms = True
+            for watch in self.watches.values():
+                if not isinstance(watch.looks, MappedLooks):
+                    watch.enable_histogram()
+        return MetricsServer(self, host, port)
+
+    def span(self, name=None):
+        """
+        Times a block, or every call of a function, as a look of the watch with the given name, nested under the span
+        open around it. Use as `with gl.span("name"):`, `async with gl.span("name"):`, `@gl.span("name")` or
+        `@gl.span`, which is named after the function.
+
+        Nested spans form the Glance's call tree, Glance.call_tree, aggregating the calls, inclusive time and exclusive
+        time, i.e. without nested spans, of every path of span names.
+        :param name: name of the span, or the function to decorate.
+        :return: Span
+        """
+        if callable(name):
+            return Span(self, name.__name__)(name)
+        return Span(self, name)
+
+    def add_sink(self, sink, max_batches: int = 1024, policy: str = "drop", flush_interval: float = 1.0):
+        """
+        Streams the closed looks of every watch, current and future, to sink from a background writer thread. Looks
+        are handed over in batches through a bounded queue, so recording never waits on the sink's I/O, unless
+        policy is "block". Combine with retention=StatsOnly() to ship looks off-process instead of keeping them.
+        Glance.end() writes the remaining looks and closes the sink.
+        :param sink: object with write(batch) and close() methods, such as the writers in glance.sinks.
+        :param max_batches: capacity of the queue.
+        :param policy: "drop" batches when the queue is full, or "block" until there is room.
+        :param flush_interval: seconds between flushes of the looks buffered by watches into the queue.
+        :return: Exporter
+        """
+        from glance.sinks import Exporter
+        exporter = Exporter(sink, max_batches, policy, flush_interval, on_flush=self.flush)
+        with self._lock:
+            self.exporters.append(exporter)
+            for watch in self.watches.values():
+                if hasattr(watch.looks, "sinks"):
+                    watch.looks.sinks.append(exporter.submit)
+        return exporter
+
+    def flush(self):
+        """
+        Drains the looks buffered by decorated functions, in every thread, into their watches and folds them into the
+        watches' aggregates. Reads of a watch do this on their own, flushing is only needed to bound the buffered looks.
         :return:
         """
+        for watch in list(self.watches.values()):
+            if isinstance(watch.looks, ColumnarLooks):
+                watch.looks.fold()
+
+    def plot(self, filename: str = None, interactive: bool = False, views=None, background: str = None, **options):
+        """
+        Plots every watch on its own row: a log binned histogram, the cumulative distribution with percentile lines,
+        and percentiles of the look times over time, each pre-aggregated so millions of looks plot in about a second.
+        :param filename:
+        :param interactive:
+        :param views: names from glance.plotting.VIEWS, one column each, all of them by default.
+        :param background: "thread" or "process" to render without blocking, see glance.plotting.plot().
+        :param options: per_decade, time_bins and qs, see glance.plotting.plot_data().
+        :return: filename, or a Future of it when rendering in the background.
+        """
+        from glance.plotting import plot, VIEWS
         if not filename:
             filename = f"glance-{round(time.time())}.png"
 
-        if not interactive:
-            plt.ioff()
-
-        data = {}
-        for watch in self.watches.values():
-            data[watch.target] = watch._plot_data()
-        fig, ax = plt.subplots()
-        fig.suptitle(f'Glance Watches', fontsize=20)
-        for key in data.keys():
-            ax.hist(data[key], label=key)
-        plt.tight_layout()
-        plt.savefig(filename)
+        with self._lock:
+            watches = list(self.watches.values())
+        return plot(watches, filename, views or VIEWS, 'Glance Watches', interactive, background, **options)
@@ -0,0 +1,96 @@
+"""
+Fixed bucket histograms of look times, as served to Prometheus, see Glance.serve().
+
+A Histogram counts look times in buckets bounded by DEFAULT_BOUNDS or given upper bounds. Histograms with the same
+bounds merge by adding counts.
+"""
+import bisect
+import attr
+
+DEFAULT_BOUNDS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  #: Upper bounds, in seconds, of the default histogram buckets.
+
+
+@attr.s
+class Histogram:
+    """
+    Fixed bucket histogram of look times, as exposed to Prometheus. counts[i] is the number of values in
+    (bounds[i - 1], bounds[i]], and the last count the number of values above every bound.
+    """
+    bounds = attr.ib(type=tuple, default=DEFAULT_BOUNDS, converter=tuple)  #: Sorted upper bounds of the buckets.
+    counts = attr.ib(type=list, default=None)  #: Count of values per bucket, one more than bounds.
+    total = attr.ib(type=float, default=0.0)  #: Sum of the counted values.
+
+    def __attrs_post_init__(self):
+        if self.counts is None:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def add(self, value, look_id=None):
+        """
+        Counts a single value in its bucket.
+        :param value:
+        :param look_id: unused, accepted so the histogram can be fed like RunningStats.
+        :return:
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def add_many(self, values):
+        """
+        Counts an array of values in their buckets in one vectorized pass.
+        :param values: np.ndarray
+        :return:
+        """
+        import numpy as np
+        if not len(values):
+            return
+        counts = np.bincount(np.searchsorted(self.bounds, values, side="left"), minlength=len(self.counts))
+        self.counts = [count + new for count, new in zip(self.counts, counts.tolist())]
+        self.total += float(np.sum(values))
+
+    def merge(self, other: 'Histogram'):
+        """
+        Adds the counts of other, which must have the same bounds, to this histogram.
+        :param other:
+        :return: self
+        """
+        if other.bounds != self.bounds:
+            raise ValueError("Only histograms with the same bounds can be merged.")
+        self.counts = [count + new for count, new in zip(self.counts, other.counts)]
+        self.total += other.total
+        return self
+
+    def reset(self):
+        """
+        Drops every counted value.
+        :return:
+        """
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+
+    def copy(self):
+        """
+        Returns an independent copy of the histogram.
+        :return: Histogram
+        """
+        return Histogram(self.bounds, list(self.counts), self.total)
+
+    @property
+    def count(self):
+        """
+        Number of counted values.
+        :return: int
+        """
+        return sum(self.counts)
+
+    def cumulative(self):
+        """
+        Returns (upper bound, count of values at or below it) for every bucket, the last bound being infinity.
+        :return: list(tuple)
+        """
+        buckets, total = [], 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
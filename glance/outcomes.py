@@ -0,0 +1,60 @@
+"""
+Outcomes of watched calls, splitting look times by how calls ended, see Watch.failures.
+
+Calls that return are looks of their watch. The looks of calls that raise go to an Outcome named after the exception
+type, which keeps their aggregates and sketch, so errors never skew the latency of successful calls.
+"""
+import attr
+from glance.sketch import QuantileSketch
+from glance.stats import RunningStats
+
+OK = "ok"  #: Outcome of the looks of calls that returned, kept in the watch's looks.
+
+
+def outcome_of(error: BaseException = None):
+    """
+    Returns the outcome of a call: OK if it returned, or was a generator closed early, else the name of the type of the
+    exception it raised.
+    :param error:
+    :return: str
+    """
+    if error is None or isinstance(error, GeneratorExit):
+        return OK
+    return type(error).__name__
+
+
+@attr.s
+class Outcome:
+    """
+    Aggregates and distribution of the look times of the calls of a watch that raised the same type of exception.
+    """
+    name = attr.ib(type=str)  #: Name of the exception type.
+    stats = attr.ib(type=RunningStats, factory=RunningStats)  #: Aggregates of the look times.
+    sketch = attr.ib(type=QuantileSketch, factory=QuantileSketch)  #: Distribution of the look times.
+
+    def add(self, value: float, look_id=None):
+        """
+        Adds the look time of a call.
+        :param value: seconds.
+        :param look_id: id the look had while open, if any.
+        :return:
+        """
+        self.stats.add(value, look_id)
+        self.sketch.add(value)
+
+    def copy(self):
+        """
+        Returns an independent copy of the outcome.
+        :return: Outcome
+        """
+        return Outcome(self.name, self.stats.copy(), self.sketch.copy())
+
+    def merge(self, other: 'Outcome'):
+        """
+        Adds the look times of another outcome of the same exception type.
+        :param other:
+        :return: self
+        """
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+        return self
@@ -0,0 +1,85 @@
+"""
+Vectorized outlier detection over look times, see Watch.find_outliers().
+
+Every method in METHODS maps a numpy array of look times to a boolean mask of its outliers in one pass: zscore around
+the mean, mad around the median, iqr outside the interquartile fences and percentile above a given percentile.
+"""
+import numpy as np
+
+
+def zscore(times, n_std=2, mean=None, std=None):
+    """
+    Outlier = further than n_std standard deviations from the mean.
+    :param times: np.ndarray of look times.
+    :param n_std:
+    :param mean: precomputed mean, computed from times if not given.
+    :param std: precomputed sample standard deviation, computed from times if not given.
+    :return: np.ndarray of bool
+    """
+    if mean is None:
+        mean = times.mean()
+    if std is None:
+        std = times.std(ddof=1)
+    return np.abs(times - mean) > n_std * std
+
+
+def mad(times, threshold=3.5):
+    """
+    Outlier = modified z-score, based on the median absolute deviation, above threshold.
+    :param times: np.ndarray of look times.
+    :param threshold:
+    :return: np.ndarray of bool
+    """
+    median = np.median(times)
+    deviation = np.abs(times - median)
+    mad_value = np.median(deviation)
+    if mad_value == 0:
+        return deviation > 0
+    return 0.6745 * deviation / mad_value > threshold
+
+
+def iqr(times, k=1.5):
+    """
+    Outlier = outside of [Q1 - k * IQR, Q3 + k * IQR].
+    :param times: np.ndarray of look times.
+    :param k:
+    :return: np.ndarray of bool
+    """
+    q1, q3 = np.percentile(times, [25, 75])
+    spread = k * (q3 - q1)
+    return (times < q1 - spread) | (times > q3 + spread)
+
+
+def percentile(times, q=99):
+    """
+    Outlier = above the q-th percentile.
+    :param times: np.ndarray of look times.
+    :param q:
+    :return: np.ndarray of bool
+    """
+    return times > np.percentile(times, q)
+
+
+METHODS = {
+    "zscore": zscore,
+    "mad": mad,
+    "iqr": iqr,
+    "percentile": percentile,
+}  #: Outlier methods by name, usable as Watch.find_outliers(method=...).
+
+
+def outlier_mask(times, method="zscore", **options):
+    """
+    Returns the outlier mask of times for the given method name.
+    :param times: np.ndarray of look times.
+    :param method: one of METHODS.
+    :param options: keyword arguments of the method.
+    :return: np.ndarray of bool
+    """
+    try:
+        find = METHODS[method]
+    except KeyError:
+        raise ValueError(f"Unknown outlier method: {method}. Expected one of {sorted(METHODS)}")
+    if not len(times):
+        return np.zeros(0, dtype=bool)
+    return find(times, **options)
@@ -0,0 +1,238 @@
+"""
+Plots of look times that scale to millions of looks, see Watch.plot() and Glance.plot().
+
+Look times are reduced to a few hundred numbers per watch before anything is drawn: counts in log spaced bins, read
+from the watch's Histogram when it keeps one or otherwise computed in one vectorized pass, the cumulative distribution
+of those bins, and percentiles of the look times per time bin, computed with a single sort. Figures have one row per
+watch and one column per view, and are drawn on the headless Agg canvas, optionally in a background thread or process
+so the instrumented application is never blocked on matplotlib.
+"""
+import threading
+import attr
+from glance.clock import NS_PER_SECOND
+
+VIEWS = ("histogram", "cdf", "time")  #: Views Glance.plot() draws for every watch, one column each.
+
+
+def log_bounds(low: float, high: float, per_decade: int = 10):
+    """
+    Returns log spaced bin edges, per_decade per power of ten, from low up to at least high.
+    :param low: positive lower edge.
+    :param high: value the last edge must reach.
+    :param per_decade:
+    :return: np.ndarray
+    """
+    import numpy as np
+    start, stop = np.log10(low), np.log10(max(high, low))
+    bins = max(1, int(np.ceil((stop - start) * per_decade)))
+    return np.logspace(start, start + bins / per_decade, bins + 1)
+
+
+@attr.s
+class PlotData:
+    """
+    Pre-aggregated look times of one watch, all a plot needs. Small and picklable, so it can be rendered elsewhere.
+    """
+    target = attr.ib(type=str)
+    edges = attr.ib()  #: np.ndarray of the bin edges, in seconds, one more than counts.
+    counts = attr.ib()  #: np.ndarray of look counts per bin.
+    qs = attr.ib(type=tuple, default=(50, 90, 99))  #: Percentiles drawn.
+    times = attr.ib(default=None)  #: np.ndarray of the middle of every time bin, in seconds since the first look ended.
+    time_percentiles = attr.ib(type=dict, factory=dict)  #: q: np.ndarray of the q-th percentile of every time bin.
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def cdf(self):
+        """
+        Returns the fraction of looks at or below each bin edge.
+        :return: np.ndarray
+        """
+        import numpy as np
+        cumulative = np.concatenate(([0], np.cumsum(self.counts)))
+        return cumulative / max(1, cumulative[-1])
+
+    def percentiles(self):
+        """
+        Returns the percentiles qs estimated from the bins, interpolating within a bin on the log scale.
+        :return: list(float)
+        """
+        import numpy as np
+        if not self.count:
+            return [float("nan")] * len(self.qs)
+        cdf = self.cdf()
+        keep = np.concatenate(([True], np.diff(cdf) > 0))
+        return np.exp(np.interp(np.asarray(self.qs) / 100, cdf[keep], np.log(self.edges[keep]))).tolist()
+
+
+def _binned(watch, per_decade: int):
+    import numpy as np
+    with watch.looks.lock:
+        stats = watch.looks.stats
+        histogram = watch.looks.histogram
+        histogram = None if histogram is None else histogram.copy()
+    if not stats.count:
+        return np.array([1e-6, 1e-5]), np.zeros(1, dtype=np.int64)
+    low = stats.min if stats.min > 0 else 1e-9
+    if histogram is not None and histogram.count:
+        counts = np.array(histogram.counts, dtype=np.int64)
+        bounds = np.array(histogram.bounds, dtype=float)
+        edges = np.concatenate(([min(low, bounds[0] / 10)], bounds, [max(stats.max, bounds[-1] * 10)]))
+        used = np.flatnonzero(counts)
+        first, last = used[0], used[-1]
+        return edges[first:last + 2], counts[first:last + 1]
+    times = watch.looks.times()
+    edges = log_bounds(low, stats.max, per_decade)
+    counts, _ = np.histogram(np.clip(times, edges[0], edges[-1]), edges)
+    return edges, counts
+
+
+def _over_time(watch, time_bins: int, qs):
+    """
+    Returns the middle of every non empty time bin and the percentiles qs of the look times that ended in it, using a
+    single sort of the looks by time bin plus look time scaled into [0, 1), which is much faster than a lexsort.
+    """
+    import numpy as np
+    start_ns, end_ns = watch.looks.readings()
+    if not len(end_ns):
+        return np.array([]), {q: np.array([]) for q in qs}
+    times = (end_ns - start_ns) / NS_PER_SECOND
+    first = end_ns.min()
+    width = max(1, -(-(int(end_ns.max()) - int(first) + 1) // time_bins))
+    bins = (end_ns - first) // width
+    order = np.argsort(bins + times / (times.max() * 2 + 1e-9), kind="stable")
+    sorted_times = times[order]
+    counts = np.bincount(bins, minlength=time_bins)
+    used = np.flatnonzero(counts)
+    starts = (np.cumsum(counts) - counts)[used]
+    counts = counts[used]
+    middles = (used + 0.5) * width / NS_PER_SECOND
+    return middles, {q: sorted_times[starts + np.floor(q / 100 * (counts - 1)).astype(np.int64)] for q in qs}
+
+
+def plot_data(watch, views=VIEWS, per_decade: int = 10, time_bins: int = 100, qs=(50, 90, 99)):
+    """
+    Reduces the closed looks of a watch to what the given views draw.
+    :param watch: Watch
+    :param views: names from VIEWS.
+    :param per_decade: log spaced bins per power of ten, when the watch keeps no Histogram.
+    :param time_bins: bins of the time view.
+    :param qs: percentiles drawn, in [0, 100].
+    :return: PlotData
+    """
+    edges, counts = _binned(watch, per_decade)
+    data = PlotData(watch.target, edges, counts, tuple(qs))
+    if "time" in views:
+        data.times, data.time_percentiles = _over_time(watch, time_bins, qs)
+    return data
+
+
+def _draw_histogram(ax, data: PlotData):
+    ax.stairs(data.counts, data.edges, fill=True)
+    ax.set_xscale("log")
+    ax.set_xlabel("look time (s)")
+    ax.set_ylabel("looks")
+
+
+def _draw_cdf(ax, data: PlotData):
+    ax.plot(data.edges, data.cdf() * 100, drawstyle="steps-post")
+    for q, value in zip(data.qs, data.percentiles()):
+        ax.axvline(value, linestyle=":", color="grey")
+        ax.annotate(f"p{q:g}", (value, q), fontsize=8)
+    ax.set_xscale("log")
+    ax.set_xlabel("look time (s)")
+    ax.set_ylabel("percentile")
+
+
+def _draw_time(ax, data: PlotData):
+    for q in data.qs:
+        ax.plot(data.times, data.time_percentiles[q], label=f"p{q:g}")
+    ax.set_yscale("log")
+    ax.set_xlabel("seconds")
+    ax.set_ylabel("look time (s)")
+    if data.qs:
+        ax.legend(fontsize=8)
+
+
+_DRAW = {"histogram": _draw_histogram, "cdf": _draw_cdf, "time": _draw_time}
+
+
+def render(data, filename: str, views=VIEWS, title: str = None, interactive: bool = False):
+    """
+    Draws a figure with one row per PlotData and one column per view and saves it to filename. Matplotlib is only
+    imported here, and unless interactive the figure never touches pyplot.
+    :param data: list(PlotData)
+    :param filename:
+    :param views: names from VIEWS.
+    :param title:
+    :param interactive:
+    :return: filename
+    """
+    unknown = set(views) - set(_DRAW)
+    if unknown:
+        raise ValueError(f"Unknown plot views: {sorted(unknown)}. Expected some of {VIEWS}")
+    rows, columns = max(1, len(data)), len(views)
+    figsize = (4.5 * columns, 3 * rows + 0.5)
+    if interactive:
+        import matplotlib.pyplot as plt
+        fig, axes = plt.subplots(rows, columns, squeeze=False, figsize=figsize)
+    else:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=figsize)
+        axes = fig.subplots(rows, columns, squeeze=False)
+    if title:
+        fig.suptitle(title, fontsize=16)
+    for row, watch_data in zip(axes, data):
+        for ax, view in zip(row, views):
+            ax.set_title(f"{watch_data.target} ({watch_data.count} looks)", fontsize=10)
+            if watch_data.count:
+                _DRAW[view](ax, watch_data)
+    fig.tight_layout()
+    fig.savefig(filename)
+    return filename
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _executor(kind: str):
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    with _executors_lock:
+        if kind not in _executors:
+            if kind == "thread":
+                _executors[kind] = ThreadPoolExecutor(1, thread_name_prefix="glance-plot")
+            elif kind == "process":
+                _executors[kind] = ProcessPoolExecutor(1)
+            else:
+                raise ValueError(f"Unknown background: {kind}. Expected 'thread' or 'process'")
+        return _executors[kind]
+
+
+def _plot(watches, filename, views, title, options):
+    return render([plot_data(watch, views, **options) for watch in watches], filename, views, title)
+
+
+def plot(watches, filename: str, views=VIEWS, title: str = None, interactive: bool = False, background: str = None,
+         **options):
+    """
+    Plots the given watches, one row each.
+    :param watches: list(Watch)
+    :param filename:
+    :param views: names from VIEWS.
+    :param title:
+    :param interactive: draw with pyplot, in the calling thread.
+    :param background: None renders before returning, "thread" reduces and renders in a background thread, "process"
+        reduces the looks in the calling thread and renders in a background process.
+    :param options: per_decade, time_bins and qs, see plot_data().
+    :return: filename, or a concurrent.futures.Future of it when rendering in the background.
+    """
+    if background is None:
+        return render([plot_data(watch, views, **options) for watch in watches], filename, views, title, interactive)
+    if interactive:
+        raise ValueError("Interactive plots can only be drawn in the calling thread.")
+    if background == "process":
+        data = [plot_data(watch, views, **options) for watch in watches]
+        return _executor(background).submit(render, data, filename, tuple(views), title)
+    return _executor(background).submit(_plot, list(watches), filename, views, title, options)
@@ -0,0 +1,164 @@
+"""
+Columnar binary recordings of a Glance.
+
+A recording file is laid out as::
+
+    magic (8 bytes) | header size (uint64, little endian) | JSON header, padded to 8 bytes | column data
+
+The header holds the Glance and Watch times, every watch's aggregates, sketch, failures and clock offset, and the byte
+offset, relative to the start of the column data, of each of its columns. Every watch has four little endian columns of
+one 8 byte value per look: look_ids and start_ns, end_ns clock readings (int64), and look times in seconds (float64).
+Columns are written in bulk from the watches' arrays and loaded as numpy views over a memory map of the file.
+"""
+import json
+import mmap
+import attr
+from glance.clock import Clock, NS_PER_SECOND
+from glance.errors import GlanceFileFormatError
+from glance.outcomes import Outcome
+from glance.sketch import QuantileSketch
+from glance.stats import RunningStats
+
+MAGIC = b"GLANCE\x00\x01"  #: First bytes of every recording, the last one being the format version.
+COLUMNS = (("look_ids", "<i8"), ("start_ns", "<i8"), ("end_ns", "<i8"), ("times", "<f8"))  #: Columns of a watch.
+
+
+def _stats_header(stats):
+    return None if stats is None else attr.asdict(stats)
+
+
+def _sketch_header(sketch):
+    if sketch is None:
+        return None
+    return {
+        "relative_accuracy": sketch.relative_accuracy,
+        "max_bins": sketch.max_bins,
+        "min_value": sketch.min_value,
+        "bins": sorted(sketch.bins.items()),
+        "zero_count": sketch.zero_count,
+        "count": sketch.count,
+        "min": sketch.min,
+        "max": sketch.max,
+    }
+
+
+def _sketch_from_header(header):
+    if header is None:
+        return None
+    return QuantileSketch(**dict(header, bins={index: count for index, count in header["bins"]}))
+
+
+def _failures_header(failures):
+    return {name: {"stats": _stats_header(outcome.stats), "sketch": _sketch_header(outcome.sketch)}
+            for name, outcome in failures.items()}
+
+
+def _failures_from_header(header):
+    return {
+        name: Outcome(name, RunningStats(**outcome["stats"]), _sketch_from_header(outcome["sketch"]))
+        for name, outcome in header.items()
+    }
+
+
+def save(glance, path):
+    """
+    Writes the closed looks and aggregates of every watch of glance to a recording file.
+    :param glance: Glance
+    :param path:
+    :return:
+    """
+    import numpy as np
+    from glance.storage import _merged_stats
+    watches, columns, offset = [], [], 0
+    for watch in list(glance.watches.values()):
+        snapshot = watch.snapshot()
+        count = len(snapshot)
+        stats = snapshot.stats
+        look_ids = snapshot.look_ids
+        if not isinstance(look_ids, (list, tuple)):
+            look_ids = np.frombuffer(look_ids, dtype=np.int64)
+        else:  # Look.id strings are replaced by the looks' positions.
+            stats = _merged_stats(stats, look_ids, list(range(count)))
+            look_ids = np.arange(count, dtype=np.int64)
+        start_ns = np.frombuffer(snapshot.start_ns, dtype=np.int64)
+        end_ns = np.frombuffer(snapshot.end_ns, dtype=np.int64)
+        times = (end_ns - start_ns) / NS_PER_SECOND
+        watch_columns = {}
+        for (name, dtype), values in zip(COLUMNS, (look_ids, start_ns, end_ns, times)):
+            watch_columns[name] = offset
+            offset += count * 8
+            columns.append(values.astype(dtype, copy=False))
+        watches.append({
+            "target": watch.target,
+            "start_time": watch.start_time,
+            "end_time": watch.end_time,
+            "count": count,
+            "offset_ns": snapshot.offset_ns,
+            "stats": _stats_header(stats),
+            "sketch": _sketch_header(snapshot.sketch),
+            "running": _stats_header(snapshot.running),
+            "suspended": _stats_header(snapshot.suspended),
+            "failures": _failures_header(snapshot.failures),
+            "columns": watch_columns,
+        })
+    header = json.dumps({
+        "start_time": glance.start_time,
+        "end_time": glance.end_time,
+        "watches": watches,
+    }).encode()
+    header += b" " * (-len(header) % 8)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for values in columns:
+            f.write(memoryview(values))
+
+
+def load(path):
+    """
+    Loads a recording file written by save() as a Glance of read only watches, memory mapping the file.
+    :param path:
+    :return: Glance
+    """
+    import numpy as np
+    from glance.glance import Glance, Watch
+    from glance.storage import MappedLooks
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise GlanceFileFormatError(path, "not a glance recording or an unsupported format version.")
+        header_size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_size))
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    data_offset = len(MAGIC) + 8 + header_size
+    glance = Glance(start_time=header["start_time"], end_time=header["end_time"])
+    for watch_header in header["watches"]:
+        count = watch_header["count"]
+        columns = {
+            name: np.frombuffer(data, dtype=dtype, count=count, offset=data_offset + watch_header["columns"][name])
+            for name, dtype in COLUMNS
+        }
+        clock = Clock()
+        clock.anchor_ns, clock.epoch_ns = 0, watch_header["offset_ns"]
+        sketch = _sketch_from_header(watch_header["sketch"])
+        looks = MappedLooks(
+            stats=RunningStats(**watch_header["stats"]),
+            sketch=sketch,
+            target=watch_header["target"],
+            clock=clock,
+            **columns,
+        )
+        running, suspended = watch_header["running"], watch_header["suspended"]
+        glance.watches[watch_header["target"]] = Watch(
+            target=watch_header["target"],
+            start_time=watch_header["start_time"],
+            end_time=watch_header["end_time"],
+            looks=looks,
+            storage="mapped",
+            sketch=sketch,
+            clock=clock,
+            running=None if running is None else RunningStats(**running),
+            suspended=None if suspended is None else RunningStats(**suspended),
+            failures=_failures_from_header(watch_header.get("failures", {})),
+        )
+    return glance
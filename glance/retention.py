@@ -0,0 +1,66 @@
+"""
+Retention policies bounding the closed looks a watch keeps, see Glance(retention=...).
+
+A policy only picks the slot each closed look goes to: KeepAll appends every look, RingBuffer keeps the most recent
+ones, Reservoir a uniform random sample and StatsOnly none. The watch's aggregates and sketch still cover every look.
+"""
+import random
+import attr
+
+
+@attr.s
+class KeepAll:
+    """
+    Retention policy keeping every closed look. This is the default.
+    """
+
+    def slot(self, seen: int, kept: int):
+        """
+        Picks where the next closed look is kept. Returning kept appends it, a smaller index overwrites the look kept
+        at that index and -1 drops it.
+        :param seen: number of closed looks offered before this one.
+        :param kept: number of looks currently kept.
+        :return: int
+        """
+        return kept
+
+
+@attr.s
+class RingBuffer:
+    """
+    Retention policy keeping the most recent closed looks.
+    """
+    size = attr.ib(type=int)  #: Maximum number of looks kept.
+
+    def slot(self, seen: int, kept: int):
+        return seen % self.size
+
+
+@attr.s
+class Reservoir:
+    """
+    Retention policy keeping a uniform random sample of all closed looks (reservoir sampling, algorithm R).
+    """
+    size = attr.ib(type=int)  #: Maximum number of looks kept.
+    seed = attr.ib(default=None)  #: Seed of the sampling, for reproducible samples.
+    _random = attr.ib(init=False, repr=False, eq=False)
+
+    @_random.default
+    def _make_random(self):
+        return random.Random(self.seed)
+
+    def slot(self, seen: int, kept: int):
+        if kept < self.size:
+            return kept
+        index = self._random.randrange(seen + 1)
+        return index if index < self.size else -1
+
+
+@attr.s
+class StatsOnly:
+    """
+    Retention policy dropping every closed look, only the watch's running aggregates are kept.
+    """
+
+    def slot(self, seen: int, kept: int):
+        return -1
@@ -0,0 +1,128 @@
+"""
+Sampling policies recording only some of the calls of a watched function, see Glance.watch(sampling=...).
+
+Every call is counted, in CallCounter, without a lock, and the policy's sampler picks the calls to record: EveryNth
+takes one call in n, Probability draws each call at random, and Adaptive adjusts its stride to a budget of looks per
+second. Counts and aggregates then estimate the totals of all calls, see Watch.sample_rate.
+"""
+import math
+import time
+import random
+import itertools
+import threading
+import attr
+
+
+class CallCounter:
+    """
+    Exact, thread safe call counter costing one C level next() per call. Reading the count takes a number from the
+    counter too, so the number a call gets is its index plus the number of reads before it, see reads.
+    """
+    __slots__ = ("tick", "reads", "_count", "_lock")
+
+    def __init__(self):
+        self._count = itertools.count()
+        self.tick = self._count.__next__  #: Counts a call, returning its index plus reads.
+        self.reads = 0  #: Number of reads of value, subtracted from what tick() returns to get a call's index.
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        """
+        Number of calls counted so far.
+        :return: int
+        """
+        with self._lock:
+            number = self.tick()
+            self.reads += 1
+            return number - self.reads + 1
+
+
+@attr.s
+class EveryNth:
+    """
+    Sampling policy recording one call in every n, starting with the first one.
+    """
+    n = attr.ib(type=int)  #: Stride between recorded calls.
+    counter = attr.ib(factory=CallCounter, init=False, repr=False, eq=False)  #: Every call of the watched function.
+
+    def sampler(self):
+        """
+        Returns the callable run at every call of the watched function, counting it and returning whether it is
+        recorded.
+        :return: callable
+        """
+        counter, n = self.counter, self.n
+        tick = counter.tick
+        return lambda: not (tick() - counter.reads) % n
+
+
+@attr.s
+class Probability:
+    """
+    Sampling policy recording every call independently with the given probability.
+    """
+    rate = attr.ib(type=float)  #: Probability of recording a call, in (0, 1].
+    seed = attr.ib(default=None)  #: Seed of the sampling, for reproducible samples.
+    counter = attr.ib(factory=CallCounter, init=False, repr=False, eq=False)
+    _random = attr.ib(init=False, repr=False, eq=False)
+
+    @_random.default
+    def _make_random(self):
+        return random.Random(self.seed)
+
+    def sampler(self):
+        tick, draw, rate = self.counter.tick, self._random.random, self.rate
+        return lambda: tick() >= 0 and draw() < rate
+
+
+@attr.s
+class Adaptive:
+    """
+    Sampling policy recording one call in every n, with n adjusted every window calls so that at most
+    max_looks_per_second looks are recorded. A max_overhead, the fraction of wall time allowed to go to recording
+    looks, is turned into looks per second using look_cost, the time spent recording one look.
+    """
+    max_looks_per_second = attr.ib(type=float, default=None)
+    max_overhead = attr.ib(type=float, default=None)
+    look_cost = attr.ib(type=float, default=1e-6)  #: Seconds spent recording one look.
+    window = attr.ib(type=int, default=1024)  #: Calls between adjustments of the stride.
+    counter = attr.ib(factory=CallCounter, init=False, repr=False, eq=False)
+    stride = attr.ib(type=int, default=1, init=False)  #: Current stride between recorded calls.
+    _next_check = attr.ib(init=False, repr=False, eq=False)
+    _window_start = attr.ib(init=False, repr=False, eq=False)
+
+    def __attrs_post_init__(self):
+        if self.max_looks_per_second is None and self.max_overhead is None:
+            raise ValueError("Adaptive sampling needs max_looks_per_second or max_overhead.")
+        self._next_check = self.window
+        self._window_start = time.perf_counter()
+
+    @property
+    def target(self):
+        """
+        Recorded looks per second aimed for.
+        :return: float
+        """
+        targets = [self.max_looks_per_second]
+        if self.max_overhead is not None:
+            targets.append(self.max_overhead / self.look_cost)
+        return min(target for target in targets if target is not None)
+
+    def _adjust(self, call):
+        now = time.perf_counter()
+        calls_per_second = self.window / max(now - self._window_start, 1e-9)
+        self.stride = max(1, math.ceil(calls_per_second / self.target))
+        self._window_start = now
+        self._next_check = call + self.window
+
+    def sampler(self):
+        counter = self.counter
+        tick = counter.tick
+
+        def sample():
+            call = tick() - counter.reads
+            if call >= self._next_check:
+                self._adjust(call)
+            return not call % self.stride
+        return sample
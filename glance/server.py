@@ -0,0 +1,155 @@
+"""
+Local HTTP endpoint exposing live aggregates of a Glance, see Glance.serve().
+
+    /metrics       Prometheus text exposition format.
+    /metrics.json  The same metrics as JSON.
+
+Every scrape copies the watches' running aggregates and histograms, folding only the looks closed since the previous
+read, and never iterates over the stored looks. The store's lock is only held while folding and copying, the metrics
+are built from the copies. A watch's look count and sum come from its histogram, when it has one, so they always agree
+with its buckets. The in-flight gauge counts open looks and calls still running on the Glance.watch fast path.
+"""
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import attr
+
+
+def collect(glance):
+    """
+    Returns the current metrics of every watch of glance.
+    :param glance: Glance
+    :return: list(dict)
+    """
+    metrics = []
+    for watch in list(glance.watches.values()):
+        stats, histogram = watch.looks.aggregates()
+        if histogram is not None:
+            buckets, count, total = histogram.cumulative(), histogram.count, histogram.total
+        else:
+            buckets, count, total = [(math.inf, stats.count)], stats.count, stats.total
+        metrics.append({
+            "watch": watch.target,
+            "count": count,
+            "sum": total,
+            "mean": stats.mean if stats.count else None,
+            "min": stats.min,
+            "max": stats.max,
+            "calls": watch.calls,
+            "in_flight": watch.looks.in_flight,
+            "buckets": buckets,
+        })
+    return metrics
+
+
+def _label(value: str):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def prometheus_text(metrics):
+    """
+    Renders metrics from collect() in the Prometheus text exposition format.
+    :param metrics:
+    :return: str
+    """
+    lines = [
+        "# HELP glance_look_seconds Look times of glance watches.",
+        "# TYPE glance_look_seconds histogram",
+    ]
+    for watch in metrics:
+        label = _label(watch["watch"])
+        for bound, count in watch["buckets"]:
+            lines.append(f'glance_look_seconds_bucket{{watch="{label}",le="{_number(bound)}"}} {count}')
+        lines.append(f'glance_look_seconds_sum{{watch="{label}"}} {_number(watch["sum"])}')
+        lines.append(f'glance_look_seconds_count{{watch="{label}"}} {watch["count"]}')
+    for name, key, kind, description in (
+        ("glance_calls_total", "calls", "counter", "Calls of watched functions, including unsampled ones."),
+        ("glance_looks_in_flight", "in_flight", "gauge", "Looks of glance watches started and not closed yet."),
+    ):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for watch in metrics:
+            if watch[key] is not None:
+                lines.append(f'{name}{{watch="{_label(watch["watch"])}"}} {watch[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def json_text(metrics):
+    """
+    Renders metrics from collect() as JSON, histogram bounds being strings as in Prometheus.
+    :param metrics:
+    :return: str
+    """
+    watches = {}
+    for watch in metrics:
+        record = {key: value for key, value in watch.items() if key != "watch"}
+        record["buckets"] = [[_number(bound), count] for bound, count in watch["buckets"]]
+        watches[watch["watch"]] = record
+    return json.dumps({"watches": watches})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    glance = None
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, content_type = prometheus_text(collect(self.glance)), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, content_type = json_text(collect(self.glance)), "application/json"
+        else:
+            self.send_error(404)
+            return
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@attr.s
+class MetricsServer:
+    """
+    HTTP server answering scrapes of a Glance's metrics from a background daemon thread.
+    """
+    glance = attr.ib(repr=False)
+    host = attr.ib(type=str, default="127.0.0.1")  #: Interface to bind, localhost by default.
+    port = attr.ib(type=int, default=0)  #: Port to bind, 0 picks a free one.
+    _server = attr.ib(init=False, repr=False)
+    _thread = attr.ib(init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        handler = type("Handler", (_Handler,), {"glance": self.glance})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="glance-metrics", daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        """
+        URL of the Prometheus endpoint.
+        :return: str
+        """
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def close(self):
+        """
+        Stops the server.
+        :return:
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
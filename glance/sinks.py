@@ -0,0 +1,265 @@
+"""
+Streaming export of closed looks to a background writer thread.
+
+Watches hand batches of closed looks to every Exporter of their Glance, see Glance.add_sink(). Columnar watches hand
+over every look folded since the previous batch, i.e. up to fold_size looks per batch. Exporters queue the batches
+without blocking, unless asked to, and a writer thread passes them to a sink, any object with write(batch) and close()
+methods, such as the file writers below.
+"""
+import os
+import sys
+import csv
+import json
+import queue
+import struct
+import threading
+from array import array
+import attr
+from glance.clock import NS_PER_SECOND
+
+
+@attr.s(slots=True)
+class LookBatch:
+    """
+    Closed looks of one watch, as aligned columns.
+    """
+    target = attr.ib(type=str)
+    look_ids = attr.ib()  #: array of int look ids, or list of Look.id strings.
+    start_ns = attr.ib(type=array)  #: Start clock readings.
+    end_ns = attr.ib(type=array)  #: End clock readings.
+    offset_ns = attr.ib(type=int)  #: Added to a clock reading gives nanoseconds since epoch.
+
+    def __len__(self):
+        return len(self.start_ns)
+
+
+@attr.s
+class Exporter:
+    """
+    Bounded queue of LookBatches drained into a sink by a background writer thread. When the queue is full, new
+    batches are dropped and counted, or with policy="block" the recording thread waits for room. The writer never
+    touches the watches, buffered looks are flushed into the queue by a separate flusher thread, so a recording thread
+    waiting for room never waits on the writer.
+    """
+    sink = attr.ib()  #: Object with write(batch) and close() methods.
+    max_batches = attr.ib(type=int, default=1024)  #: Capacity of the queue.
+    policy = attr.ib(type=str, default="drop")  #: "drop" or "block", what to do with a batch when the queue is full.
+    flush_interval = attr.ib(type=float, default=1.0)  #: Seconds between calls of on_flush.
+    on_flush = attr.ib(default=None, repr=False)  #: Called every flush_interval by the flusher, flushing looks.
+    written = attr.ib(type=int, default=0, init=False)  #: Looks written to the sink.
+    dropped = attr.ib(type=int, default=0, init=False)  #: Looks dropped because the queue was full.
+    errors = attr.ib(type=list, factory=list, init=False, repr=False)  #: Exceptions raised by the sink.
+    _queue = attr.ib(init=False, repr=False)
+    _thread = attr.ib(init=False, repr=False)
+    _flusher = attr.ib(default=None, init=False, repr=False)
+    _closing = attr.ib(factory=threading.Event, init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        if self.policy not in ("drop", "block"):
+            raise ValueError(f"Unknown queue policy: {self.policy}. Expected 'drop' or 'block'")
+        self._queue = queue.Queue(self.max_batches)
+        name = f"glance-{type(self.sink).__name__}"
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        if self.on_flush is not None:
+            self._flusher = threading.Thread(target=self._flush_every, name=f"{name}-flusher", daemon=True)
+            self._flusher.start()
+
+    def submit(self, batch: LookBatch):
+        """
+        Queues a batch for the writer thread.
+        :param batch:
+        :return:
+        """
+        if self.policy == "block":
+            self._queue.put(batch)
+            return
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self.dropped += len(batch)
+
+    def _flush_every(self):
+        while not self._closing.wait(self.flush_interval):
+            try:
+                self.on_flush()
+            except Exception as error:
+                self.errors.append(error)
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    self.sink.close()
+                    return
+                self.sink.write(batch)
+                self.written += len(batch)
+            except Exception as error:
+                self.errors.append(error)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        Waits until every queued batch is written.
+        :return:
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Writes every queued batch, closes the sink and stops the writer thread.
+        :return:
+        """
+        self._closing.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+@attr.s
+class FileSink:
+    """
+    Base of the file writers, appending to path and rotating it once it grows past max_bytes: path is renamed to
+    path.1, path.1 to path.2 and so on, keeping backup_count old files.
+    """
+    path = attr.ib(converter=os.fspath)
+    max_bytes = attr.ib(type=int, default=None)  #: Size after which the file is rotated, None never rotates.
+    backup_count = attr.ib(type=int, default=5)  #: Rotated files kept.
+    binary = False
+    _file = attr.ib(default=None, init=False, repr=False)
+
+    def _open(self):
+        self._file = open(self.path, "ab" if self.binary else "a", newline="" if not self.binary else None)
+        if not self._file.tell():
+            self._start()
+
+    def _start(self):
+        """
+        Writes what a new file starts with.
+        """
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def write(self, batch: LookBatch):
+        """
+        Appends a batch of looks to the file, rotating it first if it is full.
+        :param batch:
+        :return:
+        """
+        if self._file is None:
+            self._open()
+        elif self.max_bytes is not None and self._file.tell() >= self.max_bytes:
+            self._rotate()
+        self._write(batch)
+
+    def _write(self, batch: LookBatch):
+        raise NotImplementedError
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@attr.s
+class JsonLinesSink(FileSink):
+    """
+    Writes one JSON object per look: target, id, start_ns and end_ns, in nanoseconds since epoch, and look_time in
+    seconds.
+    """
+
+    def _write(self, batch: LookBatch):
+        offset_ns = batch.offset_ns
+        target = json.dumps(batch.target)
+        look_ids = batch.look_ids
+        if not isinstance(look_ids, array):
+            look_ids = [json.dumps(look_id) for look_id in look_ids]
+        self._file.write("".join(
+            f'{{"target": {target}, "id": {look_id}, "start_ns": {start_ns + offset_ns}, '
+            f'"end_ns": {end_ns + offset_ns}, "look_time": {(end_ns - start_ns) / NS_PER_SECOND}}}\n'
+            for look_id, start_ns, end_ns in zip(look_ids, batch.start_ns, batch.end_ns)
+        ))
+
+
+@attr.s
+class CsvSink(FileSink):
+    """
+    Writes one CSV row per look, with the same fields as JsonLinesSink under a header row.
+    """
+    fields = ("target", "id", "start_ns", "end_ns", "look_time")
+
+    def _start(self):
+        csv.writer(self._file).writerow(self.fields)
+
+    def _write(self, batch: LookBatch):
+        offset_ns = batch.offset_ns
+        target = batch.target
+        csv.writer(self._file).writerows(
+            (target, look_id, start_ns + offset_ns, end_ns + offset_ns, (end_ns - start_ns) / NS_PER_SECOND)
+            for look_id, start_ns, end_ns in zip(batch.look_ids, batch.start_ns, batch.end_ns)
+        )
+
+
+_BINARY_HEADER = struct.Struct("<IqQ")  #: Target length, offset_ns and number of looks of a binary batch.
+
+
+@attr.s
+class BinarySink(FileSink):
+    """
+    Writes each batch as a frame: a little endian header of the target's length, offset_ns and number of looks, the
+    UTF-8 target, then the int64 look_ids, start_ns and end_ns columns. Look.id strings are not kept, their ids are
+    written as -1. Read back with read_binary().
+    """
+    binary = True
+
+    def _write(self, batch: LookBatch):
+        target = batch.target.encode()
+        look_ids = batch.look_ids
+        if not isinstance(look_ids, array):
+            look_ids = array('q', [-1]) * len(look_ids)
+        self._file.write(_BINARY_HEADER.pack(len(target), batch.offset_ns, len(batch)) + target)
+        for column in (look_ids, batch.start_ns, batch.end_ns):
+            self._file.write(_little_endian(column))
+
+
+def _little_endian(column: array):
+    if sys.byteorder == "little":
+        return column.tobytes()
+    swapped = array('q', column)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def read_binary(path):
+    """
+    Reads the LookBatches written by a BinarySink to path.
+    :param path:
+    :return: generator of LookBatch
+    """
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_BINARY_HEADER.size)
+            if not header:
+                return
+            target_size, offset_ns, count = _BINARY_HEADER.unpack(header)
+            target = f.read(target_size).decode()
+            columns = []
+            for _ in range(3):
+                column = array('q', f.read(count * 8))
+                if sys.byteorder != "little":
+                    column.byteswap()
+                columns.append(column)
+            yield LookBatch(target, *columns, offset_ns)
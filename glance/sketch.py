@@ -0,0 +1,157 @@
+"""
+Mergeable quantile sketches of look times, see Watch.percentile().
+
+QuantileSketch estimates any percentile within a fixed relative error from a bounded number of logarithmic bins,
+however many looks were added. Sketches of several watches, threads or processes merge into the sketch of all their
+looks.
+"""
+import math
+import attr
+
+
+@attr.s
+class QuantileSketch:
+    """
+    Mergeable quantile sketch of look times with bounded relative error (DDSketch style). Values are counted in
+    logarithmically sized bins, so memory is fixed by max_bins and any estimated percentile is within
+    relative_accuracy of the true value. When more than max_bins bins are needed the lowest ones are collapsed, which
+    only affects the accuracy of the lowest percentiles.
+    """
+    relative_accuracy = attr.ib(type=float, default=0.01)  #: Relative error bound of the estimated percentiles.
+    max_bins = attr.ib(type=int, default=2048)  #: Maximum number of bins kept.
+    min_value = attr.ib(type=float, default=1e-9)  #: Values below this are counted as zero.
+    bins = attr.ib(type=dict, factory=dict)  #: Count of values per bin index.
+    zero_count = attr.ib(type=int, default=0)  #: Count of values below min_value.
+    count = attr.ib(type=int, default=0)  #: Number of values seen.
+    min = attr.ib(type=float, default=None)  #: Smallest value seen.
+    max = attr.ib(type=float, default=None)  #: Largest value seen.
+    _gamma = attr.ib(init=False, repr=False, eq=False)
+    _log_gamma = attr.ib(init=False, repr=False, eq=False)
+
+    def __attrs_post_init__(self):
+        if not 0 < self.relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1.")
+        self._gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+    def add(self, value, look_id=None):
+        """
+        Counts a single value in the sketch.
+        :param value:
+        :param look_id: unused, accepted so the sketch can be fed like RunningStats.
+        :return:
+        """
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value < self.min_value:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        bins = self.bins
+        bins[index] = bins.get(index, 0) + 1
+        if len(bins) > self.max_bins:
+            self._collapse()
+
+    def add_many(self, values):
+        """
+        Counts an array of values in the sketch in one vectorized pass.
+        :param values: np.ndarray
+        :return:
+        """
+        import numpy as np
+        if not len(values):
+            return
+        self.count += len(values)
+        low, high = float(values.min()), float(values.max())
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+        small = values < self.min_value
+        self.zero_count += int(small.sum())
+        indices = np.ceil(np.log(values[~small]) / self._log_gamma).astype(np.int64)
+        bins = self.bins
+        for index, count in zip(*(a.tolist() for a in np.unique(indices, return_counts=True))):
+            bins[index] = bins.get(index, 0) + count
+        if len(bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        indices = sorted(self.bins)
+        excess = len(indices) - self.max_bins
+        target = indices[excess]
+        self.bins[target] += sum(self.bins.pop(index) for index in indices[:excess])
+
+    def _value(self, index):
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def merge(self, other: 'QuantileSketch'):
+        """
+        Adds every value counted in other to this sketch.
+        :param other: QuantileSketch with the same relative_accuracy.
+        :return: self
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative_accuracy can be merged.")
+        if not other.count:
+            return self
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        return self
+
+    def reset(self):
+        """
+        Drops every counted value.
+        :return:
+        """
+        self.bins = {}
+        self.zero_count = self.count = 0
+        self.min = self.max = None
+
+    def copy(self):
+        """
+        Returns an independent copy of the sketch.
+        :return: QuantileSketch
+        """
+        return attr.evolve(self, bins=dict(self.bins))
+
+    def percentile(self, q: float):
+        """
+        Returns the estimated q-th percentile, q in [0, 100].
+        :param q:
+        :return: float
+        """
+        return self.percentiles([q])[0]
+
+    def percentiles(self, qs):
+        """
+        Returns the estimated percentiles for every q in qs, each in [0, 100].
+        :param qs:
+        :return: list(float)
+        """
+        if not self.count:
+            raise ValueError("Cannot compute percentiles of an empty sketch.")
+        for q in qs:
+            if not 0 <= q <= 100:
+                raise ValueError(f"Percentile must be in [0, 100], got {q}.")
+        ranks = sorted((q / 100 * (self.count - 1), i) for i, q in enumerate(qs))
+        results = [None] * len(ranks)
+        bins = iter(sorted(self.bins.items()))
+        seen = self.zero_count
+        value = 0.0
+        for rank, i in ranks:
+            while seen <= rank:
+                index, count = next(bins)
+                seen += count
+                value = self._value(index)
+            results[i] = min(max(value, self.min), self.max)
+        return results
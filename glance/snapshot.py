@@ -0,0 +1,86 @@
+"""
+Picklable snapshots of a Glance, to move looks between processes, see Glance.snapshot() and Glance.merge().
+
+A snapshot holds each watch's closed looks as typed arrays, along with its aggregates, sketch and failures, and no
+Look objects or arguments. with_snapshot() and collect() wrap pool tasks, so each result carries the looks the task
+recorded in its worker.
+"""
+import functools
+from array import array
+import attr
+from glance.sketch import QuantileSketch
+from glance.stats import RunningStats
+
+
+@attr.s
+class WatchSnapshot:
+    """
+    Compact, picklable copy of the closed looks of a Watch: aligned typed arrays of look ids and clock readings, and
+    the watch's aggregates, failures included. Look objects, and any arguments they hold, are left behind.
+    """
+    target = attr.ib(type=str)
+    look_ids = attr.ib()  #: Ids of the closed looks, an array or a list.
+    start_ns = attr.ib(type=array)  #: Start clock readings of the closed looks.
+    end_ns = attr.ib(type=array)  #: End clock readings of the closed looks.
+    offset_ns = attr.ib(type=int)  #: Added to a clock reading gives nanoseconds since epoch.
+    stats = attr.ib(type=RunningStats)  #: Aggregates over every closed look, including any that were not kept.
+    sketch = attr.ib(type=QuantileSketch, default=None)
+    running = attr.ib(type=RunningStats, default=None)
+    suspended = attr.ib(type=RunningStats, default=None)
+    failures = attr.ib(type=dict, factory=dict)  #: Outcome of the failed looks, by exception type name.
+
+    def __len__(self):
+        return len(self.start_ns)
+
+
+@attr.s
+class GlanceSnapshot:
+    """
+    Compact, picklable copy of a Glance, see Glance.snapshot() and Glance.merge().
+    """
+    start_time = attr.ib(type=float)
+    end_time = attr.ib(type=float, default=None)
+    watches = attr.ib(type=dict, factory=dict)  #: WatchSnapshot by target.
+
+
+@attr.s(slots=True)
+class SnapshotResult:
+    """
+    Return value of a task decorated with with_snapshot(), the task's value along with the looks it recorded.
+    """
+    value = attr.ib()
+    snapshot = attr.ib(type=GlanceSnapshot)
+
+
+def with_snapshot(glance):
+    """
+    Decorator for tasks run in pool workers. The decorated task returns a SnapshotResult holding its value and a
+    snapshot of the looks recorded in glance since the worker's previous task, which are then dropped from the
+    worker's glance. Decorate a module level function so it can still be pickled by name, then unwrap the results
+    in the parent with collect().
+    :param glance: Glance the task's watched functions record in, in the worker process.
+    :return:
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            value = func(*args, **kwargs)
+            return SnapshotResult(value, glance.snapshot(reset=True))
+        return wrapper
+    return decorator
+
+
+def collect(glance, results):
+    """
+    Merges the snapshots of SnapshotResults, as returned by Executor.map() or futures of tasks decorated with
+    with_snapshot(), into glance as they arrive, and yields their values. Snapshots come back through the executor's
+    result pipe along with the values, so collecting costs one pickled set of arrays per task.
+    :param glance: Glance to merge into, usually the one the task functions are decorated with in the parent.
+    :param results: iterable of SnapshotResult or of futures of SnapshotResult.
+    :return: generator of values
+    """
+    for result in results:
+        if hasattr(result, "result") and callable(result.result):
+            result = result.result()
+        glance.merge(result.snapshot)
+        yield result.value
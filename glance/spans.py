@@ -0,0 +1,327 @@
+"""
+Nested spans and the call tree of a Glance, see Glance.span().
+
+The innermost open span of each thread and asyncio task is kept in a contextvar. Every span is timed as a look of the
+watch of the same name, and it records the span open around it as its parent. Closed spans add up in the Glance's call
+tree of SpanNode, one node per path of span names, with calls, inclusive time and exclusive time.
+"""
+import inspect
+import functools
+import contextvars
+import threading
+import attr
+from glance.clock import NS_PER_SECOND
+
+_current = contextvars.ContextVar("glance_current_span", default=None)  #: Innermost open SpanFrame.
+
+
+@attr.s(eq=False)
+class SpanNode:
+    """
+    Node of a Glance's call tree, aggregating every span run at one path of nested span names.
+    """
+    name = attr.ib(type=str)
+    calls = attr.ib(type=int, default=0)  #: Number of spans closed at this path.
+    inclusive_ns = attr.ib(type=int, default=0)  #: Total time of those spans, nested spans included.
+    exclusive_ns = attr.ib(type=int, default=0)  #: Total time of those spans, minus the time of their nested spans.
+    children = attr.ib(type=dict, factory=dict, repr=False)  #: Child SpanNode by name.
+    _lock = attr.ib(factory=threading.Lock, init=False, repr=False)
+
+    @property
+    def inclusive(self):
+        """
+        Total time, in seconds, spent in the spans at this path.
+        :return: float
+        """
+        return self.inclusive_ns / NS_PER_SECOND
+
+    @property
+    def exclusive(self):
+        """
+        Total time, in seconds, spent in the spans at this path but not in any span nested in them.
+        :return: float
+        """
+        return self.exclusive_ns / NS_PER_SECOND
+
+    def child(self, name: str):
+        """
+        Returns the child node with the given name, creating it if needed.
+        :param name:
+        :return: SpanNode
+        """
+        node = self.children.get(name)
+        if node is None:
+            with self._lock:
+                node = self.children.setdefault(name, SpanNode(name))
+        return node
+
+    def add(self, inclusive_ns: int, exclusive_ns: int):
+        """
+        Adds one closed span to the node.
+        :param inclusive_ns:
+        :param exclusive_ns:
+        :return:
+        """
+        with self._lock:
+            self.calls += 1
+            self.inclusive_ns += inclusive_ns
+            self.exclusive_ns += exclusive_ns
+
+    def walk(self, path: tuple = ()):
+        """
+        Yields (path, node) for every node below this one, depth first, path being the tuple of names from this node.
+        :param path:
+        :return: generator
+        """
+        for name, node in list(self.children.items()):
+            node_path = path + (name,)
+            yield node_path, node
+            yield from node.walk(node_path)
+
+    def find(self, *path):
+        """
+        Returns the node at the given path of names below this one.
+        :param path:
+        :return: SpanNode
+        """
+        node = self
+        for name in path:
+            node = node.children[name]
+        return node
+
+    def format(self):
+        """
+        Returns the tree below this node as indented text lines of calls, inclusive and exclusive seconds.
+        :return: str
+        """
+        return "\n".join(
+            f"{'  ' * (len(path) - 1)}{node.name}: {node.calls} calls, "
+            f"{node.inclusive:.6f}s inclusive, {node.exclusive:.6f}s exclusive"
+            for path, node in self.walk()
+        )
+
+
+@attr.s(slots=True, eq=False)
+class SpanFrame:
+    """
+    Open span, linked to the span it is nested in.
+    """
+    name = attr.ib(type=str)
+    watch = attr.ib()  #: Watch the span's look is recorded in.
+    look_id = attr.ib()  #: Id of the span's look in watch.looks.
+    node = attr.ib(type=SpanNode)  #: Call tree node of the span's path.
+    root = attr.ib(type=SpanNode)  #: Root of the call tree the span belongs to.
+    parent = attr.ib(default=None)  #: SpanFrame the span is nested in, None for a root span.
+    start_ns = attr.ib(type=int, default=None)
+    child_ns = attr.ib(type=int, default=0)  #: Time spent in spans nested directly in this one.
+    token = attr.ib(default=None, repr=False)
+
+    @property
+    def path(self):
+        """
+        Names of the spans from the root span down to this one.
+        :return: tuple
+        """
+        frame, names = self, []
+        while frame is not None:
+            names.append(frame.name)
+            frame = frame.parent
+        return tuple(reversed(names))
+
+
+def current_span():
+    """
+    Returns the innermost open SpanFrame in the current thread or task, or None.
+    :return: SpanFrame
+    """
+    return _current.get()
+
+
+def parent_of(frame: SpanFrame):
+    """
+    Returns the parent of a look started in the span of frame: the target of the span's watch and its look id.
+    :param frame: SpanFrame, or None outside spans.
+    :return: tuple, or None
+    """
+    return None if frame is None else (frame.watch.target, frame.look_id)
+
+
+def nest(frame: SpanFrame, call_tree: SpanNode, name: str, elapsed_ns: int):
+    """
+    Adds a closed watched call, run in the span of frame, to the call tree as a leaf below the innermost span of the
+    same tree, and to the time of the span's nested spans.
+    :param frame: SpanFrame the call ran in.
+    :param call_tree: root of the call tree of the Glance the call's watch belongs to.
+    :param name: target of the call's watch.
+    :param elapsed_ns: look time of the call.
+    :return:
+    """
+    frame.child_ns += elapsed_ns
+    while frame is not None and frame.root is not call_tree:
+        frame = frame.parent
+    if frame is not None:
+        frame.node.child(name).add(elapsed_ns, elapsed_ns)
+
+
+@attr.s
+class Span:
+    """
+    Context manager and decorator timing a block as a look of the Glance's watch with the same name, nested under the
+    span open around it, see Glance.span(). Looks started in the span, watched calls included, record its look as their
+    parent, see Look.parent. Spans nest through a contextvars stack, so each thread and asyncio task has its own. Used
+    as a context manager, each exit closes the frame of the matching enter in the same thread or task, even when another
+    span, opened in a generator suspended under this one, is still open, and even when the Span object is shared by
+    several tasks. A decorated generator, or async generator, is timed from its first resumption until it is exhausted
+    or closed, and its span is only current while its body runs.
+    """
+    glance = attr.ib(repr=False)
+    name = attr.ib(type=str)
+    #: Frames opened by __enter__ and not exited yet, per thread and task.
+    _frames = attr.ib(
+        factory=lambda: contextvars.ContextVar("glance_span_frames", default=()), init=False, repr=False, eq=False,
+    )
+
+    def open(self):
+        """
+        Opens a span, nested under the current one, and makes it the current span.
+        :return: SpanFrame
+        """
+        glance = self.glance
+        parent = _current.get()
+        ancestor = parent
+        while ancestor is not None and ancestor.root is not glance.call_tree:
+            ancestor = ancestor.parent
+        node = (glance.call_tree if ancestor is None else ancestor.node).child(self.name)
+        watch = glance._get_watch(self.name)
+        frame = SpanFrame(self.name, watch, watch.start_look(parent_of(parent)), node, glance.call_tree, parent)
+        frame.token = _current.set(frame)
+        frame.start_ns = watch.clock.now()
+        return frame
+
+    def close(self, frame: SpanFrame, error: BaseException = None):
+        """
+        Closes a span opened by open(), adding it to the call tree and to the time of its parent's nested spans. The
+        look of a span that raised error goes to the failures of its watch, see Watch.fail_look().
+        :param frame:
+        :param error: exception raised in the span, if any.
+        :return:
+        """
+        elapsed_ns = frame.watch.clock.now() - frame.start_ns
+        current = _current.get()
+        if current is frame:
+            _current.reset(frame.token)
+        else:
+            while current is not None and current is not frame:
+                current = current.parent
+            if current is frame:  # Spans opened under this one are still open, as in a suspended generator.
+                _current.set(frame.parent)
+        if error is None:
+            frame.watch.stop_look(frame.look_id)
+        else:
+            frame.watch.fail_look(frame.look_id, error)
+        frame.node.add(elapsed_ns, elapsed_ns - frame.child_ns)
+        if frame.parent is not None:
+            frame.parent.child_ns += elapsed_ns
+
+    def __enter__(self):
+        frame = self.open()
+        self._frames.set(self._frames.get() + (frame,))
+        return frame
+
+    def __exit__(self, exc_type, error, traceback):
+        frames = self._frames.get()
+        self._frames.set(frames[:-1])
+        self.close(frames[-1], error)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, error, traceback):
+        self.__exit__(exc_type, error, traceback)
+
+    def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                frame = self.open()
+                try:
+                    func_output = await func(*args, **kwargs)
+                except BaseException as error:
+                    self.close(frame, error)
+                    raise
+                self.close(frame)
+                return func_output
+
+        elif inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                frame = self.open()
+                _current.reset(frame.token)
+                inner, agen = frame, func(*args, **kwargs)  # Innermost span open in the generator body.
+                value, error = None, None
+                try:
+                    while True:
+                        token = _current.set(inner)
+                        try:
+                            item = await (agen.asend(value) if error is None else agen.athrow(error))
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            inner = _current.get()
+                            _current.reset(token)
+                        try:
+                            value, error = (yield item), None
+                        except GeneratorExit:
+                            await agen.aclose()
+                            raise
+                        except BaseException as exc:
+                            value, error = None, exc
+                except BaseException as failure:
+                    self.close(frame, failure)
+                    raise
+                self.close(frame)
+
+        elif inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                frame = self.open()
+                _current.reset(frame.token)
+                inner, iterator = frame, func(*args, **kwargs)
+                value, error = None, None
+                try:
+                    while True:
+                        token = _current.set(inner)
+                        try:
+                            item = iterator.send(value) if error is None else iterator.throw(error)
+                        except StopIteration as stop:
+                            result = stop.value
+                            break
+                        finally:
+                            inner = _current.get()
+                            _current.reset(token)
+                        try:
+                            value, error = (yield item), None
+                        except GeneratorExit:
+                            iterator.close()
+                            raise
+                        except BaseException as exc:
+                            value, error = None, exc
+                except BaseException as failure:
+                    self.close(frame, failure)
+                    raise
+                self.close(frame)
+                return result
+
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                frame = self.open()
+                try:
+                    func_output = func(*args, **kwargs)
+                except BaseException as error:
+                    self.close(frame, error)
+                    raise
+                self.close(frame)
+                return func_output
+
+        return wrapper
@@ -0,0 +1,121 @@
+"""
+Running aggregates of look times, see Watch.stats.
+
+RunningStats keeps the count, sum, mean, variance, minimum and maximum of a stream of values, and the look ids of the
+extremes, in constant memory. Values are added one at a time or as a numpy array, and aggregates kept apart, in other
+threads or processes, are merged exactly, so reading a watch's statistics never iterates over its looks.
+"""
+import math
+import attr
+
+
+@attr.s(slots=True)
+class RunningStats:
+    """
+    Constant time aggregates over a stream of look times. Mean and variance are kept with Welford's algorithm.
+    """
+    count = attr.ib(type=int, default=0)  #: Number of values seen.
+    total = attr.ib(type=float, default=0.0)  #: Sum of values seen.
+    mean = attr.ib(type=float, default=0.0)  #: Running mean.
+    m2 = attr.ib(type=float, default=0.0)  #: Running sum of squared differences from the mean.
+    min = attr.ib(type=float, default=None)  #: Smallest value seen.
+    min_id = attr.ib(default=None)  #: Look id of the smallest value.
+    max = attr.ib(type=float, default=None)  #: Largest value seen.
+    max_id = attr.ib(default=None)  #: Look id of the largest value.
+
+    def add(self, value, look_id=None):
+        """
+        Folds a single value into the aggregates.
+        :param value:
+        :param look_id:
+        :return:
+        """
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+            self.min_id = look_id
+        if self.max is None or value > self.max:
+            self.max = value
+            self.max_id = look_id
+
+    def add_many(self, values, look_ids=None):
+        """
+        Folds an array of values, with their aligned look ids, into the aggregates in one vectorized pass.
+        :param values: np.ndarray
+        :param look_ids: sequence of look ids aligned with values.
+        :return:
+        """
+        if not len(values):
+            return
+        batch_mean = float(values.mean())
+        i_min = int(values.argmin())
+        i_max = int(values.argmax())
+        self.merge(RunningStats(
+            count=len(values),
+            total=float(values.sum()),
+            mean=batch_mean,
+            m2=float(((values - batch_mean) ** 2).sum()),
+            min=float(values[i_min]),
+            min_id=None if look_ids is None else look_ids[i_min],
+            max=float(values[i_max]),
+            max_id=None if look_ids is None else look_ids[i_max],
+        ))
+
+    def merge(self, other: 'RunningStats'):
+        """
+        Folds the aggregates of other into these ones (Chan et al. parallel variance).
+        :param other:
+        :return: self
+        """
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+            self.min_id = other.min_id
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+            self.max_id = other.max_id
+        return self
+
+    @property
+    def variance(self):
+        """
+        Sample variance of the values seen.
+        :return: float
+        """
+        if self.count < 2:
+            return math.nan
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self):
+        """
+        Sample standard deviation of the values seen.
+        :return: float
+        """
+        return math.sqrt(self.variance)
+
+    def copy(self):
+        """
+        Returns an independent copy of the aggregates.
+        :return: RunningStats
+        """
+        return attr.evolve(self)
+
+    def reset(self):
+        """
+        Drops every aggregate.
+        :return:
+        """
+        self.count, self.total, self.mean, self.m2 = 0, 0.0, 0.0, 0.0
+        self.min = self.min_id = self.max = self.max_id = None
@@ -0,0 +1,1018 @@
+"""
+Storage backends of a Watch's looks, see Watch(storage=...).
+
+DictLooks keeps a Look object per look, along with any captured arguments. ColumnarLooks keeps closed looks as typed
+arrays of ids and integer clock readings, folded into the watch's aggregates in vectorized batches. MappedLooks reads
+the columns of a loaded recording in place. All three share the same reading interface: stats, columns(), ids(),
+times(), readings() and export().
+"""
+import uuid
+import weakref
+import functools
+import itertools
+import threading
+import collections
+import attr
+from array import array
+from collections.abc import Mapping, MutableMapping
+from glance.stats import RunningStats
+from glance.sampling import CallCounter
+from glance.clock import DEFAULT_CLOCK, NS_PER_SECOND
+from glance.errors import (
+    GlanceLookClosedError,
+    GlanceLookNotFoundError,
+    GlanceReadOnlyError,
+)
+
+
+def _merged_stats(stats, ids, new_ids):
+    """
+    Copy of stats, aggregated over looks with the given ids, referring to the looks by their new ids instead.
+    """
+    def new_id(look_id):
+        try:
+            return new_ids[ids.index(look_id)]
+        except (ValueError, TypeError):
+            return None
+    return attr.evolve(stats, min_id=new_id(stats.min_id), max_id=new_id(stats.max_id))
+
+
+class _Outbox:
+    """
+    LookBatches of a store waiting to be handed to its sinks. Batches are queued while holding the store's lock and
+    submitted, in order, once it is released, so a sink waiting for room in its queue never holds the store's lock.
+    """
+    def __init__(self, sinks: list):
+        self.sinks = sinks
+        self._batches = collections.deque()
+        self._lock = threading.Lock()  #: Held while submitting, so batches reach the sinks in order.
+
+    def put(self, batch):
+        self._batches.append(batch)
+
+    def submit(self):
+        """
+        Hands every queued batch to the sinks.
+        :return:
+        """
+        if not self._batches:
+            return
+        with self._lock:
+            while self._batches:
+                batch = self._batches.popleft()
+                for submit in self.sinks:
+                    submit(batch)
+
+
+class DictLooks(MutableMapping):
+    """
+    Default storage for a Watch. Keeps every Look object in a dictionary keyed by Look.id.
+
+    Aggregates are updated as looks are added closed or stopped. Changing the times of a look that is already stored
+    is not tracked, deleting or replacing a look causes the aggregates to be rebuilt from the stored looks on next
+    access. Every mutation and read holds the store's lock, so looks can be started and stopped from several threads.
+    """
+    def __init__(self, looks=None, target: str = None, expected_args=None, retention=None, sketch=None,
+                 clock=DEFAULT_CLOCK, window=None, histogram=None):
+        self.target = target
+        self.expected_args = expected_args
+        self.clock = clock
+        self.retention = retention  #: Retention policy for closed looks, None keeps them all.
+        self.sketch = sketch  #: Optional QuantileSketch fed with every closed look.
+        self.window = window  #: Optional RollingWindow fed with every closed look.
+        self.histogram = histogram  #: Optional Histogram fed with every closed look.
+        self.lock = threading.RLock()  #: Held while the looks, aggregates or sketch change or are read.
+        self.sinks = []  #: Callables, such as Exporter.submit, handed a LookBatch of every closed look.
+        self._outbox = _Outbox(self.sinks)
+        self._looks = {}
+        self._open = set()  #: Ids of the open looks.
+        self._stats = RunningStats()
+        self._stale = False
+        self._kept = []
+        self._seen = 0
+        for look_id, look in (looks or {}).items():
+            self[look_id] = look
+
+    def __getitem__(self, look_id):
+        return self._looks[look_id]
+
+    def __setitem__(self, look_id, look):
+        with self.lock:
+            if look_id in self._looks:
+                self._stale = True
+            self._looks[look_id] = look
+            if look.is_done:
+                if not self._stale:
+                    self._add(look_id, look)
+                self._export(look_id, look)
+                self._retain(look_id)
+            else:
+                self._open.add(look_id)
+                look._on_stop = functools.partial(self._look_stopped, look_id)
+        self._outbox.submit()
+
+    def __delitem__(self, look_id):
+        with self.lock:
+            del self._looks[look_id]
+            self._open.discard(look_id)
+            self._stale = True
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self._looks))
+
+    def __len__(self):
+        return len(self._looks)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._looks!r})"
+
+    def start(self, parent: tuple = None):
+        """
+        Starts a new Look and stores it.
+        :param parent: (target, look id) of the look of the span it is started in, see Look.parent.
+        :return: str of Look.id
+        """
+        from glance.glance import Look
+        look = Look(self.target, expected_args=self.expected_args, clock=self.clock, parent=parent)
+        self[look.id] = look
+        return look.id
+
+    def _look_stopped(self, look_id, look):
+        with self.lock:
+            self._open.discard(look_id)
+            if self._looks.get(look_id) is look:
+                if not self._stale:
+                    self._add(look_id, look)
+                self._export(look_id, look)
+                self._retain(look_id)
+        self._outbox.submit()
+
+    def _add(self, look_id, look):
+        look_time = (look.end_ns - look.start_ns) / NS_PER_SECOND  # Skips the per-access cost of the variants.
+        self._stats.add(look_time, look_id)
+        if self.sketch is not None:
+            self.sketch.add(look_time)
+        if self.window is not None:
+            self.window.add(look.end_ns, look_time, look_id)
+        if self.histogram is not None:
+            self.histogram.add(look_time)
+
+    @property
+    def open_count(self):
+        """
+        Number of open looks.
+        :return: int
+        """
+        return len(self._open)
+
+    @property
+    def in_flight(self):
+        """
+        Number of looks started and not yet closed, the open looks.
+        :return: int
+        """
+        return len(self._open)
+
+    def _export(self, look_id, look):
+        if not self.sinks:
+            return
+        from glance.sinks import LookBatch
+        batch = LookBatch(
+            self.target,
+            [look_id],
+            array('q', [look.start_ns]),
+            array('q', [look.end_ns]),
+            self.clock.epoch_ns - self.clock.anchor_ns,
+        )
+        self._outbox.put(batch)
+
+    def _retain(self, look_id):
+        if self.retention is None:
+            return
+        slot = self.retention.slot(self._seen, len(self._kept))
+        self._seen += 1
+        if slot == len(self._kept):
+            self._kept.append(look_id)
+        elif slot >= 0:
+            self._looks.pop(self._kept[slot], None)
+            self._kept[slot] = look_id
+        else:
+            del self._looks[look_id]
+
+    @property
+    def stats(self):
+        """
+        Snapshot of the running aggregates over the closed looks.
+        :return: RunningStats
+        """
+        with self.lock:
+            self.fold()
+            return self._stats.copy()
+
+    def aggregates(self):
+        """
+        Returns a consistent snapshot of the running aggregates and histogram over the closed looks.
+        :return: (RunningStats, Histogram or None)
+        """
+        with self.lock:
+            self.fold()
+            return self._stats.copy(), None if self.histogram is None else self.histogram.copy()
+
+    def fold(self):
+        """
+        Rebuilds the aggregates, sketch and window from the stored looks if a stored look was deleted or replaced.
+        :return:
+        """
+        with self.lock:
+            if self._stale:
+                self._stats.reset()
+                if self.sketch is not None:
+                    self.sketch.reset()
+                if self.window is not None:
+                    self.window.reset()
+                if self.histogram is not None:
+                    self.histogram.reset()
+                for look_id, look in self._looks.items():
+                    if look.is_done:
+                        self._add(look_id, look)
+                self._stale = False
+
+    def stop(self, look_id):
+        """
+        Stops the Look with the given id.
+        :param look_id:
+        :return:
+        """
+        look = self._looks.get(look_id)
+        if look is None:
+            raise GlanceLookNotFoundError(look_id)
+        look.stop()
+
+    def discard(self, look_id):
+        """
+        Closes the open Look with the given id without keeping it, see Watch.fail_look().
+        :param look_id:
+        :return: int start clock reading of the look
+        """
+        with self.lock:
+            look = self._looks.get(look_id)
+            if look is None:
+                raise GlanceLookNotFoundError(look_id)
+            if look.is_done:
+                raise GlanceLookClosedError(look)
+            del self._looks[look_id]
+            self._open.discard(look_id)
+        return look.start_ns
+
+    def stop_all(self):
+        """
+        Stops every open Look.
+        :return:
+        """
+        for look in list(self._looks.values()):
+            if not look.is_done:
+                look.stop()
+
+    def columns(self):
+        """
+        Returns a consistent snapshot of the ids and look times, in seconds, of all closed looks, in insertion order.
+        :return: (list, np.ndarray)
+        """
+        import numpy as np
+        with self.lock:
+            closed = [(look_id, look) for look_id, look in self._looks.items() if look.is_done]
+        ids = [look_id for look_id, _ in closed]
+        times = np.fromiter(((look.end_ns - look.start_ns) / NS_PER_SECOND for _, look in closed), dtype=float)
+        return ids, times
+
+    def ids(self):
+        """
+        Returns the ids of all closed looks, in insertion order.
+        :return: list
+        """
+        return self.columns()[0]
+
+    def times(self):
+        """
+        Returns the look time, in seconds, of every closed look, aligned with ids().
+        :return: np.ndarray
+        """
+        return self.columns()[1]
+
+    def readings(self):
+        """
+        Returns the start and end clock readings of all closed looks, in insertion order.
+        :return: (np.ndarray, np.ndarray) of int64
+        """
+        import numpy as np
+        with self.lock:
+            closed = [look for look in self._looks.values() if look.is_done]
+        start_ns = np.fromiter((look.start_ns for look in closed), dtype=np.int64, count=len(closed))
+        end_ns = np.fromiter((look.end_ns for look in closed), dtype=np.int64, count=len(closed))
+        return start_ns, end_ns
+
+    def parents(self):
+        """
+        Returns the parent of every closed look, aligned with ids(), see Look.parent.
+        :return: list of (target, look id) or None
+        """
+        with self.lock:
+            return [look.parent for look in self._looks.values() if look.is_done]
+
+    def export(self, reset: bool = False):
+        """
+        Returns a consistent snapshot of the closed looks, as aligned ids and start and end clock readings, with a copy
+        of their aggregates and sketch. With reset, the closed looks, aggregates and sketch are then dropped.
+        :param reset:
+        :return: (list, array, array, RunningStats, QuantileSketch)
+        """
+        with self.lock:
+            stats = self.stats
+            closed = [(look_id, look) for look_id, look in self._looks.items() if look.is_done]
+            sketch = None if self.sketch is None else self.sketch.copy()
+            if reset:
+                for look_id, _ in closed:
+                    del self._looks[look_id]
+                self._stats.reset()
+                if self.sketch is not None:
+                    self.sketch.reset()
+                if self.histogram is not None:
+                    self.histogram.reset()
+                self._stale = False
+                self._kept = []
+                self._seen = 0
+        return (
+            [look_id for look_id, _ in closed],
+            array('q', [look.start_ns for _, look in closed]),
+            array('q', [look.end_ns for _, look in closed]),
+            stats,
+            sketch,
+        )
+
+    def extend(self, ids, start_ns, end_ns, stats, sketch=None):
+        """
+        Adds closed looks recorded elsewhere, such as in another process, under new ids.
+        :param ids: original ids of the looks.
+        :param start_ns: np.ndarray of start readings of the looks, on this store's clock.
+        :param end_ns: np.ndarray of end readings of the looks, on this store's clock.
+        :param stats: RunningStats over the looks, including any that were not kept.
+        :param sketch: QuantileSketch of the looks, if any.
+        :return: list of the new ids
+        """
+        from glance.glance import Look
+        new_ids = [str(uuid.uuid4()) for _ in range(len(ids))]
+        with self.lock:
+            for look_id, start, end in zip(new_ids, start_ns.tolist(), end_ns.tolist()):
+                self._looks[look_id] = Look(
+                    self.target,
+                    expected_args=self.expected_args,
+                    id=look_id,
+                    start_ns=start,
+                    end_ns=end,
+                    clock=self.clock,
+                )
+                self._retain(look_id)
+            if not self._stale:
+                self._stats.merge(_merged_stats(stats, ids, new_ids))
+                if self.sketch is not None:
+                    if sketch is not None:
+                        self.sketch.merge(sketch)
+                    else:
+                        self.sketch.add_many((end_ns - start_ns) / NS_PER_SECOND)
+                if self.histogram is not None:
+                    self.histogram.add_many((end_ns - start_ns) / NS_PER_SECOND)
+        return new_ids
+
+
+class _ThreadBuffer(threading.local):
+    """
+    Per-thread pending list of a ColumnarLooks, registered with the store the first time a thread uses it.
+    """
+    def __init__(self, register):
+        self.pending = []
+        register(threading.current_thread(), self.pending)
+
+
+class ColumnarLooks(Mapping):
+    """
+    Array backed storage for a Watch. Start and end clock readings of closed looks are kept, in integer nanoseconds,
+    in typed arrays next to integer look ids. Look objects are only created when a look is indexed.
+
+    Closing a look only appends to the arrays. Aggregates, the sketch and the retention policy are brought up to date
+    with one vectorized fold over the looks appended since the last fold, whenever the store is read (or, with a
+    retention policy or sinks, every fold_size looks). Each fold's looks are handed to the sinks in one batch. The
+    Glance.watch fast path goes one step further and appends raw clock readings to pending lists, either one shared
+    list or one list per thread. Each list is drained into the arrays by its writer every fold_size looks, and all of
+    them are drained before every fold. Looks started in a span keep its look as their parent in two more columns,
+    parent_ids and parent_codes, see parents().
+
+    The arrays, aggregates and sketch only change while holding the store's lock, which the fast path only takes when
+    draining. Readers get consistent snapshots from stats, columns() and times().
+    """
+    fold_size = 4096  #: Looks buffered between drains of a pending list, and between folds with retention or sinks.
+
+    def __init__(self, target: str = None, expected_args=None, retention=None, sketch=None, clock=DEFAULT_CLOCK,
+                 window=None, histogram=None):
+        self.target = target
+        self.expected_args = expected_args
+        self.clock = clock
+        self.retention = retention  #: Retention policy for closed looks, None keeps them all.
+        self.sketch = sketch  #: Optional QuantileSketch fed with every closed look.
+        self.window = window  #: Optional RollingWindow fed with every closed look.
+        self.histogram = histogram  #: Optional Histogram fed with every closed look.
+        self.lock = threading.RLock()  #: Held while the arrays, aggregates or sketch change or are read.
+        self.sinks = []  #: Callables, such as Exporter.submit, handed a LookBatch of the looks of every fold.
+        self._outbox = _Outbox(self.sinks)
+        self.look_ids = array('q')  #: Ids of closed looks.
+        self.start_ns = array('q')  #: Start clock readings of closed looks.
+        self.end_ns = array('q')  #: End clock readings of closed looks.
+        self.parent_ids = array('q')  #: Look id of the span each closed look ran in, -1 outside spans.
+        self.parent_codes = array('I')  #: Index in parent_targets of the watch of that span, 0 outside spans.
+        self.parent_targets = [None]  #: Targets of the watches of the spans closed looks ran in.
+        self._parent_codes = {None: 0}  #: Index of every target in parent_targets.
+        self._open = {}  #: Start clock readings of open looks keyed by id.
+        self._parents = {}  #: (target, look id) of the span of every open look started in one, keyed by id.
+        self._counter = itertools.count()
+        self._stats = RunningStats()
+        self._folded = 0  #: Number of array entries already folded into the aggregates.
+        self._seen = 0  #: Number of closed looks offered to the retention policy.
+        self.fast_paths = 0  #: Number of fast paths handed out, whose calls never open a look.
+        self.entered = CallCounter()  #: Calls entering a fast path, see in_flight.
+        self.failed = CallCounter()  #: Calls leaving a fast path by raising, see in_flight.
+        self._drained = 0  #: Number of looks moved from the pending lists into the arrays.
+        self._pending = []  #: Shared flat [start_ns, end_ns, ...] readings of closed looks not yet in the arrays.
+        self._buffers = [(None, self._pending)]  #: (thread weakref, pending list) of every pending list.
+        self._thread_buffer = _ThreadBuffer(self._register)
+
+    def _register(self, thread, pending):
+        with self.lock:
+            self._buffers.append((weakref.ref(thread), pending))
+
+    @property
+    def stats(self):
+        """
+        Snapshot of the running aggregates over the closed looks.
+        :return: RunningStats
+        """
+        with self.lock:
+            self.fold()
+            return self._stats.copy()
+
+    def aggregates(self):
+        """
+        Returns a consistent snapshot of the running aggregates and histogram over the closed looks.
+        :return: (RunningStats, Histogram or None)
+        """
+        with self.lock:
+            self.fold()
+            return self._stats.copy(), None if self.histogram is None else self.histogram.copy()
+
+    def fold(self):
+        """
+        Drains every pending list, then folds the looks appended since the last fold into the aggregates and sketch and
+        applies the retention policy to them. Their batch is handed to the sinks once the store's lock is released.
+        :return:
+        """
+        self._fold()
+        self._outbox.submit()
+
+    def _fold(self):
+        with self.lock:
+            self._drain_all()
+            start = self._folded
+            if start == len(self.look_ids):
+                return
+            import numpy as np
+            look_ids = np.frombuffer(self.look_ids, dtype=np.int64)[start:].tolist()
+            start_ns = np.frombuffer(self.start_ns, dtype=np.int64)[start:]
+            end_ns = np.frombuffer(self.end_ns, dtype=np.int64)[start:]
+            times = (end_ns - start_ns) / NS_PER_SECOND
+            self._stats.add_many(times, look_ids)
+            if self.sketch is not None:
+                self.sketch.add_many(times)
+            if self.window is not None:
+                self.window.add_many(end_ns, times, look_ids)
+            if self.histogram is not None:
+                self.histogram.add_many(times)
+            del start_ns, end_ns  # Release the buffer views so the arrays can be resized.
+            if self.sinks:
+                self._export(start)
+            if self.retention is not None:
+                self._retain(start)
+            self._folded = len(self.look_ids)
+
+    def _export(self, start):
+        from glance.sinks import LookBatch
+        batch = LookBatch(
+            self.target,
+            self.look_ids[start:],
+            self.start_ns[start:],
+            self.end_ns[start:],
+            self.clock.epoch_ns - self.clock.anchor_ns,
+        )
+        self._outbox.put(batch)
+
+    def _retain(self, start):
+        columns = (self.look_ids, self.start_ns, self.end_ns, self.parent_ids, self.parent_codes)
+        pending = list(zip(*(column[start:] for column in columns)))
+        for column in columns:
+            del column[start:]
+        for row in pending:
+            kept = len(self.look_ids)
+            slot = self.retention.slot(self._seen, kept)
+            self._seen += 1
+            if slot == kept:
+                for column, value in zip(columns, row):
+                    column.append(value)
+            elif slot >= 0:
+                for column, value in zip(columns, row):
+                    column[slot] = value
+
+    def _index(self, look_id):
+        self.fold()
+        n = len(self.look_ids)
+        if isinstance(look_id, int) and look_id < n and self.look_ids[look_id] == look_id:
+            return look_id
+        try:
+            return self.look_ids.index(look_id)
+        except (ValueError, TypeError):
+            raise KeyError(look_id)
+
+    def __getitem__(self, look_id):
+        from glance.glance import Look
+        with self.lock:
+            if look_id in self._open:
+                look = Look(
+                    self.target,
+                    expected_args=self.expected_args,
+                    id=look_id,
+                    start_ns=self._open[look_id],
+                    clock=self.clock,
+                    parent=self._parents.get(look_id),
+                )
+                look._on_stop = functools.partial(self._look_stopped, look_id)
+                return look
+            i = self._index(look_id)
+            return Look(
+                self.target,
+                expected_args=self.expected_args,
+                id=look_id,
+                start_ns=self.start_ns[i],
+                end_ns=self.end_ns[i],
+                clock=self.clock,
+                parent=self._parent(i),
+            )
+
+    def _parent(self, i):
+        code = self.parent_codes[i]
+        return None if not code else (self.parent_targets[code], self.parent_ids[i])
+
+    def __contains__(self, look_id):
+        if look_id in self._open:
+            return True
+        try:
+            self._index(look_id)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        with self.lock:
+            self.fold()
+            return iter(self.look_ids.tolist() + list(self._open))
+
+    def __len__(self):
+        with self.lock:
+            self.fold()
+            return len(self.look_ids) + len(self._open)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(closed={len(self.look_ids)}, open={len(self._open)})"
+
+    @property
+    def open_count(self):
+        """
+        Number of open looks. Calls of the Glance.watch fast path never open a look, see fast_paths.
+        :return: int
+        """
+        return len(self._open)
+
+    @property
+    def in_flight(self):
+        """
+        Number of looks started and not yet closed: the open looks, and the calls of the Glance.watch fast path that
+        entered it and neither raised nor appended their clock readings to a pending list yet.
+        :return: int
+        """
+        entered = self.entered.value
+        with self.lock:
+            closed = self._drained + sum(len(pending) // 2 for _, pending in self._buffers)
+            running = entered - closed - self.failed.value
+            return len(self._open) + max(running, 0)
+
+    def start(self, parent: tuple = None):
+        """
+        Opens a new look.
+        :param parent: (target, look id) of the look of the span it is started in, see Look.parent.
+        :return: int look id
+        """
+        look_id = next(self._counter)
+        if parent is not None:
+            self._parents[look_id] = parent
+        self._open[look_id] = self.clock.now()
+        return look_id
+
+    def stop(self, look_id):
+        """
+        Closes the look with the given id, moving it into the arrays.
+        :param look_id:
+        :return:
+        """
+        end_ns = self.clock.now()
+        try:
+            start_ns = self._open.pop(look_id)
+        except KeyError:
+            if look_id in self:
+                raise GlanceLookClosedError(self[look_id])
+            raise GlanceLookNotFoundError(look_id)
+        self.append(look_id, start_ns, end_ns, self._parents.pop(look_id, None))
+
+    def _look_stopped(self, look_id, look):
+        """
+        Closes an open look stopped through the Look returned by indexing the store.
+        """
+        if self._open.pop(look_id, None) is None:
+            raise GlanceLookClosedError(look)
+        self.append(look_id, look.start_ns, look.end_ns, self._parents.pop(look_id, None))
+
+    def discard(self, look_id):
+        """
+        Closes the open look with the given id without keeping it, see Watch.fail_look().
+        :param look_id:
+        :return: int start clock reading of the look
+        """
+        try:
+            start_ns = self._open.pop(look_id)
+        except KeyError:
+            if look_id in self:
+                raise GlanceLookClosedError(self[look_id])
+            raise GlanceLookNotFoundError(look_id)
+        self._parents.pop(look_id, None)
+        return start_ns
+
+    def stop_all(self):
+        """
+        Closes every open look.
+        :return:
+        """
+        for look_id in list(self._open):
+            self.stop(look_id)
+
+    def append(self, look_id: int, start_ns: int, end_ns: int, parent: tuple = None):
+        """
+        Appends a closed look to the arrays.
+        :param look_id:
+        :param start_ns: clock reading at the start of the look.
+        :param end_ns: clock reading at the end of the look.
+        :param parent: (target, look id) of the look of the span it ran in, see Look.parent.
+        :return:
+        """
+        with self.lock:
+            self.look_ids.append(look_id)
+            self.start_ns.append(start_ns)
+            self.end_ns.append(end_ns)
+            if parent is None:
+                self.parent_ids.append(-1)
+                self.parent_codes.append(0)
+            else:
+                target, parent_id = parent
+                self.parent_ids.append(parent_id)
+                self.parent_codes.append(self._parent_code(target))
+            if (self.retention is not None or self.sinks) and len(self.look_ids) - self._folded >= self.fold_size:
+                self._fold()
+        self._outbox.submit()
+
+    def _parent_code(self, target):
+        code = self._parent_codes.get(target)
+        if code is None:
+            code = self._parent_codes[target] = len(self.parent_targets)
+            self.parent_targets.append(target)
+        return code
+
+    def record(self, start_ns: int, end_ns: int):
+        """
+        Appends a closed look under the next sequential id.
+        :param start_ns:
+        :param end_ns:
+        :return: int look id
+        """
+        look_id = next(self._counter)
+        self.append(look_id, start_ns, end_ns)
+        return look_id
+
+    def _drain(self, pending):
+        # A writer may have appended the start of a look but not yet its end, leave it for the next drain.
+        n = len(pending) // 2 * 2
+        if not n:
+            return
+        import numpy as np
+        readings = np.array(pending[:n], dtype=np.int64).reshape(-1, 2)
+        del pending[:n]
+        self._drained += n // 2
+        self.look_ids.fromlist(list(itertools.islice(self._counter, n // 2)))
+        self.start_ns.frombytes(readings[:, 0].tobytes())
+        self.end_ns.frombytes(readings[:, 1].tobytes())
+        self.parent_ids.extend(array('q', [-1]) * (n // 2))
+        self.parent_codes.extend(array('I', [0]) * (n // 2))
+
+    def _drain_all(self):
+        alive = []
+        for thread, pending in self._buffers:
+            self._drain(pending)
+            if thread is None or pending or thread() is not None:
+                alive.append((thread, pending))
+        self._buffers = alive
+
+    def drain(self, pending: list = None):
+        """
+        Moves the readings of the given pending list, or of every pending list, into the arrays giving each look the
+        next sequential id.
+        :param pending:
+        :return:
+        """
+        with self.lock:
+            if pending is None:
+                self._drain_all()
+            else:
+                self._drain(pending)
+            if (self.retention is not None or self.sinks) and len(self.look_ids) - self._folded >= self.fold_size:
+                self._fold()
+        self._outbox.submit()
+
+    def fast_path(self):
+        """
+        Returns (pending, drain_at, drain) for the single threaded Glance.watch fast path. A closed look is recorded by
+        appending its start and end clock readings to the shared pending list, and calling drain(pending) once
+        len(pending) reaches drain_at. Every call ticks entered before starting, and failed if it raises, see in_flight.
+        :return: tuple
+        """
+        self.fast_paths += 1
+        return self._pending, 2 * self.fold_size, self.drain
+
+    def thread_fast_path(self):
+        """
+        Returns (buffer, drain_at, drain) for the thread safe Glance.watch fast path. Same as fast_path(), except the
+        pending list is buffer.pending, a list private to the calling thread.
+        :return: tuple
+        """
+        self.fast_paths += 1
+        return self._thread_buffer, 2 * self.fold_size, self.drain
+
+    def columns(self):
+        """
+        Returns a consistent snapshot of the ids and look times, in seconds, of all closed looks.
+        :return: (array, np.ndarray)
+        """
+        import numpy as np
+        with self.lock:
+            self.fold()
+            times = np.frombuffer(self.end_ns, dtype=np.int64) - np.frombuffer(self.start_ns, dtype=np.int64)
+            return array('q', self.look_ids), times / NS_PER_SECOND
+
+    def ids(self):
+        """
+        Returns a snapshot of the ids of all closed looks.
+        :return: array
+        """
+        with self.lock:
+            self.fold()
+            return array('q', self.look_ids)
+
+    def times(self):
+        """
+        Returns the look time, in seconds, of every closed look, aligned with ids().
+        :return: np.ndarray
+        """
+        import numpy as np
+        with self.lock:
+            self.fold()
+            times = np.frombuffer(self.end_ns, dtype=np.int64) - np.frombuffer(self.start_ns, dtype=np.int64)
+            return times / NS_PER_SECOND
+
+    def readings(self):
+        """
+        Returns copies of the start and end clock readings of all closed looks, copied so the store can keep growing.
+        :return: (np.ndarray, np.ndarray) of int64
+        """
+        import numpy as np
+        with self.lock:
+            self.fold()
+            start_ns = np.frombuffer(self.start_ns, dtype=np.int64).copy()
+            return start_ns, np.frombuffer(self.end_ns, dtype=np.int64).copy()
+
+    def parents(self):
+        """
+        Returns the parent of every closed look, aligned with ids(), see Look.parent.
+        :return: list of (target, look id) or None
+        """
+        with self.lock:
+            self.fold()
+            return [self._parent(i) for i in range(len(self.look_ids))]
+
+    def export(self, reset: bool = False):
+        """
+        Returns a consistent snapshot of the closed looks, as aligned ids and start and end clock readings, with a copy
+        of their aggregates and sketch. With reset, the closed looks, aggregates and sketch are then dropped.
+        :param reset:
+        :return: (array, array, array, RunningStats, QuantileSketch)
+        """
+        with self.lock:
+            self.fold()
+            exported = (
+                array('q', self.look_ids),
+                array('q', self.start_ns),
+                array('q', self.end_ns),
+                self._stats.copy(),
+                None if self.sketch is None else self.sketch.copy(),
+            )
+            if reset:
+                del self.look_ids[:], self.start_ns[:], self.end_ns[:], self.parent_ids[:], self.parent_codes[:]
+                self._stats.reset()
+                if self.sketch is not None:
+                    self.sketch.reset()
+                if self.histogram is not None:
+                    self.histogram.reset()
+                self._folded = 0
+                self._seen = 0
+        return exported
+
+    def extend(self, ids, start_ns, end_ns, stats, sketch=None):
+        """
+        Adds closed looks recorded elsewhere, such as in another process, under the next sequential ids.
+        :param ids: original ids of the looks.
+        :param start_ns: np.ndarray of start readings of the looks, on this store's clock.
+        :param end_ns: np.ndarray of end readings of the looks, on this store's clock.
+        :param stats: RunningStats over the looks, including any that were not kept.
+        :param sketch: QuantileSketch of the looks, if any.
+        :return: list of the new ids
+        """
+        import numpy as np
+        with self.lock:
+            self.fold()
+            start = len(self.look_ids)
+            new_ids = list(itertools.islice(self._counter, len(ids)))
+            self.look_ids.fromlist(new_ids)
+            self.start_ns.frombytes(start_ns.astype(np.int64).tobytes())
+            self.end_ns.frombytes(end_ns.astype(np.int64).tobytes())
+            self.parent_ids.extend(array('q', [-1]) * len(new_ids))
+            self.parent_codes.extend(array('I', [0]) * len(new_ids))
+            self._stats.merge(_merged_stats(stats, ids, new_ids))
+            if self.sketch is not None:
+                if sketch is not None:
+                    self.sketch.merge(sketch)
+                else:
+                    self.sketch.add_many((end_ns - start_ns) / NS_PER_SECOND)
+            if self.histogram is not None:
+                self.histogram.add_many((end_ns - start_ns) / NS_PER_SECOND)
+            if self.retention is not None:
+                self._retain(start)
+            self._folded = len(self.look_ids)
+        return new_ids
+
+
+class MappedLooks(Mapping):
+    """
+    Read only storage for a Watch loaded from a recording file, see glance.recording. Look ids, clock readings and
+    look times are numpy views over the memory mapped file, so nothing is read until used and recordings larger than
+    memory can be analysed. Aggregates and the sketch come precomputed from the file.
+    """
+    def __init__(self, look_ids, start_ns, end_ns, times, stats, sketch=None, target: str = None,
+                 expected_args=None, clock=DEFAULT_CLOCK):
+        self.target = target
+        self.expected_args = expected_args
+        self.clock = clock
+        self.retention = None
+        self.sketch = sketch
+        self.histogram = None
+        self.open_count = 0
+        self.in_flight = 0
+        self.lock = threading.RLock()
+        self.look_ids = look_ids  #: np.ndarray of look ids.
+        self.start_ns = start_ns  #: np.ndarray of start clock readings.
+        self.end_ns = end_ns  #: np.ndarray of end clock readings.
+        self._times = times
+        self._stats = stats
+
+    @property
+    def stats(self):
+        """
+        Snapshot of the aggregates over the looks.
+        :return: RunningStats
+        """
+        return self._stats.copy()
+
+    def aggregates(self):
+        """
+        Returns a snapshot of the aggregates over the looks, recordings keep no histogram.
+        :return: (RunningStats, None)
+        """
+        return self._stats.copy(), None
+
+    def fold(self):
+        pass
+
+    def _index(self, look_id):
+        import numpy as np
+        if isinstance(look_id, int) and 0 <= look_id < len(self.look_ids) and self.look_ids[look_id] == look_id:
+            return look_id
+        indices = np.flatnonzero(self.look_ids == look_id)
+        if not len(indices):
+            raise KeyError(look_id)
+        return int(indices[0])
+
+    def __getitem__(self, look_id):
+        from glance.glance import Look
+        i = self._index(look_id)
+        return Look(
+            self.target,
+            expected_args=self.expected_args,
+            id=look_id,
+            start_ns=int(self.start_ns[i]),
+            end_ns=int(self.end_ns[i]),
+            clock=self.clock,
+        )
+
+    def __contains__(self, look_id):
+        try:
+            self._index(look_id)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.look_ids.tolist())
+
+    def __len__(self):
+        return len(self.look_ids)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(closed={len(self.look_ids)})"
+
+    def start(self, parent: tuple = None):
+        raise GlanceReadOnlyError(self.target)
+
+    def stop(self, look_id):
+        raise GlanceReadOnlyError(self.target)
+
+    def discard(self, look_id):
+        raise GlanceReadOnlyError(self.target)
+
+    def stop_all(self):
+        pass
+
+    def extend(self, ids, start_ns, end_ns, stats, sketch=None):
+        raise GlanceReadOnlyError(self.target)
+
+    def export(self, reset: bool = False):
+        """
+        Returns copies of the looks' ids and clock readings, with a copy of their aggregates and sketch.
+        :param reset: not supported, the looks are read only.
+        :return: (array, array, array, RunningStats, QuantileSketch)
+        """
+        if reset:
+            raise GlanceReadOnlyError(self.target)
+        return (
+            array('q', self.look_ids.tobytes()),
+            array('q', self.start_ns.tobytes()),
+            array('q', self.end_ns.tobytes()),
+            self.stats,
+            None if self.sketch is None else self.sketch.copy(),
+        )
+
+    def columns(self):
+        """
+        Returns the ids and look times, in seconds, of all looks, as views over the file.
+        :return: (np.ndarray, np.ndarray)
+        """
+        return self.look_ids, self._times
+
+    def ids(self):
+        return self.look_ids
+
+    def parents(self):
+        """
+        Returns the parent of every look, recordings keep none.
+        :return: list of None
+        """
+        return [None] * len(self.look_ids)
+
+    def times(self):
+        return self._times
+
+    def readings(self):
+        """
+        Returns the start and end clock readings of all looks, as views over the file.
+        :return: (np.ndarray, np.ndarray)
+        """
+        return self.start_ns, self.end_ns
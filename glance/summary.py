@@ -0,0 +1,144 @@
+"""
+Cross-watch summary of a Glance, see Glance.summary() and Glance.top_k().
+
+Every row is read from the watch's running aggregates, which only fold the looks closed since the previous read, and
+percentiles from its sketch when it keeps one, so summarizing never rescans the stored looks of sketched watches.
+"""
+import heapq
+import attr
+from glance.errors import GlanceWatchEmptyError
+
+_LEADING = ("watch", "count", "total", "share", "mean")
+_TRAILING = ("max", "throughput")
+BASE_COLUMNS = _LEADING + _TRAILING  #: Columns of every summary, the percentile columns going between mean and max.
+
+
+def _percentile_column(q):
+    return f"p{q:g}"
+
+
+@attr.s
+class Summary:
+    """
+    Table of one row per watch, as tuples aligned with columns. Empty watches have None in their time columns, and
+    watches keeping neither a sketch nor looks in their percentile columns.
+    """
+    columns = attr.ib(type=tuple)
+    rows = attr.ib(type=list, factory=list)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _index(self, column: str):
+        try:
+            return self.columns.index(column)
+        except ValueError:
+            raise ValueError(f"Unknown summary column: {column}. Expected one of {self.columns}")
+
+    def sort(self, by: str = "total", reverse: bool = True):
+        """
+        Returns the table sorted by a column, largest first unless reverse is False. Rows without a value come last.
+        :param by: column name.
+        :param reverse:
+        :return: Summary
+        """
+        index = self._index(by)
+        present = [row for row in self.rows if row[index] is not None]
+        missing = [row for row in self.rows if row[index] is None]
+        return Summary(self.columns, sorted(present, key=lambda row: row[index], reverse=reverse) + missing)
+
+    def records(self):
+        """
+        Returns the rows as dicts keyed by column.
+        :return: list(dict)
+        """
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+    def format(self):
+        """
+        Returns the table as aligned text, times in seconds and share in percent.
+        :return: str
+        """
+        def cell(column, value):
+            if value is None:
+                return "-"
+            if column == "share":
+                return f"{value:.1%}"
+            if isinstance(value, float):
+                return f"{value:.4g}"
+            return str(value)
+
+        table = [self.columns]
+        table.extend(tuple(cell(column, value) for column, value in zip(self.columns, row)) for row in self.rows)
+        widths = [max(len(row[i]) for row in table) for i in range(len(self.columns))]
+        return "\n".join(
+            "  ".join([row[0].ljust(widths[0])] + [value.rjust(width) for value, width in zip(row[1:], widths[1:])])
+            for row in table
+        )
+
+
+def _aggregates(watch):
+    """
+    Returns the watch's target, count, total, mean and max look time, and throughput, 0 before its first call.
+    """
+    with watch.looks.lock:
+        stats = watch.looks.stats
+    throughput = watch.throughput() if watch.calls else 0.0
+    if not stats.count:
+        return watch.target, 0, 0.0, None, None, throughput
+    return watch.target, stats.count, stats.total, stats.mean, stats.max, throughput
+
+
+def _percentiles(watch, qs):
+    """
+    Returns the watch's percentiles for every q in qs, None for each when it keeps neither a sketch nor looks.
+    """
+    try:
+        return watch.percentiles(qs)
+    except GlanceWatchEmptyError:
+        return [None] * len(qs)
+
+
+def summary(watches, qs=(50, 90, 99)):
+    """
+    Returns the Summary of the given watches, unsorted.
+    :param watches: list(Watch)
+    :param qs: percentiles in [0, 100], one column each.
+    :return: Summary
+    """
+    qs = tuple(qs)
+    aggregates = [_aggregates(watch) for watch in watches]
+    grand_total = sum(total for _, _, total, _, _, _ in aggregates)
+    rows = []
+    for watch, (target, count, total, mean, maximum, throughput) in zip(watches, aggregates):
+        share = (total / grand_total if grand_total else 0.0) if count else None
+        percentiles = _percentiles(watch, qs) if count and qs else [None] * len(qs)
+        rows.append((target, count, total, share, mean, *percentiles, maximum, throughput))
+    return Summary(_LEADING + tuple(map(_percentile_column, qs)) + _TRAILING, rows)
+
+
+def top_k(watches, metric: str = "total", k: int = 10, largest: bool = True):
+    """
+    Returns the Summary of the k watches with the largest, or smallest, value of metric, selected with a heap in
+    O(watches * log k). Only the metric's percentile is computed when metric is one, such as "p99".
+    :param watches: list(Watch)
+    :param metric: a column of BASE_COLUMNS, other than "watch", or "p<q>".
+    :param k:
+    :param largest:
+    :return: Summary, in order.
+    """
+    if metric in BASE_COLUMNS and metric != "watch":
+        table = summary(watches, qs=())
+    elif metric.startswith("p"):
+        try:
+            q = float(metric[1:])
+        except ValueError:
+            raise ValueError(f"Unknown summary metric: {metric}")
+        table = summary(watches, qs=(q,))
+        metric = _percentile_column(q)
+    else:
+        raise ValueError(f"Unknown summary metric: {metric}. Expected one of {BASE_COLUMNS[1:]} or p<q>")
+    index = table.columns.index(metric)
+    rows = [row for row in table.rows if row[index] is not None]
+    select = heapq.nlargest if largest else heapq.nsmallest
+    return Summary(table.columns, select(k, rows, key=lambda row: row[index]))
@@ -0,0 +1,92 @@
+"""
+Switches turning recording on and off, for the whole process and per watch.
+
+The global switch starts on, unless the GLANCE_ENABLED environment variable is "0", "false", "no" or "off" when glance
+is imported. Watches whose targets are listed, comma separated, in GLANCE_DISABLED_WATCHES start switched off.
+
+Glance.watch() returns the original function when recording is off at decoration time. Wrappers created while it was
+on check their watch's Switch.on, a single attribute kept up to date with both switches, and go straight to the
+function when it is off.
+"""
+import os
+import threading
+import weakref
+
+ENABLED_ENV = "GLANCE_ENABLED"  #: Environment variable of the global switch.
+DISABLED_WATCHES_ENV = "GLANCE_DISABLED_WATCHES"  #: Environment variable listing the targets switched off.
+
+
+def _env_enabled():
+    return os.environ.get(ENABLED_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+_enabled = _env_enabled()
+_disabled_targets = frozenset(filter(None, (
+    target.strip() for target in os.environ.get(DISABLED_WATCHES_ENV, "").split(",")
+)))
+_switches = weakref.WeakSet()
+_lock = threading.Lock()
+
+
+class Switch:
+    """
+    Recording switch of a watch.
+    """
+    __slots__ = ("enabled", "on", "__weakref__")
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled  #: Whether the watch itself is switched on.
+        self.on = enabled and _enabled  #: Whether the watch records, i.e. both it and the global switch are on.
+        with _lock:
+            _switches.add(self)
+
+    def set(self, enabled: bool):
+        """
+        Switches the watch on or off.
+        :param enabled:
+        :return:
+        """
+        with _lock:
+            self.enabled = enabled
+            self.on = enabled and _enabled
+
+
+def switch_for(target: str):
+    """
+    Returns a new switch for the watch of target, off if the target is listed in GLANCE_DISABLED_WATCHES.
+    :param target:
+    :return: Switch
+    """
+    return Switch(target not in _disabled_targets)
+
+
+def _set(enabled: bool):
+    global _enabled
+    with _lock:
+        _enabled = enabled
+        for switch in list(_switches):
+            switch.on = switch.enabled and enabled
+
+
+def enable():
+    """
+    Switches recording on for the whole process. Functions decorated while it was off stay unwrapped.
+    :return:
+    """
+    _set(True)
+
+
+def disable():
+    """
+    Switches recording off for the whole process.
+    :return:
+    """
+    _set(False)
+
+
+def is_enabled():
+    """
+    Returns whether the global switch is on.
+    :return: bool
+    """
+    return _enabled
@@ -0,0 +1,159 @@
+"""
+Rolling time-window statistics of recent looks, see Watch.rolling().
+
+A RollingWindow keeps the aggregates, and optionally sketches, of the looks that ended in the last span seconds, in a
+ring of fixed width time buckets. Memory stays constant, and old looks expire without being stored.
+"""
+import math
+import attr
+from glance.clock import NS_PER_SECOND
+from glance.sketch import QuantileSketch
+from glance.stats import RunningStats
+
+
+@attr.s
+class RollingWindow:
+    """
+    Aggregates of the looks that ended in the last span seconds, kept in a ring of fixed width time buckets. Each
+    bucket holds the RunningStats, and optionally a QuantileSketch, of the looks that ended in it. A bucket is reset
+    when the ring comes back around to it, so adding looks costs O(1) per bucket touched and queries O(buckets),
+    whatever the number of looks.
+    """
+    span = attr.ib(type=float, default=60.0)  #: Seconds covered by the window.
+    buckets = attr.ib(type=int, default=60)  #: Number of buckets the span is divided in.
+    sketches = attr.ib(type=bool, default=True)  #: Whether buckets keep a QuantileSketch, for percentiles.
+    width_ns = attr.ib(type=int, init=False)  #: Width of a bucket in nanoseconds.
+    _indices = attr.ib(init=False, repr=False)  #: Absolute index, clock reading // width_ns, of each bucket.
+    _stats = attr.ib(init=False, repr=False)
+    _sketches = attr.ib(init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        self.width_ns = max(1, round(self.span * NS_PER_SECOND / self.buckets))
+        self.reset()
+
+    def reset(self):
+        """
+        Empties every bucket.
+        :return:
+        """
+        self._indices = [None] * self.buckets
+        self._stats = [RunningStats() for _ in range(self.buckets)]
+        self._sketches = [QuantileSketch() if self.sketches else None for _ in range(self.buckets)]
+
+    def _slot(self, index: int):
+        """
+        Returns the slot of the bucket with the given absolute index, resetting the slot if it held an older bucket,
+        or None if the slot already moved on to a newer bucket.
+        """
+        slot = index % self.buckets
+        current = self._indices[slot]
+        if current == index:
+            return slot
+        if current is not None and current > index:
+            return None
+        self._indices[slot] = index
+        self._stats[slot].reset()
+        if self.sketches:
+            self._sketches[slot].reset()
+        return slot
+
+    def add(self, end_ns: int, value: float, look_id=None):
+        """
+        Adds the look time of a look that ended at the clock reading end_ns.
+        :param end_ns:
+        :param value:
+        :param look_id:
+        :return:
+        """
+        slot = self._slot(end_ns // self.width_ns)
+        if slot is None:
+            return
+        self._stats[slot].add(value, look_id)
+        if self.sketches:
+            self._sketches[slot].add(value)
+
+    def add_many(self, end_ns, values, look_ids=None):
+        """
+        Adds look times, with the aligned clock readings the looks ended at, in one vectorized pass per bucket.
+        :param end_ns: np.ndarray of int
+        :param values: np.ndarray of float
+        :param look_ids: sequence of look ids aligned with values.
+        :return:
+        """
+        import numpy as np
+        if not len(values):
+            return
+        indices, inverse, counts = np.unique(end_ns // self.width_ns, return_inverse=True, return_counts=True)
+        if len(indices) == 1:
+            groups = [(int(indices[0]), values, look_ids)]
+        else:
+            order = np.argsort(inverse, kind="stable")
+            splits = np.cumsum(counts)[:-1]
+            groups = zip(
+                indices.tolist(),
+                np.split(values[order], splits),
+                [None] * len(indices) if look_ids is None else np.split(np.asarray(look_ids)[order], splits),
+            )
+        for index, group, group_ids in groups:
+            slot = self._slot(index)
+            if slot is None:
+                continue
+            if group_ids is not None and not isinstance(group_ids, list):
+                group_ids = group_ids.tolist()
+            self._stats[slot].add_many(group, group_ids)
+            if self.sketches:
+                self._sketches[slot].add_many(group)
+
+    def _live_slots(self, now_ns: int, last: float = None):
+        """
+        Returns the slots of the buckets within the last seconds, or the whole span, before now_ns, oldest first.
+        """
+        current = now_ns // self.width_ns
+        count = self.buckets if last is None else min(self.buckets, math.ceil(last * NS_PER_SECOND / self.width_ns))
+        slots = [
+            slot for slot, index in enumerate(self._indices)
+            if index is not None and current - count < index <= current
+        ]
+        return sorted(slots, key=self._indices.__getitem__)
+
+    def stats(self, now_ns: int, last: float = None):
+        """
+        Returns the aggregates of the looks that ended within the window.
+        :param now_ns: clock reading the window ends at.
+        :param last: seconds covered, rounded up to whole buckets, defaults to the whole span.
+        :return: RunningStats
+        """
+        stats = RunningStats()
+        for slot in self._live_slots(now_ns, last):
+            stats.merge(self._stats[slot])
+        return stats
+
+    def sketch(self, now_ns: int, last: float = None):
+        """
+        Returns a sketch of the look times of the looks that ended within the window.
+        :param now_ns: clock reading the window ends at.
+        :param last: seconds covered, rounded up to whole buckets, defaults to the whole span.
+        :return: QuantileSketch
+        """
+        if not self.sketches:
+            raise ValueError("Percentiles need a RollingWindow with sketches=True.")
+        sketch = QuantileSketch()
+        for slot in self._live_slots(now_ns, last):
+            sketch.merge(self._sketches[slot])
+        return sketch
+
+    def series(self, now_ns: int):
+        """
+        Returns the rollup of every bucket of the window that holds looks, oldest first.
+        :param now_ns: clock reading the window ends at.
+        :return: list of (bucket start clock reading, RunningStats, QuantileSketch or None)
+        """
+        return [
+            (
+                self._indices[slot] * self.width_ns,
+                self._stats[slot].copy(),
+                self._sketches[slot].copy() if self.sketches else None,
+            )
+            for slot in self._live_slots(now_ns)
+            if self._stats[slot].count
+        ]
@@ -22,5 +22,6 @@ setup(
     packages=['glance'],
     package_data={__title__: [readme_file_path]},
     install_requires=['variants', 'attrs', 'python-dateutil'],
+    entry_points={'console_scripts': ['glance-compare=glance.compare:main']},
     classifiers=[]
 )
@@ -0,0 +1,159 @@
+import asyncio
+import pytest
+from glance.active import current_look
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.glance import Glance
+
+
+def test_coroutine_is_timed_until_it_returns():
+    gl = Glance()
+
+    @gl.watch
+    async def handler(delay):
+        await asyncio.sleep(delay)
+        return delay
+
+    assert asyncio.run(handler(0.05)) == 0.05
+    watch = gl.watches["handler"]
+    assert watch.stats.count == 1
+    assert watch.longest_look() >= 0.05
+
+
+def test_current_look_per_task():
+    gl = Glance(storage="dict")
+    seen = {}
+
+    @gl.watch(capture_args=True)
+    async def handler(name):
+        look = current_look()
+        await asyncio.sleep(0.01)
+        seen[name] = (look.id, current_look().id, look.given_args["args"])
+
+    async def main():
+        await asyncio.gather(*(handler(name) for name in "abc"))
+
+    asyncio.run(main())
+    assert current_look() is None
+    assert len({look_id for look_id, _, _ in seen.values()}) == 3
+    for name, (look_id, later_id, args) in seen.items():
+        assert look_id == later_id
+        assert args == (name,)
+
+
+def test_glance_watch_capture_args_needs_dict_storage():
+    gl = Glance()
+    gl.start_watch("add")
+
+    def add(a, b=1):
+        return a + b
+
+    with pytest.raises(ValueError):
+        gl.watch(capture_args=True)(add)
+    assert gl.watch(add)(1) == 2
+
+
+def test_loop_metrics_split_running_and_suspended():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+
+    @gl.watch(loop_metrics=True)
+    async def handler():
+        clock.advance(2 * NS_PER_SECOND)
+        await asyncio.sleep(0)
+        clock.advance(NS_PER_SECOND)
+
+    async def main():
+        task = asyncio.ensure_future(handler())
+        await asyncio.sleep(0)
+        clock.advance(5 * NS_PER_SECOND)
+        await task
+
+    asyncio.run(main())
+    watch = gl.watches["handler"]
+    assert watch.running.mean == 3.0
+    assert watch.suspended.mean == 5.0
+    assert watch.stats.max == 8.0
+
+
+def test_coroutine_cancelled_closes_look():
+    gl = Glance()
+
+    @gl.watch
+    async def handler():
+        await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.ensure_future(handler())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    watch = gl.watches["handler"]
+    assert watch.looks.open_count == 0
+    assert watch.stats.count == 0
+    assert watch.failures["CancelledError"].stats.count == 1
+
+
+def test_generator_is_timed_until_exhausted():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+
+    @gl.watch(loop_metrics=True)
+    def numbers():
+        for i in range(3):
+            clock.advance(NS_PER_SECOND)
+            assert current_look() is not None
+            yield i
+        return "done"
+
+    def consume():
+        result = yield from numbers()
+        return result
+
+    items = []
+    gen = consume()
+    try:
+        while True:
+            items.append(next(gen))
+            assert current_look() is None
+            clock.advance(10 * NS_PER_SECOND)
+    except StopIteration as stop:
+        assert stop.value == "done"
+    watch = gl.watches["numbers"]
+    assert items == [0, 1, 2]
+    assert watch.stats.max == 33.0
+    assert watch.running.max == 3.0
+    assert watch.suspended.max == 30.0
+
+
+def test_generator_closed_early():
+    gl = Glance()
+
+    @gl.watch
+    def numbers():
+        yield from range(10)
+
+    gen = numbers()
+    assert next(gen) == 0
+    gen.close()
+    assert gl.watches["numbers"].stats.count == 1
+
+
+def test_async_generator():
+    gl = Glance()
+
+    @gl.watch(loop_metrics=True)
+    async def numbers():
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield i
+
+    async def main():
+        return [i async for i in numbers()]
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    watch = gl.watches["numbers"]
+    assert watch.stats.count == 1
+    assert watch.running.count == 1
@@ -0,0 +1,162 @@
+import asyncio
+import gc
+import inspect
+import weakref
+import numpy as np
+import pytest
+from glance.buckets import UNKEYED, Buckets, fingerprint, log2_size, size, type_name
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.glance import Glance
+
+
+def test_key_functions():
+    assert size()([1, 2, 3]) == 3
+    assert size(1)("a", 5) == 5
+    assert size(0, "data")(data="abcd") == 4
+    assert size(0, "data")("ab") == 2
+    assert [log2_size()(n) for n in (0, 1, 3, 4, 5, 1000)] == [0, 1, 4, 4, 8, 1024]
+    assert type_name()(1.5) == "float"
+    assert fingerprint(type_name(), size())("abc") == ("str", 3)
+
+
+def test_key_of_binds_arguments():
+    def process(head, data=(), *, limit=None):
+        pass
+
+    buckets = Buckets(fingerprint(size(name="data"), type_name(name="limit"))).bind(inspect.signature(process))
+    assert buckets.key_of((1, [1, 2]), {}) == (2, "NoneType")
+    assert buckets.key_of((1,), {"data": "abc", "limit": 5}) == (3, "int")
+    assert buckets.key_of((1,), {}) == (0, "NoneType")
+    with pytest.warns(RuntimeWarning, match="overflow"):
+        assert buckets.key_of((1, iter([])), {}) is UNKEYED
+    assert buckets.key_of((), {}) is UNKEYED
+    assert buckets.key_errors == 2
+    buckets.add(UNKEYED, NS_PER_SECOND)
+    assert buckets.keys() == []
+    assert buckets.overflow.count == 1
+
+
+@pytest.mark.parametrize("storage, threadsafe", [("columnar", True), ("columnar", False), ("dict", True)])
+def test_failing_key_never_fails_the_call(storage, threadsafe):
+    gl = Glance(storage=storage, threadsafe=threadsafe)
+
+    @gl.watch(key=size(name="data"))
+    def process(data=None):
+        return "done"
+
+    with pytest.warns(RuntimeWarning):
+        assert process() == process(None) == process(iter([1])) == process(data=[1]) == "done"
+    buckets = gl.watches["process"].buckets
+    assert buckets.keys() == [1]
+    assert buckets.overflow.count == 3
+    assert buckets.key_errors == 3
+    assert gl.watches["process"].stats.count == 4
+
+
+def test_plain_key_gets_the_arguments_it_accepts():
+    def process(data, limit=2, *rest, scale=1, **options):
+        pass
+
+    signature = inspect.signature(process)
+    assert Buckets(len).bind(signature).key_of(([1, 2, 3],), {}) == 3
+    assert Buckets(lambda data, limit: limit).bind(signature).key_of(([],), {}) == 2
+    assert Buckets(lambda *args, scale: (len(args), scale)).bind(signature).key_of(([], 1, 2), {"scale": 3}) == (3, 3)
+    assert Buckets(fingerprint(len, size(name="limit"))).bind(signature).key_of(("ab", 5), {"x": 0}) == (2, 5)
+
+    gl = Glance()
+
+    @gl.watch(key=len)
+    def g(a, b=2):
+        pass
+
+    g([1])
+    g([1, 2], b=3)
+    g("abc")
+    buckets = gl.watches["g"].buckets
+    assert buckets.keys() == [1, 2, 3]
+    assert buckets.overflow.count == buckets.key_errors == 0
+
+
+def test_buckets():
+    buckets = Buckets(size())
+    for n in (1, 2, 2, 3):
+        buckets.add(n, n * NS_PER_SECOND)
+    assert buckets.keys() == [1, 2, 3]
+    assert buckets.stats(2).count == 2
+    assert buckets.stats(2).mean == 2
+    assert buckets.percentile(3, 50) == pytest.approx(3, rel=0.01)
+    assert [row[:3] for row in buckets.table()] == [(1, 1, 1.0), (2, 2, 2.0), (3, 1, 3.0)]
+
+
+def test_buckets_overflow():
+    buckets = Buckets(size(), sketches=False, max_buckets=2)
+    for n in (1, 2, 3, 4, 1):
+        buckets.add(n, NS_PER_SECOND)
+    assert buckets.keys() == [1, 2]
+    assert buckets.stats(1).count == 2
+    assert buckets.overflow.count == 2
+    with pytest.raises(ValueError):
+        buckets.percentile(1, 50)
+
+
+@pytest.mark.parametrize("model, growth", [("O(n)", lambda n: n), ("O(n^2)", lambda n: n ** 2)])
+def test_fit(model, growth):
+    buckets = Buckets(size())
+    for n in (10, 20, 50, 100, 200, 500, 1000):
+        for _ in range(3):
+            buckets.add(n, int((1e-4 + 1e-7 * growth(n)) * NS_PER_SECOND))
+    fit = buckets.fit()
+    assert fit.model == model
+    assert fit.slope == pytest.approx(1e-7, rel=1e-3)
+    assert fit.r2 == pytest.approx(1)
+    assert fit.predict(2000) == pytest.approx(1e-4 + 1e-7 * growth(2000), rel=1e-3)
+    with pytest.raises(ValueError):
+        Buckets(size()).fit()
+
+
+class Payload:
+    def __len__(self):
+        return 100
+
+
+@pytest.mark.parametrize("storage, threadsafe", [("columnar", True), ("columnar", False), ("dict", True)])
+def test_watch_key(storage, threadsafe):
+    clock = FakeClock()
+    gl = Glance(clock=clock, storage=storage, threadsafe=threadsafe)
+
+    @gl.watch(key=size())
+    def process(data):
+        clock.advance(len(data) * NS_PER_SECOND)
+
+    payload = Payload()
+    ref = weakref.ref(payload)
+    for data in ([1], [1, 2], payload, [3]):
+        process(data)
+    del data, payload
+    gc.collect()
+    assert ref() is None
+    buckets = gl.watches["process"].buckets
+    assert buckets.keys() == [1, 2, 100]
+    assert buckets.stats(1).count == 2
+    assert buckets.stats(100).count == 1
+    assert buckets.stats(100).mean == 100
+    assert gl.watches["process"].stats.count == 4
+
+
+def test_watch_key_coroutine():
+    gl = Glance()
+
+    @gl.watch(key=type_name())
+    async def handle(request):
+        await asyncio.sleep(0)
+
+    async def main():
+        await handle("a")
+        await handle(b"b")
+        await handle("c")
+
+    asyncio.run(main())
+    buckets = gl.watches["handle"].buckets
+    assert buckets.keys() == ["bytes", "str"]
+    assert buckets.stats("str").count == 2
+    assert np.isfinite(buckets.percentile("bytes", 99))
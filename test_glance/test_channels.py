@@ -0,0 +1,98 @@
+import time
+import tracemalloc
+import pytest
+from glance.channels import Allocations, CpuTime, GcCollections, channel_of
+from glance.errors import GlanceWatchEmptyError
+from glance.glance import Glance
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_channel_of():
+    assert isinstance(channel_of("cpu"), CpuTime)
+    channel = GcCollections()
+    assert channel_of(channel) is channel
+    with pytest.raises(ValueError):
+        channel_of("disk")
+
+
+def test_channel():
+    channel = CpuTime(sketch=True)
+    with pytest.raises(GlanceWatchEmptyError):
+        channel.mean
+    for look_id, value in enumerate([1.0, 1.0, 1.0, 1.0, 9.0]):
+        channel.add(look_id, value)
+    assert channel.mean == 2.6
+    assert channel.stats.max_id == 4
+    assert channel.percentile(50) == pytest.approx(1, rel=0.01)
+    assert channel.find_outliers(n_std=1.5) == [(4, 9.0)]
+    assert channel.find_outliers(method="percentile", q=50) == [(4, 9.0)]
+    ids, values = channel.columns()
+    assert list(ids) == [0, 1, 2, 3, 4]
+    assert values.tolist() == [1.0, 1.0, 1.0, 1.0, 9.0]
+
+
+@pytest.mark.parametrize("storage", ["columnar", "dict"])
+def test_watch_cpu_channel(storage):
+    gl = Glance(storage=storage)
+
+    @gl.watch(channels=["cpu"])
+    def work(busy):
+        if busy:
+            _spin(0.05)
+        else:
+            time.sleep(0.05)
+
+    work(True)
+    work(False)
+    watch = gl.watches["work"]
+    ids, cpu = watch.channels["cpu"].columns()
+    assert list(ids) == list(watch.looks.ids())
+    assert cpu[0] > 0.025
+    assert cpu[1] < 0.025
+    assert watch.stats.count == 2
+    assert watch.stats.min > 0.04
+
+
+def test_watch_allocation_channel():
+    gl = Glance()
+    was_tracing = tracemalloc.is_tracing()
+
+    channel = Allocations()
+    assert tracemalloc.is_tracing() == was_tracing
+
+    @gl.watch(channels=[channel, "gc"])
+    def allocate(n):
+        return bytearray(n)
+
+    @gl.watch(channels=["allocations"])
+    def churn(n):
+        return len([object() for _ in range(n)])
+
+    assert tracemalloc.is_tracing()
+    kept = [allocate(1_000_000), allocate(10)]
+    churn(100_000)
+    if not was_tracing:
+        tracemalloc.stop()
+    channel = gl.watches["allocate"].channels["allocations"]
+    _, allocated = channel.columns()
+    assert allocated[0] >= 1_000_000
+    assert allocated[1] < 4_096
+    _, churned = gl.watches["churn"].channels["allocations"].columns()
+    assert churned[0] > 100_000 * 16
+    assert len(kept) == 2
+    assert gl.watches["allocate"].channels["gc"].stats.count == 2
+
+
+def test_channels_need_sync_functions():
+    gl = Glance()
+
+    async def coroutine():
+        pass
+
+    with pytest.raises(ValueError):
+        gl.watch(coroutine, channels=["cpu"])
@@ -0,0 +1,60 @@
+import time
+from glance import Glance, Look
+from glance.clock import Clock, FakeClock, NS_PER_SECOND
+import pytest
+
+
+def test_clock_sources():
+    for source in ("perf_counter", "monotonic", "process_time", "thread_time", "time"):
+        clock = Clock(source)
+        assert isinstance(clock.now(), int)
+    with pytest.raises(ValueError):
+        Clock("sundial")
+
+
+def test_clock_timestamp_anchor():
+    clock = Clock()
+    assert abs(clock.timestamp() - time.time()) < 0.1
+    ns = clock.now()
+    assert clock.from_timestamp(clock.to_timestamp(ns)) - ns < 1000
+
+
+def test_fake_clock():
+    clock = FakeClock(value_ns=10, step_ns=5)
+    assert [clock.now(), clock.now()] == [10, 15]
+    clock.advance(100)
+    assert clock.now() == 120
+
+
+def test_look_nanoseconds():
+    clock = FakeClock(step_ns=250)
+    look = Look("test", clock=clock)
+    look.stop()
+    assert look.look_time.ns() == 250
+    assert look.look_time() == 250 / NS_PER_SECOND
+
+
+def test_look_wall_clock_variants():
+    clock = FakeClock()
+    look = Look("test", clock=clock)
+    clock.advance(61 * NS_PER_SECOND)
+    look.stop()
+    assert look.look_time.humanized() == "1 minute, 1 second"
+    assert look.look_time.datetime().minutes == 1
+    assert abs(look.start_time - time.time()) < 1
+
+
+def test_glance_fake_clock():
+    clock = FakeClock(step_ns=1000)
+    gl = Glance(storage="columnar", clock=clock)
+
+    @gl.watch
+    def func():
+        pass
+
+    func()
+    func()
+    watch = gl.watches["func"]
+    assert watch.clock is clock
+    assert watch.looks[0].look_time.ns() == 1000
+    assert watch.mean == 1000 / NS_PER_SECOND
@@ -0,0 +1,67 @@
+import json
+import numpy as np
+import pytest
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.compare import compare, compare_watches, mann_whitney_u, main
+from glance.glance import Glance
+from glance.stats import RunningStats
+
+
+def _glance(look_times):
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+    for target, times in look_times.items():
+        gl.start_watch(target)
+        watch = gl.watches[target]
+        end_ns = (np.asarray(times) * NS_PER_SECOND).astype(np.int64)
+        stats = RunningStats()
+        stats.add_many(end_ns / NS_PER_SECOND, list(range(len(end_ns))))
+        watch.looks.extend(range(len(end_ns)), np.zeros(len(end_ns), dtype=np.int64), end_ns, stats)
+    return gl
+
+
+def test_mann_whitney_u():
+    u, p_value = mann_whitney_u(np.array([1.0, 2.0, 3.0]), np.array([4.0, 5.0, 6.0]))
+    assert u == 9
+    assert p_value < 0.05
+    u, p_value = mann_whitney_u(np.array([4.0, 5.0, 6.0]), np.array([1.0, 2.0, 3.0]))
+    assert u == 0
+    assert p_value > 0.95
+    u, p_value = mann_whitney_u(np.array([1.0, 1.0]), np.array([1.0, 1.0]))
+    assert u == 2
+    assert p_value == 1.0
+
+
+def test_compare_watches():
+    rng = np.random.default_rng(1)
+    baseline = rng.lognormal(-7, 0.5, 100_000)
+    same = compare_watches("f", baseline, rng.lognormal(-7, 0.5, 100_000))
+    assert not same.regressed
+    assert same.p99_interval[0] < 0 < same.p99_interval[1]
+    slower = compare_watches("f", baseline, baseline * 1.3)
+    assert slower.regressed
+    assert slower.shift("mean") == pytest.approx(0.3)
+    assert slower.shift(50) == pytest.approx(0.3)
+    assert slower.p99_interval[0] > 0.1
+    assert not compare_watches("f", baseline, baseline * 1.05).regressed
+    assert not compare_watches("f", baseline, baseline * 0.7).regressed
+
+
+def test_compare_recordings(tmp_path, capsys):
+    rng = np.random.default_rng(2)
+    times = rng.lognormal(-7, 0.5, 10_000)
+    baseline = _glance({"same": times, "slower": times, "gone": times})
+    candidate = _glance({"same": times, "slower": times * 2, "new": times})
+    comparison = candidate.compare(baseline)
+    assert [watch.target for watch in comparison.watches] == ["same", "slower"]
+    assert [watch.target for watch in comparison.regressions] == ["slower"]
+    assert comparison.skipped == ["gone", "new"]
+    assert "REGRESSED" in comparison.format()
+
+    baseline.save(tmp_path / "baseline.glance")
+    candidate.save(tmp_path / "candidate.glance")
+    assert compare(tmp_path / "baseline.glance", tmp_path / "candidate.glance").regressions[0].target == "slower"
+    assert main([str(tmp_path / "baseline.glance"), str(tmp_path / "candidate.glance"), "--json"]) == 1
+    report = json.loads(capsys.readouterr().out)
+    assert [watch["regressed"] for watch in report["watches"]] == [False, True]
+    assert main([str(tmp_path / "baseline.glance"), str(tmp_path / "baseline.glance")]) == 0
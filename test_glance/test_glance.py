@@ -155,3 +155,30 @@ def make_watch(n, delta = 0):
 #     test_glance = Glance()
 #     test_glance.watches[test_watch_1.target] = test_watch_1
 #     test_glance.watches[test_watch_2.target] = test_watch_2
+
+
+def test_glance_watch_fast_path():
+    gl = Glance()
+
+    @gl.watch
+    def add(a, b=1):
+        return a + b
+
+    watch = gl.watches["add"]
+    assert str(watch.expected_args) == "(a, b=1)"
+    assert [add(i, b=2) for i in range(3)] == [2, 3, 4]
+    assert list(watch.looks) == [0, 1, 2]
+    assert watch.looks[2].given_args == {}
+    assert watch.stats.count == 3
+
+
+def test_glance_watch_capture_args():
+    gl = Glance()
+
+    @gl.watch(capture_args=True)
+    def add(a, b=1):
+        return a + b
+
+    assert add(1, b=2) == 3
+    look = next(iter(gl.watches["add"].looks.values()))
+    assert look.given_args == {"args": (1,), "kwargs": {"b": 2}}
@@ -0,0 +1,51 @@
+import json
+import subprocess
+import sys
+
+IMPORT_TIME_BUDGET = 0.5  #: Seconds allowed for `import glance` in a fresh interpreter.
+MODULE_BUDGET = 120  #: New modules allowed in sys.modules after `import glance`.
+HEAVY_MODULES = ["numpy", "matplotlib", "dateutil", "statistics"]
+
+script = """
+import json, sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+import glance
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "modules": sorted(set(sys.modules) - before),
+}))
+"""
+
+
+def import_glance():
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def test_import_skips_heavy_modules():
+    modules = import_glance()["modules"]
+    loaded = [name for name in modules if name.split(".")[0] in HEAVY_MODULES]
+    assert loaded == []
+
+
+def test_import_budget():
+    result = min((import_glance() for _ in range(3)), key=lambda r: r["elapsed"])
+    assert result["elapsed"] < IMPORT_TIME_BUDGET
+    assert len(result["modules"]) < MODULE_BUDGET
+
+
+def test_plot_is_headless(tmp_path):
+    filename = tmp_path / "test.png"
+    plot_script = f"""
+import sys
+from glance import Watch
+watch = Watch("test", storage="columnar")
+watch.looks.append(0, 0, 10)
+watch.looks.append(1, 0, 20)
+watch.plot(filename={str(filename)!r})
+assert "matplotlib.pyplot" not in sys.modules
+"""
+    subprocess.run([sys.executable, "-c", plot_script], check=True)
+    assert filename.exists()
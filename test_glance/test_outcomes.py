@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.glance import Glance
+from glance.outcomes import OK, outcome_of
+from glance.buckets import size
+from glance.server import collect
+
+
+def test_outcome_of():
+    assert outcome_of() == OK
+    assert outcome_of(GeneratorExit()) == OK
+    assert outcome_of(TimeoutError()) == "TimeoutError"
+
+
+def _call(glance, **options):
+    clock = glance.clock
+
+    @glance.watch(**options)
+    def request(seconds, error=None):
+        clock.advance(seconds * NS_PER_SECOND)
+        if error is not None:
+            raise error
+
+    request(1)
+    request(3)
+    for seconds, error in ((0.001, ValueError()), (0.002, ValueError()), (30, TimeoutError())):
+        with pytest.raises(type(error)):
+            request(seconds, error)
+    return glance.watches["request"]
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"threadsafe": False},
+    {"storage": "dict"},
+    {"capture_args": True},
+    {"key": size()},
+    {"channels": ["cpu"]},
+])
+def test_failed_calls(options):
+    glance_options = {name: options.pop(name) for name in ("threadsafe", "storage") if name in options}
+    watch = _call(Glance(clock=FakeClock(), **glance_options), **options)
+    assert watch.looks.open_count == 0
+    assert watch.stats.count == 2
+    assert watch.mean == 2
+    assert watch.longest_look() == 3
+    outcomes = watch.outcomes()
+    assert sorted(outcomes) == ["TimeoutError", "ValueError", OK]
+    assert outcomes["ValueError"].count == 2
+    assert outcomes["ValueError"].mean == pytest.approx(0.0015)
+    assert outcomes["TimeoutError"].max == 30
+    percentiles = watch.outcome_percentiles([50])
+    assert percentiles[OK] == [2]
+    assert percentiles["TimeoutError"][0] == pytest.approx(30, rel=0.01)
+    assert watch.calls == 5
+
+
+def test_failed_calls_count_as_calls():
+    gl = Glance(clock=FakeClock())
+    _call(gl)
+    [metrics] = collect(gl)
+    assert metrics["calls"] == 5
+    assert metrics["count"] == 2
+
+    @gl.watch
+    def fails():
+        gl.clock.advance(NS_PER_SECOND)
+        raise KeyError()
+
+    with pytest.raises(KeyError):
+        fails()
+    assert gl.watches["fails"].calls == 1
+    records = {record["watch"]: record for record in gl.summary().records()}
+    assert records["fails"]["count"] == 0
+    assert records["fails"]["throughput"] > 0
+
+
+def test_failed_coroutine_and_generator():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+
+    @gl.watch
+    async def fetch():
+        clock.advance(5 * NS_PER_SECOND)
+        raise asyncio.TimeoutError()
+
+    @gl.watch
+    def rows():
+        yield 1
+        raise KeyError("row")
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(fetch())
+    with pytest.raises(KeyError):
+        list(rows())
+    closed_early = rows()
+    next(closed_early)
+    closed_early.close()
+    assert gl.watches["fetch"].failures[type(asyncio.TimeoutError()).__name__].stats.mean == 5
+    assert gl.watches["rows"].failures["KeyError"].stats.count == 1
+    assert gl.watches["rows"].stats.count == 1
+    assert gl.watches["rows"].looks.open_count == 0
+
+
+def test_failures_merge_and_round_trip(tmp_path):
+    gl = Glance(clock=FakeClock())
+    watch = _call(gl)
+    snapshot = gl.snapshot()
+    merged = Glance().merge(snapshot, snapshot)
+    outcomes = merged.watches["request"].outcomes()
+    assert outcomes["ValueError"].count == 4
+    assert outcomes["TimeoutError"].max == 30
+    assert outcomes[OK].count == 4
+    assert merged.watches["request"].outcome_percentiles([50])["TimeoutError"][0] == pytest.approx(30, rel=0.01)
+
+    path = tmp_path / "recording.glance"
+    merged.save(path)
+    loaded = Glance.load(path).watches["request"]
+    assert loaded.outcomes()["ValueError"].count == 4
+    assert loaded.outcomes()["ValueError"].mean == pytest.approx(0.0015)
+    assert loaded.outcome_percentiles([50]) == merged.watches["request"].outcome_percentiles([50])
+
+    watch.snapshot(reset=True)
+    assert watch.failures == {}
@@ -0,0 +1,43 @@
+import numpy as np
+from glance import Watch
+from glance.outliers import outlier_mask, zscore, mad, iqr, percentile
+import pytest
+from glance.clock import NS_PER_SECOND
+
+times = np.array([1.0, 1.1, 0.9, 1.0, 1.2, 0.8, 1.0, 9.0, 1.05, 0.95])
+
+
+def make_watch():
+    watch = Watch("test", storage="columnar")
+    for look_id, look_time in enumerate(times):
+        watch.looks.append(look_id, 0, round(look_time * NS_PER_SECOND))
+    return watch
+
+
+def test_zscore_uses_deviation_from_mean():
+    low = np.array([10.0] * 20 + [0.0])
+    assert zscore(low).tolist() == [False] * 20 + [True]
+
+
+def test_methods_flag_slow_look():
+    for method in (zscore, mad, iqr):
+        assert np.flatnonzero(method(times)).tolist() == [7]
+    assert np.flatnonzero(percentile(times, q=90)).tolist() == [7]
+
+
+def test_outlier_mask_unknown_method():
+    with pytest.raises(ValueError):
+        outlier_mask(times, "nope")
+
+
+def test_outlier_mask_empty():
+    assert outlier_mask(np.zeros(0), "mad").tolist() == []
+
+
+def test_watch_find_outliers_variants():
+    watch = make_watch()
+    assert watch.find_outliers() == [(7, 9.0)]
+    assert watch.find_outliers.ids(method="mad") == [7]
+    assert watch.find_outliers.times(method="iqr", k=3).tolist() == [9.0]
+    assert [look.id for look in watch.find_outliers.looks(method="percentile", q=95)] == [7]
+    assert watch.find_weak_outliers.ids() == [7]
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.glance import Glance, Watch
+from glance.plotting import log_bounds, plot_data
+from glance.retention import StatsOnly
+from glance.stats import RunningStats
+
+
+def _watch(times, **options):
+    watch = Watch("f", storage="columnar", clock=FakeClock(), **options)
+    times = np.asarray(times, dtype=float)
+    start_ns = np.arange(len(times), dtype=np.int64) * NS_PER_SECOND
+    stats = RunningStats()
+    stats.add_many(times)
+    watch.looks.extend(range(len(times)), start_ns, start_ns + (times * NS_PER_SECOND).astype(np.int64), stats)
+    return watch
+
+
+def test_log_bounds():
+    edges = log_bounds(0.001, 1, per_decade=10)
+    assert len(edges) == 31
+    assert edges[0] == pytest.approx(0.001)
+    assert edges[-1] == pytest.approx(1)
+    assert np.allclose(edges[1:] / edges[:-1], 10 ** 0.1)
+
+
+def test_plot_data():
+    times = np.random.default_rng(0).lognormal(-6, 1, 100_000)
+    data = plot_data(_watch(times), time_bins=10)
+    assert data.count == len(times)
+    assert data.edges[0] == pytest.approx(times.min())
+    assert data.edges[-1] >= times.max()
+    assert data.percentiles() == pytest.approx(np.percentile(times, data.qs), rel=0.15)
+    assert data.cdf()[-1] == 1
+    assert len(data.times) == 10
+    assert data.time_percentiles[50] == pytest.approx(np.median(times), rel=0.1)
+
+
+def test_plot_data_from_histogram():
+    watch = _watch([0.0002, 0.003, 0.003, 0.2], histogram=True)
+    data = plot_data(watch, views=("histogram",))
+    assert data.counts.tolist() == [1, 0, 0, 0, 2, 0, 0, 0, 0, 1]
+    assert data.edges[0] == pytest.approx(0.0001)
+    assert data.edges[-1] == pytest.approx(0.25)
+    assert data.times is None
+
+
+def test_plot_data_from_empty_histogram():
+    watch = _watch([0.001, 0.002], retention=StatsOnly())
+    watch.enable_histogram()
+    assert watch.stats.count == 2
+    data = plot_data(watch, views=("histogram",))
+    assert data.counts.sum() == 0
+    stats = RunningStats()
+    stats.add(0.003)
+    watch.looks.extend([2], np.array([0]), np.array([3 * NS_PER_SECOND // 1000]), stats)
+    assert plot_data(watch, views=("histogram",)).counts.sum() == 1
+
+
+def test_plot_data_over_time():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+    gl.start_watch("f")
+    watch = gl.watches["f"]
+    for _ in range(4):
+        for look_time in (3, 1, 2):
+            look_id = watch.start_look()
+            clock.advance(look_time * NS_PER_SECOND // 10)
+            watch.stop_look(look_id)
+        clock.advance(10 * NS_PER_SECOND)
+    data = plot_data(watch, time_bins=4, qs=(0, 50, 100))
+    assert len(data.times) == 4
+    assert data.time_percentiles[0].tolist() == [0.1] * 4
+    assert data.time_percentiles[50].tolist() == [0.2] * 4
+    assert data.time_percentiles[100].tolist() == [0.3] * 4
+
+
+@pytest.mark.parametrize("background", [None, "thread", "process"])
+def test_glance_plot(tmp_path, background):
+    gl = Glance()
+
+    @gl.watch
+    def fast():
+        pass
+
+    gl.start_watch("empty")
+    for _ in range(1000):
+        fast()
+    filename = str(tmp_path / "glance.png")
+    result = gl.plot(filename, background=background)
+    if background is not None:
+        result = result.result(timeout=60)
+    assert result == filename
+    assert (tmp_path / "glance.png").stat().st_size > 0
+    with pytest.raises(ValueError):
+        gl.plot(filename, views=("pie",))
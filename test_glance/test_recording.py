@@ -0,0 +1,65 @@
+import pytest
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.errors import GlanceFileFormatError, GlanceReadOnlyError
+from glance.glance import Glance
+
+
+def _glance(storage="columnar"):
+    clock = FakeClock()
+    gl = Glance(clock=clock, storage=storage, sketches=True)
+    for target, look_times in (("a", [1, 2, 3, 10]), ("b", [5]), ("empty", [])):
+        gl.start_watch(target)
+        watch = gl.watches[target]
+        for look_time in look_times:
+            look_id = watch.start_look()
+            clock.advance(look_time * NS_PER_SECOND)
+            watch.stop_look(look_id)
+    return gl
+
+
+@pytest.mark.parametrize("storage", ["columnar", "dict"])
+def test_save_and_load(tmp_path, storage):
+    gl = _glance(storage)
+    path = tmp_path / "recording.glance"
+    gl.save(path)
+    loaded = Glance.load(path)
+    assert sorted(loaded.watches) == ["a", "b", "empty"]
+    watch, original = loaded.watches["a"], gl.watches["a"]
+    assert watch.looks.times().tolist() == [1, 2, 3, 10]
+    assert watch.stats.count == 4
+    assert watch.mean == original.mean
+    assert watch.std == original.std
+    assert watch.longest_look.tuple() == (3, 10.0)
+    assert watch.percentile(50) == original.percentile(50)
+    assert watch.find_outliers(n_std=1.4) == [(3, 10.0)]
+    assert type(watch.find_outliers(n_std=1.4)[0][0]) is int
+    assert [type(look_id) for look_id in watch.find_outliers.ids(n_std=1.4)] == [int]
+    assert watch.find_outliers.looks(n_std=1.4)[0].id == 3
+    look = watch.looks[3]
+    assert look.look_time() == 10.0
+    assert look.start_time == pytest.approx(original.clock.to_timestamp(6 * NS_PER_SECOND), abs=1e-6)
+    assert list(watch.looks) == [0, 1, 2, 3]
+    start_ns, end_ns = watch.looks.readings()
+    assert not start_ns.flags.owndata and not end_ns.flags.owndata
+    assert ((end_ns - start_ns) / NS_PER_SECOND).tolist() == [1, 2, 3, 10]
+    assert [readings.tolist() for readings in original.looks.readings()] == [start_ns.tolist(), end_ns.tolist()]
+    assert loaded.watches["empty"].stats.count == 0
+    assert len(loaded.watches["empty"].looks) == 0
+
+
+def test_loaded_watches_are_read_only_but_mergeable(tmp_path):
+    path = tmp_path / "recording.glance"
+    _glance().save(path)
+    loaded = Glance.load(path)
+    with pytest.raises(GlanceReadOnlyError):
+        loaded.watches["a"].start_look()
+    merged = Glance().merge(loaded)
+    assert merged.watches["a"].stats.count == 4
+    loaded.watches["a"].plot(str(tmp_path / "a.png"))
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a recording")
+    with pytest.raises(GlanceFileFormatError):
+        Glance.load(path)
@@ -0,0 +1,67 @@
+from glance import Watch, Glance, Look
+from glance.retention import KeepAll, RingBuffer, Reservoir, StatsOnly
+from glance.clock import NS_PER_SECOND
+
+
+def fill(watch, n):
+    for look_id in range(n):
+        if watch.storage == "columnar":
+            watch.looks.append(look_id, 0, look_id * NS_PER_SECOND)
+        else:
+            watch.looks[look_id] = Look("test", start_time=0.0, end_time=float(look_id))
+
+
+def test_keep_all():
+    watch = Watch("test", storage="columnar", retention=KeepAll())
+    fill(watch, 10)
+    assert len(watch.looks) == 10
+
+
+def test_ring_buffer_keeps_most_recent():
+    for storage in ("dict", "columnar"):
+        watch = Watch("test", storage=storage, retention=RingBuffer(3))
+        fill(watch, 10)
+        assert sorted(watch.looks) == [7, 8, 9]
+        assert watch.stats.count == 10
+        assert watch.mean == 4.5
+        assert watch.shortest_look.tuple() == (0, 0.0)
+
+
+def test_reservoir_keeps_sample():
+    for storage in ("dict", "columnar"):
+        watch = Watch("test", storage=storage, retention=Reservoir(5, seed=1))
+        fill(watch, 1000)
+        assert len(watch.looks) == 5
+        assert len(set(watch.looks)) == 5
+        assert watch.stats.count == 1000
+        assert watch.longest_look() == 999.0
+
+
+def test_stats_only():
+    for storage in ("dict", "columnar"):
+        watch = Watch("test", storage=storage, retention=StatsOnly())
+        fill(watch, 10)
+        assert len(watch.looks) == 0
+        assert watch.mean == 4.5
+
+
+def test_stats_only_keeps_open_looks():
+    watch = Watch("test", retention=StatsOnly())
+    look_id = watch.start_look()
+    assert look_id in watch.looks
+    watch.stop_look(look_id)
+    assert look_id not in watch.looks
+    assert watch.stats.count == 1
+
+
+def test_glance_retention():
+    gl = Glance(storage="columnar", retention=RingBuffer(2))
+
+    @gl.watch
+    def func():
+        pass
+
+    for _ in range(5):
+        func()
+    assert list(gl.watches["func"].looks) == [4, 3]
+    assert gl.watches["func"].stats.count == 5
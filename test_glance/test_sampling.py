@@ -0,0 +1,154 @@
+import asyncio
+import inspect
+import time
+import threading
+import pytest
+from glance.glance import Glance
+from glance.sampling import Adaptive, CallCounter, EveryNth, Probability
+
+
+def test_call_counter():
+    counter = CallCounter()
+    for _ in range(5):
+        counter.tick()
+    assert counter.value == 5
+    counter.tick()
+    assert counter.value == 6
+    assert counter.value == 6
+
+    def work():
+        for _ in range(10_000):
+            counter.tick()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value == 40_006
+
+
+def test_reading_calls_keeps_sampling_phase():
+    gl = Glance(sampling=EveryNth(2))
+
+    @gl.watch
+    def func(x):
+        return x
+
+    watch = gl.watches["func"]
+    for i in range(10):
+        func(i)
+        assert watch.calls == i + 1
+    assert watch.stats.count == 5
+
+
+def test_every_nth():
+    gl = Glance(sampling=EveryNth(10))
+
+    @gl.watch
+    def func(x):
+        return x
+
+    assert [func(i) for i in range(95)] == list(range(95))
+    watch = gl.watches["func"]
+    assert watch.sampled
+    assert watch.calls == 95
+    assert watch.stats.count == 10
+    assert watch.sample_rate == pytest.approx(10 / 95)
+    assert watch.estimated_total == pytest.approx(watch.stats.total * 9.5)
+    assert watch.throughput() > 0
+
+
+def test_probability_per_watch():
+    gl = Glance()
+
+    @gl.watch(sampling=Probability(0.25, seed=1))
+    def func(x):
+        return x
+
+    for i in range(4000):
+        func(i)
+    watch = gl.watches["func"]
+    assert watch.calls == 4000
+    assert 800 < watch.stats.count < 1200
+
+
+def test_glance_policy_is_copied_per_watch():
+    gl = Glance(sampling=EveryNth(2))
+
+    @gl.watch
+    def first():
+        pass
+
+    @gl.watch
+    def second():
+        pass
+
+    first()
+    second()
+    assert gl.watches["first"].stats.count == gl.watches["second"].stats.count == 1
+    assert gl.watches["first"].sampling is not gl.watches["second"].sampling
+
+
+def test_adaptive_caps_looks_per_second():
+    policy = Adaptive(max_looks_per_second=1000, window=256)
+    gl = Glance()
+
+    @gl.watch(sampling=policy)
+    def func():
+        pass
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < 0.2:
+        func()
+    watch = gl.watches["func"]
+    assert policy.stride > 1
+    assert watch.stats.count < watch.calls / 2
+
+
+def test_adaptive_needs_a_target():
+    with pytest.raises(ValueError):
+        Adaptive()
+    assert Adaptive(max_overhead=0.01, look_cost=1e-6).target == pytest.approx(10_000)
+
+
+def test_unsampled_watch_counts_looks():
+    gl = Glance()
+
+    @gl.watch
+    def func():
+        pass
+
+    func()
+    assert not gl.watches["func"].sampled
+    assert gl.watches["func"].calls == 1
+
+
+def test_sampled_coroutines_and_generators_keep_their_type():
+    gl = Glance(sampling=EveryNth(2))
+
+    @gl.watch
+    async def fetch(x):
+        return x
+
+    @gl.watch
+    def rows(n):
+        yield from range(n)
+
+    @gl.watch
+    async def pages(n):
+        for i in range(n):
+            yield i
+
+    assert inspect.iscoroutinefunction(fetch)
+    assert inspect.isgeneratorfunction(rows)
+    assert inspect.isasyncgenfunction(pages)
+
+    async def consume():
+        return [await fetch(i) for i in range(4)], [[page async for page in pages(2)] for _ in range(4)]
+
+    assert asyncio.run(consume()) == ([0, 1, 2, 3], [[0, 1]] * 4)
+    assert [list(rows(2)) for _ in range(4)] == [[0, 1]] * 4
+    for target in ("fetch", "rows", "pages"):
+        assert gl.watches[target].calls == 4
+        assert gl.watches[target].stats.count == 2
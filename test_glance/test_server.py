@@ -0,0 +1,114 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+import pytest
+from glance.glance import Glance
+from glance.histogram import Histogram
+from glance.retention import RingBuffer
+from glance.server import collect, prometheus_text
+
+
+def test_histogram():
+    histogram = Histogram(bounds=[0.1, 1])
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.add(value)
+    many = Histogram(bounds=[0.1, 1])
+    many.add_many(np.array([0.05, 0.1, 0.5, 2]))
+    assert histogram.counts == many.counts == [2, 1, 1]
+    assert histogram.count == many.count == 4
+    assert histogram.total == pytest.approx(many.total) == pytest.approx(2.65)
+    assert histogram.merge(many).cumulative() == [(0.1, 4), (1, 6), (float("inf"), 8)]
+    with pytest.raises(ValueError):
+        histogram.merge(Histogram())
+
+
+def test_metrics_server():
+    gl = Glance()
+
+    @gl.watch
+    def func(x):
+        return x
+
+    for i in range(10):
+        func(i)
+    gl.start_watch('odd "name"')
+    gl.watches['odd "name"'].start_look()
+    server = gl.serve()
+    try:
+        for i in range(5):
+            func(i)
+        text = urllib.request.urlopen(server.url).read().decode()
+        assert 'glance_look_seconds_bucket{watch="func",le="+Inf"} 15' in text
+        assert 'glance_look_seconds_count{watch="func"} 15' in text
+        assert 'glance_looks_in_flight{watch="odd \\"name\\""} 1' in text
+        assert 'glance_looks_in_flight{watch="func"} 0' in text
+        data = json.loads(urllib.request.urlopen(server.url + ".json").read())
+        assert data["watches"]["func"]["count"] == 15
+        assert data["watches"]["func"]["buckets"][-1] == ["+Inf", 15]
+        assert data["watches"]['odd "name"']["in_flight"] == 1
+        assert data["watches"]["func"]["in_flight"] == 0
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(server.url.replace("/metrics", "/other"))
+    finally:
+        server.close()
+
+
+@pytest.mark.parametrize("storage, threadsafe", [("columnar", True), ("columnar", False), ("dict", True)])
+def test_in_flight_fast_path_calls(storage, threadsafe):
+    gl = Glance(storage=storage, threadsafe=threadsafe)
+    entered, release = threading.Barrier(4), threading.Event()
+
+    @gl.watch
+    def wait(fail=False):
+        entered.wait()
+        release.wait()
+        if fail:
+            raise ValueError()
+
+    def call(fail):
+        try:
+            wait(fail)
+        except ValueError:
+            pass
+
+    threads = [threading.Thread(target=call, args=(i % 2,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    entered.wait()
+    assert collect(gl)[0]["in_flight"] == 3
+    release.set()
+    for thread in threads:
+        thread.join()
+    metrics = collect(gl)[0]
+    assert metrics["in_flight"] == 0
+    assert metrics["calls"] == 3
+
+
+def test_prometheus_text_without_histogram():
+    gl = Glance(storage="dict")
+    gl.start_watch("test")
+    watch = gl.watches["test"]
+    watch.stop_look(watch.start_look())
+    text = prometheus_text(collect(gl))
+    assert 'glance_look_seconds_bucket{watch="test",le="+Inf"} 1' in text
+    assert 'glance_calls_total{watch="test"} 1' in text
+
+
+@pytest.mark.parametrize("storage", ["columnar", "dict"])
+def test_histogram_of_retained_watch_is_consistent(storage):
+    gl = Glance(storage=storage, retention=RingBuffer(3))
+
+    @gl.watch
+    def func(x):
+        return x
+
+    for i in range(10):
+        func(i)
+    gl.serve().close()
+    func(10)
+    watch = collect(gl)[0]
+    assert watch["buckets"][-1] == (float("inf"), 1)
+    assert watch["count"] == 1
+    assert watch["sum"] == pytest.approx(gl.watches["func"].looks.histogram.total)
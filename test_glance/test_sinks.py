@@ -0,0 +1,150 @@
+import csv
+import json
+import threading
+from array import array
+import pytest
+from glance.glance import Glance
+from glance.retention import StatsOnly
+from glance.sinks import BinarySink, CsvSink, Exporter, JsonLinesSink, LookBatch, read_binary
+from glance.storage import ColumnarLooks
+
+
+class ListSink:
+    def __init__(self):
+        self.batches = []
+        self.closed = False
+
+    def write(self, batch):
+        self.batches.append(batch)
+
+    def close(self):
+        self.closed = True
+
+
+class BlockedSink(ListSink):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, batch):
+        self.release.wait()
+        super().write(batch)
+
+
+def _batch(n, target="func"):
+    return LookBatch(target, array('q', range(n)), array('q', range(n)), array('q', range(1, n + 1)), 1000)
+
+
+def test_glance_streams_looks_to_sink(monkeypatch):
+    monkeypatch.setattr(ColumnarLooks, "fold_size", 100)
+    gl = Glance(retention=StatsOnly())
+    sink = ListSink()
+    exporter = gl.add_sink(sink)
+
+    @gl.watch
+    def func(x):
+        return x
+
+    for i in range(1050):
+        func(i)
+    exporter.flush()
+    assert sum(len(batch) for batch in sink.batches) == 1000
+    gl.end()
+    assert sink.closed
+    assert exporter.written == 1050
+    assert sorted(i for batch in sink.batches for i in batch.look_ids) == list(range(1050))
+    assert len(gl.watches["func"].looks) == 0
+    assert gl.watches["func"].stats.count == 1050
+
+
+def test_dict_watches_stream_every_look():
+    gl = Glance(storage="dict")
+    gl.start_watch("test")
+    sink = ListSink()
+    exporter = gl.add_sink(sink)
+    watch = gl.watches["test"]
+    look_id = watch.start_look()
+    watch.stop_look(look_id)
+    exporter.close()
+    assert [batch.look_ids for batch in sink.batches] == [[look_id]]
+
+
+def test_exporter_drops_when_full():
+    sink = BlockedSink()
+    exporter = Exporter(sink, max_batches=2)
+    for _ in range(5):
+        exporter.submit(_batch(10))
+    assert exporter.dropped >= 20
+    sink.release.set()
+    exporter.close()
+    assert exporter.written + exporter.dropped == 50
+
+
+def test_exporter_block_policy():
+    with pytest.raises(ValueError):
+        Exporter(ListSink(), policy="wait")
+    sink = ListSink()
+    exporter = Exporter(sink, max_batches=1, policy="block")
+    for _ in range(20):
+        exporter.submit(_batch(3))
+    exporter.close()
+    assert exporter.written == 60
+    assert not exporter.dropped
+
+
+def test_block_policy_with_recording_threads(monkeypatch):
+    monkeypatch.setattr(ColumnarLooks, "fold_size", 64)
+    gl = Glance(retention=StatsOnly())
+    sink = ListSink()
+    exporter = gl.add_sink(sink, max_batches=1, policy="block", flush_interval=0.001)
+
+    @gl.watch
+    def func(x):
+        return x
+
+    def work():
+        for i in range(5000):
+            func(i)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert not any(thread.is_alive() for thread in threads)
+    gl.end()
+    assert exporter.written == 20000
+    assert not exporter.dropped
+    assert sorted(i for batch in sink.batches for i in batch.look_ids) == list(range(20000))
+
+
+def test_jsonl_sink_rotates(tmp_path):
+    path = tmp_path / "looks.jsonl"
+    sink = JsonLinesSink(path, max_bytes=100, backup_count=2)
+    for _ in range(4):
+        sink.write(_batch(2))
+    sink.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["looks.jsonl", "looks.jsonl.1", "looks.jsonl.2"]
+    record = json.loads(path.read_text().splitlines()[0])
+    assert record == {"target": "func", "id": 0, "start_ns": 1000, "end_ns": 1001, "look_time": 1e-9}
+
+
+def test_csv_sink(tmp_path):
+    path = tmp_path / "looks.csv"
+    sink = CsvSink(path)
+    sink.write(_batch(2, target="a,b"))
+    sink.close()
+    rows = list(csv.reader(path.open()))
+    assert rows[0] == list(CsvSink.fields)
+    assert rows[2] == ["a,b", "1", "1001", "1002", "1e-09"]
+
+
+def test_binary_sink_round_trip(tmp_path):
+    path = tmp_path / "looks.bin"
+    sink = BinarySink(path)
+    sink.write(_batch(3))
+    sink.write(LookBatch("dict", ["a"], array('q', [5]), array('q', [7]), 0))
+    sink.close()
+    batches = list(read_binary(path))
+    assert batches[0] == _batch(3)
+    assert batches[1] == LookBatch("dict", array('q', [-1]), array('q', [5]), array('q', [7]), 0)
@@ -0,0 +1,62 @@
+import random
+import numpy as np
+from glance import Watch, Glance
+from glance.sketch import QuantileSketch
+import pytest
+from glance.clock import NS_PER_SECOND
+
+rng = random.Random(5)
+values = [rng.lognormvariate(-7, 1.5) for _ in range(20000)]
+
+
+def test_sketch_relative_error():
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    qs = [1, 50, 95, 99, 99.9]
+    for estimate, exact in zip(sketch.percentiles(qs), np.percentile(values, qs, method="lower")):
+        assert abs(estimate - exact) <= 0.0101 * exact
+    assert sketch.percentile(0) == min(values)
+    assert sketch.percentile(100) == max(values)
+
+
+def test_sketch_merge():
+    whole, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (first if i % 2 else second).add(value)
+    merged = first.copy().merge(second)
+    assert merged == whole
+    assert first.count == len(values) // 2
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+def test_sketch_fixed_memory():
+    sketch = QuantileSketch(max_bins=256)
+    for value in values:
+        sketch.add(value)
+    assert len(sketch.bins) <= 256
+    assert sketch.count == len(values)
+    assert abs(sketch.percentile(99) - np.percentile(values, 99)) <= 0.02 * np.percentile(values, 99)
+
+
+def test_sketch_empty():
+    with pytest.raises(ValueError):
+        QuantileSketch().percentile(50)
+
+
+def test_watch_percentiles():
+    for sketch in (None, True):
+        watch = Watch("test", storage="columnar", sketch=sketch)
+        for look_id, value in enumerate(values):
+            watch.looks.append(look_id, 0, round(value * NS_PER_SECOND))
+        p50, p99 = watch.percentiles([50, 99])
+        assert abs(p50 - np.percentile(values, 50)) <= 0.011 * p50
+        assert abs(watch.percentile(99) - p99) < 1e-12
+
+
+def test_glance_sketches():
+    gl = Glance(sketches=True)
+    gl.start_watch("test")
+    assert isinstance(gl.watches["test"].sketch, QuantileSketch)
@@ -0,0 +1,92 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.glance import Glance
+from glance.retention import RingBuffer, StatsOnly
+from glance.snapshot import collect, with_snapshot
+
+worker_glance = Glance()
+
+
+@worker_glance.watch
+def square(x):
+    return x * x
+
+
+@with_snapshot(worker_glance)
+def task(x):
+    return square(x)
+
+
+def _glance(look_times, **options):
+    clock = FakeClock()
+    gl = Glance(clock=clock, **options)
+    gl.start_watch("test")
+    watch = gl.watches["test"]
+    for look_time in look_times:
+        look_id = watch.start_look()
+        clock.advance(look_time * NS_PER_SECOND)
+        watch.stop_look(look_id)
+    return gl
+
+
+@pytest.mark.parametrize("storage", ["columnar", "dict"])
+def test_merge_snapshots(storage):
+    first = _glance([1, 2, 3], storage=storage, sketches=True)
+    second = _glance([4, 10], storage=storage, sketches=True)
+    snapshot = pickle.loads(pickle.dumps(second.snapshot()))
+    first.merge(snapshot)
+    watch = first.watches["test"]
+    assert watch.stats.count == 5
+    assert watch.mean == 4.0
+    assert watch.std == pytest.approx(3.5355, rel=1e-4)
+    assert watch.longest_look() == 10.0
+    assert watch.looks[watch.longest_look.key()].look_time() == 10.0
+    assert sorted(watch.looks.times().tolist()) == [1, 2, 3, 4, 10]
+    assert watch.percentile(100) == pytest.approx(10, rel=0.02)
+    assert watch.find_outliers.times(n_std=1.5).tolist() == [10.0]
+
+
+def test_merge_keeps_wall_clock_and_stats_only_aggregates():
+    first = _glance([1])
+    second = _glance([2, 3], retention=StatsOnly())
+    assert not len(second.snapshot().watches["test"])
+    first.merge(second)
+    watch = first.watches["test"]
+    assert watch.stats.count == 3
+    assert watch.stats.max_id is None
+    look = watch.looks[0]
+    assert look.start_time == pytest.approx(second.watches["test"].clock.to_timestamp(0), abs=1e-3)
+
+
+@pytest.mark.parametrize("storage", ["columnar", "dict"])
+@pytest.mark.parametrize("worker_retention", [StatsOnly(), RingBuffer(3)])
+def test_merge_retained_then_record(storage, worker_retention):
+    first = _glance([1, 2], storage=storage, retention=RingBuffer(4))
+    first.merge(_glance([3] * 5, storage=storage, retention=worker_retention))
+    watch = first.watches["test"]
+    for _ in range(6):
+        look_id = watch.start_look()
+        first.clock.advance(NS_PER_SECOND)
+        watch.stop_look(look_id)
+    assert watch.stats.count == 13
+    assert watch.looks.times().tolist() == [1, 1, 1, 1]
+
+
+def test_snapshot_reset_and_new_watches():
+    gl = _glance([1, 2])
+    snapshot = gl.snapshot(reset=True)
+    assert len(snapshot.watches["test"]) == 2
+    assert gl.watches["test"].stats.count == 0
+    merged = Glance().merge(snapshot, gl)
+    assert merged.watches["test"].stats.count == 2
+
+
+def test_collect_from_process_pool():
+    parent = Glance()
+    with ProcessPoolExecutor(2) as pool:
+        values = list(collect(parent, pool.map(task, range(20))))
+    assert values == [x * x for x in range(20)]
+    assert parent.watches["square"].stats.count == 20
+    assert len(parent.watches["square"].looks.times()) == 20
@@ -0,0 +1,272 @@
+import asyncio
+import threading
+import pytest
+from glance.buckets import size
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.glance import Glance
+from glance.retention import RingBuffer
+from glance.spans import current_span
+
+
+def test_nested_spans_build_call_tree():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+
+    @gl.span
+    def func_b():
+        clock.advance(2 * NS_PER_SECOND)
+
+    @gl.span("func_a")
+    def func_a():
+        clock.advance(NS_PER_SECOND)
+        func_b()
+        func_b()
+        return current_span().path
+
+    assert func_a() == ("func_a",)
+    with gl.span("request"):
+        func_a()
+        assert current_span().path == ("request",)
+    assert current_span() is None
+
+    tree = gl.call_tree
+    assert tree.find("func_a").calls == 1
+    assert tree.find("func_a").inclusive == 5.0
+    assert tree.find("func_a").exclusive == 1.0
+    assert tree.find("func_a", "func_b").calls == 2
+    assert tree.find("request").exclusive == 0.0
+    assert tree.find("request", "func_a", "func_b").inclusive == 4.0
+    assert [path for path, _ in tree.walk()] == [
+        ("func_a",), ("func_a", "func_b"), ("request",), ("request", "func_a"), ("request", "func_a", "func_b"),
+    ]
+    assert "func_b: 2 calls" in tree.format()
+    assert gl.watches["func_b"].stats.count == 4
+    assert gl.watches["func_a"].mean == 5.0
+
+
+def test_span_closes_on_error():
+    gl = Glance()
+
+    @gl.span
+    def fails():
+        raise KeyError()
+
+    try:
+        fails()
+    except KeyError:
+        pass
+    assert current_span() is None
+    assert gl.call_tree.find("fails").calls == 1
+
+
+def test_spans_per_thread_and_task():
+    gl = Glance()
+
+    @gl.span
+    async def child(delay):
+        await asyncio.sleep(delay)
+        return current_span().path
+
+    async def parent():
+        async with gl.span("parent"):
+            return await asyncio.gather(child(0.01), child(0))
+
+    paths = asyncio.run(parent())
+    assert paths == [("parent", "child")] * 2
+
+    def work():
+        with gl.span("thread"):
+            with gl.span("inner"):
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert gl.call_tree.find("thread", "inner").calls == 4
+    assert gl.call_tree.find("parent", "child").calls == 2
+
+
+def test_spans_of_other_glances_are_skipped():
+    outer, inner = Glance(), Glance()
+    with outer.span("a"):
+        with inner.span("b"):
+            with outer.span("c"):
+                pass
+    assert list(outer.call_tree.find("a").children) == ["c"]
+    assert list(inner.call_tree.children) == ["b"]
+
+
+def test_span_exit_closes_its_own_frame():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+
+    def rows():
+        with gl.span("inner"):
+            clock.advance(NS_PER_SECOND)
+            yield 1
+            clock.advance(2 * NS_PER_SECOND)
+
+    generator = rows()
+    with gl.span("outer"):
+        clock.advance(4 * NS_PER_SECOND)
+        next(generator)
+    assert current_span() is None
+    assert gl.watches["outer"].looks.open_count == 0
+    assert gl.watches["inner"].looks.open_count == 1
+    assert gl.call_tree.find("outer").inclusive == 5.0
+    clock.advance(8 * NS_PER_SECOND)
+    next(generator, None)
+    assert current_span() is None
+    assert gl.watches["inner"].stats.count == 1
+    assert gl.call_tree.find("outer", "inner").inclusive == 11.0
+
+
+def test_failed_spans_are_failures():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+
+    @gl.span
+    def parse():
+        clock.advance(NS_PER_SECOND)
+        raise ValueError()
+
+    @gl.span("fetch")
+    async def fetch():
+        raise TimeoutError()
+
+    with pytest.raises(ValueError):
+        with gl.span("request"):
+            clock.advance(2 * NS_PER_SECOND)
+            parse()
+    with pytest.raises(TimeoutError):
+        asyncio.run(fetch())
+    assert gl.watches["parse"].stats.count == 0
+    assert gl.watches["parse"].failures["ValueError"].stats.mean == 1.0
+    assert gl.watches["request"].failures["ValueError"].stats.mean == 3.0
+    assert gl.watches["fetch"].failures["TimeoutError"].stats.count == 1
+    assert all(watch.looks.open_count == 0 for watch in gl.watches.values())
+    assert gl.call_tree.find("request", "parse").calls == 1
+
+
+def test_shared_span_across_tasks():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+    db = gl.span("db")
+    entered = []
+
+    async def query(delay):
+        async with db:
+            entered.append(delay)
+            while len(entered) < 2:
+                await asyncio.sleep(0)
+            await asyncio.sleep(delay / 100)
+            clock.advance(delay * NS_PER_SECOND)
+            return current_span().path
+
+    async def main():
+        return await asyncio.gather(query(1), query(5))
+
+    assert asyncio.run(main()) == [("db",)] * 2
+    assert current_span() is None
+    looks = gl.watches["db"].looks
+    assert looks.open_count == 0
+    assert [looks[look_id].look_time() for look_id in (0, 1)] == [1.0, 6.0]
+    with gl.span("after"):
+        assert current_span().path == ("after",)
+
+
+def test_span_times_generators():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+
+    @gl.span
+    def rows():
+        clock.advance(NS_PER_SECOND)
+        yield 1
+        with gl.span("parse"):
+            clock.advance(2 * NS_PER_SECOND)
+            yield current_span().path
+
+    @gl.span
+    async def pages():
+        clock.advance(4 * NS_PER_SECOND)
+        yield 1
+
+    paths = []
+    with gl.span("request"):
+        for row in rows():
+            paths.append(current_span().path)
+            clock.advance(8 * NS_PER_SECOND)
+
+    async def consume():
+        return [page async for page in pages()]
+
+    assert asyncio.run(consume()) == [1]
+    assert paths == [("request",)] * 2
+    assert current_span() is None
+    assert gl.watches["rows"].mean == 19.0
+    assert gl.watches["pages"].mean == 4.0
+    assert gl.call_tree.find("request", "rows", "parse").inclusive == 10.0
+    assert gl.call_tree.find("request").exclusive == 0.0
+
+
+@pytest.mark.parametrize("storage, threadsafe", [("columnar", True), ("columnar", False), ("dict", True)])
+def test_watched_calls_nest_under_spans(storage, threadsafe):
+    clock = FakeClock()
+    gl = Glance(clock=clock, storage=storage, threadsafe=threadsafe)
+
+    @gl.watch
+    def parse(seconds):
+        clock.advance(seconds * NS_PER_SECOND)
+
+    @gl.watch
+    async def fetch():
+        clock.advance(4 * NS_PER_SECOND)
+
+    parse(1)
+    with gl.span("request") as request:
+        parse(2)
+        asyncio.run(fetch())
+        with gl.span("db") as db:
+            parse(8)
+    parse(16)
+
+    request_look = ("request", request.look_id)
+    looks = gl.watches["parse"].looks
+    parents = looks.parents()
+    assert parents.count(None) == 2
+    assert sorted(filter(None, parents)) == [("db", db.look_id), request_look]
+    assert [looks[look_id].parent for look_id in looks.ids()] == parents
+    assert gl.watches["fetch"].looks.parents() == [request_look]
+    assert gl.watches["db"].looks.parents() == [request_look]
+    assert gl.watches["parse"].stats.count == 4
+    tree = gl.call_tree
+    assert tree.find("request", "parse").inclusive == 2.0
+    assert tree.find("request", "fetch").calls == 1
+    assert tree.find("request", "db", "parse").exclusive == 8.0
+    assert tree.find("request").inclusive == 14.0
+    assert tree.find("request").exclusive == 0.0
+    assert tree.find("request", "db").exclusive == 0.0
+    assert "parse" not in tree.children
+
+
+def test_parents_follow_retained_looks():
+    gl = Glance(retention=RingBuffer(2))
+
+    @gl.watch(key=size())
+    def parse(data):
+        pass
+
+    with gl.span("request") as request:
+        parse([1])
+    with pytest.raises(ValueError):
+        with gl.span("request"):
+            parse([1, 2])
+            raise ValueError()
+    parse([1, 2, 3])
+    looks = gl.watches["parse"].looks
+    assert looks.parents() == [None, ("request", request.look_id + 1)]
+    assert gl.watches["parse"].buckets.keys() == [1, 2, 3]
+    assert gl.call_tree.find("request", "parse").calls == 2
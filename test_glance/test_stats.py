@@ -0,0 +1,66 @@
+import math
+import statistics
+from glance import Watch, Look
+from glance.stats import RunningStats
+from glance.errors import GlanceWatchEmptyError
+import pytest
+from glance.clock import NS_PER_SECOND
+
+values = [0.5, 1.25, 3.0, 0.75, 8.0, 2.0]
+
+
+def test_running_stats_matches_statistics():
+    stats = RunningStats()
+    for look_id, value in enumerate(values):
+        stats.add(value, look_id)
+    assert stats.count == len(values)
+    assert stats.total == sum(values)
+    assert math.isclose(stats.mean, statistics.mean(values))
+    assert math.isclose(stats.std, statistics.stdev(values))
+    assert (stats.min_id, stats.min) == (0, 0.5)
+    assert (stats.max_id, stats.max) == (4, 8.0)
+
+
+def test_running_stats_reset():
+    stats = RunningStats()
+    stats.add(1.0)
+    stats.reset()
+    assert stats == RunningStats()
+    assert math.isnan(stats.std)
+
+
+def test_watch_stats_follow_look_stop():
+    watch = Watch("test")
+    look_id = watch.start_look()
+    assert watch.stats.count == 0
+    watch.looks[look_id].stop()
+    assert watch.stats.count == 1
+    assert watch.longest_look.key() == look_id
+
+
+def test_watch_stats_ignore_open_looks():
+    watch = Watch("test", storage="columnar")
+    for look_id, value in enumerate(values):
+        watch.looks.append(look_id, 0, round(value * NS_PER_SECOND))
+    watch.start_look()
+    assert math.isclose(watch.mean, statistics.mean(values))
+    assert watch.longest_look.tuple() == (4, 8.0)
+
+
+def test_watch_stats_rebuild_after_delete():
+    watch = Watch("test")
+    for look_id, value in enumerate(values):
+        watch.looks[look_id] = Look("test", start_time=1.0, end_time=1.0 + value)
+    del watch.looks[4]
+    assert watch.longest_look.tuple() == (2, 3.0)
+    assert watch.stats.count == len(values) - 1
+
+
+def test_watch_empty_error():
+    watch = Watch("test")
+    with pytest.raises(GlanceWatchEmptyError):
+        watch.mean
+    watch.looks["a"] = Look("test", start_time=1.0, end_time=2.0)
+    assert watch.mean == 1.0
+    with pytest.raises(GlanceWatchEmptyError):
+        watch.std
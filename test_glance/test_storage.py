@@ -0,0 +1,103 @@
+import pytest
+from glance import Watch, Glance, Look
+from glance.storage import ColumnarLooks, DictLooks
+from glance.errors import GlanceLookClosedError, GlanceLookNotFoundError
+from glance.clock import NS_PER_SECOND
+
+
+def make_columnar_watch(times):
+    watch = Watch("columnar", storage="columnar")
+    for look_id, look_time in enumerate(times):
+        watch.looks.append(look_id, 0, look_time * NS_PER_SECOND)
+    return watch
+
+
+def test_watch_storage_backends():
+    assert isinstance(Watch("test").looks, DictLooks)
+    assert isinstance(Watch("test", storage="columnar").looks, ColumnarLooks)
+
+
+def test_columnar_start_stop_look():
+    watch = Watch("test", storage="columnar")
+    look_id = watch.start_look()
+    assert look_id == 0
+    assert watch.looks[look_id].is_done is False
+    watch.stop_look(look_id)
+    look = watch.looks[look_id]
+    assert isinstance(look, Look)
+    assert look.is_done is True
+    assert look.id == look_id
+    assert len(watch.looks) == 1
+
+
+def test_columnar_stop_indexed_look():
+    watch = Watch("test", storage="columnar")
+    look_id = watch.start_look()
+    look, other = watch.looks[look_id], watch.looks[look_id]
+    look.stop()
+    assert watch.looks.open_count == 0
+    assert watch.stats.count == 1
+    assert watch.looks[look_id].end_ns == look.end_ns
+    with pytest.raises(GlanceLookClosedError):
+        other.stop()
+
+
+def test_columnar_stop_errors():
+    watch = Watch("test", storage="columnar")
+    look_id = watch.start_look()
+    watch.stop_look(look_id)
+    try:
+        watch.stop_look(look_id)
+        assert False
+    except GlanceLookClosedError:
+        pass
+    try:
+        watch.stop_look(42)
+        assert False
+    except GlanceLookNotFoundError:
+        pass
+
+
+def test_columnar_stats():
+    watch = make_columnar_watch([1, 2, 3, 4, 10])
+    assert watch.mean == 4
+    assert round(watch.std, 4) == 3.5355
+    assert watch.longest_look.tuple() == (4, 10)
+    assert watch.shortest_look.tuple() == (0, 1)
+    assert watch.find_outliers(n_std=1.5) == [(4, 10)]
+    assert [look.id for look in watch.find_outliers.looks(n_std=1.5)] == [4]
+    assert list(watch._plot_data()) == [1, 2, 3, 4, 10]
+
+
+def test_columnar_matches_dict_storage():
+    dict_watch = Watch("dict")
+    for look_id, look_time in enumerate([1, 2, 3, 4, 10]):
+        dict_watch.looks[look_id] = Look("dict", None, start_time=10.0, end_time=10.0 + look_time)
+    columnar_watch = make_columnar_watch([1, 2, 3, 4, 10])
+    assert dict_watch.mean == columnar_watch.mean
+    assert dict_watch.std == columnar_watch.std
+    assert dict_watch.find_outliers() == columnar_watch.find_outliers()
+
+
+def test_glance_columnar_watch():
+    gl = Glance(storage="columnar")
+
+    @gl.watch
+    def func(x):
+        return x * 2
+
+    assert [func(i) for i in range(3)] == [0, 2, 4]
+    assert list(gl.watches["func"].looks) == [0, 1, 2]
+
+
+def test_columnar_fold_on_read():
+    watch = Watch("test", storage="columnar")
+    looks = watch.looks
+    pending, _, _ = looks.fast_path()
+    for look_time in (1, 2, 3):
+        pending.extend((0, look_time * NS_PER_SECOND))
+    assert watch.stats.count == 3
+    assert not pending
+    assert watch.longest_look.tuple() == (2, 3.0)
+    assert looks.record(0, 4 * NS_PER_SECOND) == 3
+    assert watch.mean == 2.5
@@ -0,0 +1,93 @@
+import pytest
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.glance import Glance
+from glance.retention import StatsOnly
+from glance.summary import BASE_COLUMNS
+
+
+@pytest.fixture
+def gl():
+    clock = FakeClock()
+    gl = Glance(clock=clock)
+
+    def timed(name, seconds):
+        def call():
+            clock.advance(seconds * NS_PER_SECOND)
+        call.__name__ = name
+        return gl.watch(call)
+
+    fast, slow, rare = timed("fast", 1), timed("slow", 4), timed("rare", 10)
+    for _ in range(4):
+        fast()
+        slow()
+    rare()
+    gl.start_watch("idle")
+    return gl
+
+
+def test_summary(gl):
+    table = gl.summary(qs=(50, 99))
+    assert table.columns == ("watch", "count", "total", "share", "mean", "p50", "p99", "max", "throughput")
+    assert [row[0] for row in table.rows] == ["slow", "rare", "fast", "idle"]
+    records = {record["watch"]: record for record in table.records()}
+    assert records["slow"]["count"] == 4
+    assert records["slow"]["total"] == 16
+    assert records["slow"]["share"] == pytest.approx(16 / 30)
+    assert records["fast"]["mean"] == 1
+    assert records["fast"]["p50"] == pytest.approx(1, rel=0.01)
+    assert records["rare"]["max"] == 10
+    assert records["idle"]["count"] == 0
+    assert records["idle"]["share"] is None
+    assert records["idle"]["p99"] is None
+    text = table.format().splitlines()
+    assert len(text) == 5
+    assert text[0].split() == list(table.columns)
+    assert text[1].split()[:4] == ["slow", "4", "16", "53.3%"]
+    assert text[-1].split()[:8] == ["idle", "0", "0", "-", "-", "-", "-", "-"]
+
+
+def test_summary_sort(gl):
+    assert [row[0] for row in gl.summary(sort="mean").rows] == ["rare", "slow", "fast", "idle"]
+    by_count = gl.summary(sort="count").sort("count", reverse=False)
+    assert [row[0] for row in by_count.rows] == ["idle", "rare", "fast", "slow"]
+    assert [row[0] for row in gl.summary(sort=None).rows] == ["fast", "slow", "rare", "idle"]
+    with pytest.raises(ValueError):
+        gl.summary(sort="p42")
+
+
+@pytest.mark.parametrize("metric, k, largest, expected", [
+    ("total", 2, True, ["slow", "rare"]),
+    ("count", 2, True, ["fast", "slow"]),
+    ("p99", 1, True, ["rare"]),
+    ("mean", 10, False, ["fast", "slow", "rare"]),
+])
+def test_top_k(gl, metric, k, largest, expected):
+    table = gl.top_k(metric, k, largest)
+    assert [row[0] for row in table.rows] == expected
+    if metric.startswith("p"):
+        assert table.columns == BASE_COLUMNS[:5] + (metric,) + BASE_COLUMNS[5:]
+
+
+@pytest.mark.parametrize("metric", ["watch", "median", "pxx"])
+def test_top_k_unknown_metric(gl, metric):
+    with pytest.raises(ValueError):
+        gl.top_k(metric)
+
+
+def test_summary_stats_only():
+    clock = FakeClock()
+    gl = Glance(clock=clock, retention=StatsOnly())
+
+    @gl.watch
+    def call():
+        clock.advance(2 * NS_PER_SECOND)
+
+    call()
+    call()
+    records = gl.summary(qs=(50, 99)).records()
+    assert records[0]["count"] == 2
+    assert records[0]["mean"] == 2
+    assert records[0]["p50"] is None
+    assert records[0]["p99"] is None
+    assert len(gl.top_k("p99")) == 0
+    assert [row[0] for row in gl.top_k("total").rows] == ["call"]
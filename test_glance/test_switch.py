@@ -0,0 +1,105 @@
+import asyncio
+import os
+import subprocess
+import sys
+import pytest
+import glance
+from glance.glance import Glance
+from glance.sampling import EveryNth
+
+
+def func(a):
+    return a
+
+
+@pytest.fixture
+def disabled():
+    glance.disable()
+    try:
+        yield
+    finally:
+        glance.enable()
+
+
+def test_disabled_at_decoration(disabled):
+    gl = Glance()
+    assert not glance.is_enabled()
+    assert gl.watch(func) is func
+    assert gl.watch(capture_args=True)(func) is func
+    assert gl.watches == {}
+
+
+def test_watch_disabled_at_decoration():
+    gl = Glance()
+    gl.start_watch("func")
+    gl.watches["func"].enabled = False
+    assert gl.watch(func) is func
+
+
+@pytest.mark.parametrize("options", [{}, {"threadsafe": False}, {"storage": "dict"}, {"sampling": EveryNth(1)}])
+def test_runtime_toggle(options):
+    gl = Glance(**options)
+    wrapped = gl.watch(func)
+    watch = gl.watches["func"]
+    assert wrapped(1) == 1
+    watch.enabled = False
+    assert not watch.enabled
+    assert wrapped(2) == 2
+    watch.enabled = True
+    glance.disable()
+    try:
+        assert wrapped(3) == 3
+        assert watch.enabled
+        assert not watch.switch.on
+    finally:
+        glance.enable()
+    assert wrapped(4) == 4
+    assert watch.stats.count == 2
+
+
+def test_runtime_toggle_coroutines_and_generators():
+    gl = Glance()
+
+    @gl.watch
+    async def fetch():
+        return 1
+
+    @gl.watch
+    def numbers():
+        yield 1
+        yield 2
+
+    @gl.watch
+    async def stream():
+        yield 1
+
+    async def consume():
+        return [item async for item in stream()]
+
+    for enabled in (True, False):
+        for watch in gl.watches.values():
+            watch.enabled = enabled
+        assert asyncio.run(fetch()) == 1
+        assert list(numbers()) == [1, 2]
+        assert asyncio.run(consume()) == [1]
+    assert [watch.stats.count for watch in gl.watches.values()] == [1, 1, 1]
+
+
+def test_environment():
+    script = """
+import glance
+from glance.glance import Glance
+def func():
+    pass
+gl = Glance()
+print(glance.is_enabled(), gl.watch(func) is func)
+"""
+    for env, expected in (
+        ({"GLANCE_ENABLED": "0"}, "False True"),
+        ({"GLANCE_ENABLED": "1"}, "True False"),
+        ({"GLANCE_DISABLED_WATCHES": "other, func"}, "True True"),
+    ):
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True, env=dict(os.environ, **env),
+        ).stdout
+        assert output.strip() == expected
@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from glance.glance import Glance, Watch
+from glance.retention import RingBuffer
+from glance.storage import ColumnarLooks
+
+
+def _run(n_threads, calls, func):
+    barrier = threading.Barrier(n_threads)
+
+    def work(_):
+        barrier.wait()
+        for i in range(calls):
+            func(i)
+
+    with ThreadPoolExecutor(n_threads) as pool:
+        list(pool.map(work, range(n_threads)))
+
+
+def test_threaded_watch_counts_every_call(monkeypatch):
+    monkeypatch.setattr(ColumnarLooks, "fold_size", 16)
+    gl = Glance()
+
+    @gl.watch
+    def func(x):
+        return x
+
+    _run(8, 1000, func)
+    watch = gl.watches["func"]
+    ids, times = watch.looks.columns()
+    assert watch.stats.count == 8000
+    assert sorted(ids) == list(range(8000))
+    assert (times >= 0).all()
+
+
+def test_threaded_reads_see_consistent_snapshots(monkeypatch):
+    monkeypatch.setattr(ColumnarLooks, "fold_size", 8)
+    gl = Glance(retention=RingBuffer(100))
+
+    @gl.watch
+    def func(x):
+        return x
+
+    watch = gl.watches["func"]
+    done = threading.Event()
+    errors = []
+
+    def read():
+        while not done.is_set():
+            ids, times = watch.looks.columns()
+            if len(ids) != len(times) or len(ids) > 100:
+                errors.append((len(ids), len(times)))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    _run(4, 2000, func)
+    done.set()
+    reader.join()
+    assert not errors
+    assert watch.stats.count == 8000
+
+
+def test_threaded_dict_looks():
+    watch = Watch("test")
+
+    def look(_):
+        watch.stop_look(watch.start_look())
+
+    _run(4, 250, look)
+    assert watch.stats.count == 1000
+    assert len(watch.looks.ids()) == 1000
+
+
+def test_flush_drains_thread_buffers():
+    gl = Glance()
+
+    @gl.watch
+    def func(x):
+        return x
+
+    _run(2, 10, func)
+    looks = gl.watches["func"].looks
+    assert len(looks.look_ids) == 0
+    gl.flush()
+    assert len(looks.look_ids) == 20
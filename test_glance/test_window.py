@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from glance.clock import FakeClock, NS_PER_SECOND
+from glance.glance import Glance
+from glance.window import RollingWindow
+
+
+def test_window_rotates_buckets():
+    window = RollingWindow(span=10, buckets=10)
+    for second in range(25):
+        window.add(second * NS_PER_SECOND, float(second))
+    stats = window.stats(24 * NS_PER_SECOND)
+    assert stats.count == 10
+    assert stats.min == 15.0
+    assert window.stats(24 * NS_PER_SECOND, last=3).mean == 23.0
+    assert window.stats(40 * NS_PER_SECOND).count == 0
+    window.add(2 * NS_PER_SECOND, 100.0)  # Older than the window, ignored.
+    assert window.stats(24 * NS_PER_SECOND).max == 24.0
+    assert [start for start, _, _ in window.series(24 * NS_PER_SECOND)] == [s * NS_PER_SECOND for s in range(15, 25)]
+
+
+def test_window_add_many_matches_add():
+    end_ns = np.arange(0, 20 * NS_PER_SECOND, NS_PER_SECOND // 4)
+    values = np.linspace(0.1, 8, len(end_ns))
+    one, many = RollingWindow(10, 5), RollingWindow(10, 5)
+    for end, value, look_id in zip(end_ns.tolist(), values.tolist(), range(len(values))):
+        one.add(end, value, look_id)
+    many.add_many(end_ns, values, list(range(len(values))))
+    now = int(end_ns[-1])
+    assert many.stats(now).count == one.stats(now).count == 40
+    assert many.stats(now).mean == pytest.approx(one.stats(now).mean)
+    assert many.stats(now).max_id == one.stats(now).max_id == 79
+    assert many.sketch(now).percentile(50) == pytest.approx(one.sketch(now).percentile(50))
+
+
+@pytest.mark.parametrize("storage", ["columnar", "dict"])
+def test_watch_rolling_stats(storage, tmp_path):
+    clock = FakeClock()
+    gl = Glance(clock=clock, storage=storage, window=RollingWindow(span=60, buckets=6))
+    gl.start_watch("test")
+    watch = gl.watches["test"]
+    for look_time in [1] * 50 + [5] * 10:
+        look_id = watch.start_look()
+        clock.advance(look_time * NS_PER_SECOND)
+        watch.stop_look(look_id)
+    assert watch.stats.count == 60
+    recent = watch.rolling(last=20)
+    assert recent.count == 3
+    assert recent.mean == 5.0
+    assert watch.rolling().count == 11
+    assert watch.rolling_percentiles([50], last=20)[0] == pytest.approx(5, rel=0.02)
+    series = watch.time_series(qs=[50])
+    assert len(series) == 6
+    assert series[-1]["max"] == 5.0
+    assert set(series[0]) == {"time", "count", "mean", "max", "p50"}
+    watch.plot_time_series(str(tmp_path / "series.png"))
+
+
+def test_watch_without_window():
+    gl = Glance()
+    gl.start_watch("test")
+    with pytest.raises(ValueError):
+        gl.watches["test"].rolling()